@@ -0,0 +1,3 @@
+from .api import AutoMTUError, Config, Result, Session, run
+
+__all__ = ["AutoMTUError", "Config", "Result", "Session", "run"]
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-from .cli import build_parser
+import sys
+
+from .cli import (
+    build_hotplug_parser,
+    build_parser,
+    build_responder_parser,
+    build_serve_parser,
+)
 from .core import run_automtu
+from .hotplug import run_hotplug
+from .pmtu import load_backends
+from .serve import run_serve
+from .udp import run_responder
 
 
 def main() -> int:
+    load_backends()  # before any parser: --pmtu-backend may name a plugin
+    if sys.argv[1:2] == ["responder"]:
+        return run_responder(build_responder_parser().parse_args(sys.argv[2:]))
+    if sys.argv[1:2] == ["serve"]:
+        return run_serve(build_serve_parser().parse_args(sys.argv[2:]))
+    if sys.argv[1:2] == ["hotplug"]:
+        return run_hotplug(build_hotplug_parser().parse_args(sys.argv[2:]))
     args = build_parser().parse_args()
     return run_automtu(args)
 
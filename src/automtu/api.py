@@ -0,0 +1,80 @@
+"""
+Embeddable library API.
+
+    from automtu import Config, Session
+
+    session = Session()
+    result = session.run(Config(pmtu_target=("1.1.1.1",), dry_run=True))
+    print(result.effective_mtu, result.to_dict()["pmtu"]["results"])
+
+Nothing is printed; errors are raised as AutoMTUError. A Session keeps the
+PMTUs it has seen and revalidates them as warm-start hints on the next run,
+and reuses resolved hostnames until their TTL expires.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+from .core import (
+    ApplyFn,
+    AutoMTUError,
+    Config,
+    LogFn,
+    ProbeFn,
+    Result,
+    compute,
+)
+from .resolve import DnsCache
+
+__all__ = ["AutoMTUError", "Config", "Result", "Session", "run"]
+
+
+def run(
+    config: Config,
+    *,
+    probe: ProbeFn | None = None,
+    apply: ApplyFn | None = None,
+    log: LogFn | None = None,
+) -> Result:
+    """
+    Run once. probe(target, hint) -> PMTU and apply(iface, mtu, dry_run) are
+    optional replacements for the built-in probe engines and `ip link set`.
+    """
+    return compute(config, probe=probe, apply=apply, log=log)
+
+
+class Session:
+    """
+    Reusable runner that carries warm caches (last known PMTU per target) across runs.
+    """
+
+    def __init__(
+        self,
+        *,
+        probe: ProbeFn | None = None,
+        apply: ApplyFn | None = None,
+        log: LogFn | None = None,
+    ) -> None:
+        self._probe = probe
+        self._apply = apply
+        self._log = log
+        self.known_pmtus: dict[str, int] = {}
+        self.dns_cache = DnsCache()
+
+    def run(self, config: Config) -> Result:
+        hinted = replace(
+            config, pmtu_hints={**self.known_pmtus, **dict(config.pmtu_hints)}
+        )
+        self.dns_cache.ttl = config.dns_ttl
+        result = compute(
+            hinted,
+            probe=self._probe,
+            apply=self._apply,
+            log=self._log,
+            dns_cache=self.dns_cache,
+        )
+        for target, pmtu in result.pmtu_results.items():
+            if pmtu is not None:
+                self.known_pmtus[target] = int(pmtu)
+        return result
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import os
+import socket
+from collections.abc import Callable
+
+from .net import iface_exists, read_iface_mtu
+
+# Boot fast-start (--fast-start): re-apply the MTUs the last run applied (state
+# file "applied") within milliseconds, report readiness to systemd so units
+# ordered after automtu can start, then probe and change only what differs.
+
+ApplyFn = Callable[[str, int, bool], None]
+LogFn = Callable[[str], None]
+
+
+def sd_notify(message: str) -> bool:
+    """
+    Send a state update (e.g. "READY=1") to systemd; False outside a
+    Type=notify service.
+    """
+    addr = os.environ.get("NOTIFY_SOCKET")
+    if not addr:
+        return False
+    if addr.startswith("@"):  # abstract namespace socket
+        addr = "\0" + addr[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as s:
+            s.connect(addr)
+            s.sendall(message.encode())
+    except OSError:
+        return False
+    return True
+
+
+def _current_mtu(iface: str) -> int | None:
+    try:
+        return read_iface_mtu(iface)
+    except (OSError, ValueError):
+        return None
+
+
+def apply_known_good(state: dict, apply: ApplyFn, *, dry: bool, log: LogFn) -> dict:
+    """
+    Apply the last applied MTU per interface from a loaded state. Interfaces
+    that do not exist yet or already have that MTU are left alone.
+    Returns iface -> MTU for the interfaces that were changed.
+    """
+    changed: dict[str, int] = {}
+    for iface, mtu in sorted((state.get("applied") or {}).items()):
+        if not isinstance(mtu, int):
+            continue
+        if not iface_exists(iface):
+            log(f"[automtu] Fast-start: {iface} not present yet; skipping.")
+            continue
+        if _current_mtu(iface) == mtu:
+            continue
+        log(f"[automtu] Fast-start: applying last known-good MTU {mtu} to {iface}")
+        apply(iface, mtu, dry)
+        changed[iface] = mtu
+    return changed
+
+
+def only_changed(apply: ApplyFn, log: LogFn) -> ApplyFn:
+    """
+    Wrap apply so interfaces that already have the requested MTU are not
+    touched again (no link reset after a fast-start that was already right).
+    """
+
+    def apply_if_changed(iface: str, mtu: int, dry: bool) -> None:
+        if _current_mtu(iface) == mtu:
+            log(f"[automtu] {iface} already at MTU {mtu}; unchanged.")
+            return
+        apply(iface, mtu, dry)
+
+    return apply_if_changed
@@ -3,6 +3,25 @@ from __future__ import annotations
 import argparse
 import os
 
+from .facts import _DEFAULT_FACTS_PATH
+from .history import _DEFAULT_HISTORY_PATH, HISTORY_POLICIES
+from .pmtu import ENGINES
+from .replay import REPLAY_SPEEDS
+from .serve import DEFAULT_SOCKET_PATH
+from .state import _DEFAULT_STATE_PATH
+from .udp import DEFAULT_RESPONDER_PORT
+
+
+def _overhead_arg(value: str) -> int | str:
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid overhead {value!r} (expected bytes or 'auto')"
+        ) from None
+
 
 def build_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(
@@ -22,7 +41,60 @@ def build_parser() -> argparse.ArgumentParser:
     ap.add_argument(
         "--pmtu-target",
         action="append",
-        help="Target hostname/IP to probe PMTU. Repeatable or comma-separated.",
+        help="Target hostname/IP to probe PMTU. Repeatable or comma-separated. "
+        "Prefix with udp: (e.g. udp:host:port) to probe an 'automtu responder' "
+        "over UDP, or tcp: (e.g. tcp:registry.example.org:443) to estimate via a "
+        "TCP connection, or tracepath: to read the PMTU from one tracepath run, "
+        "instead of ICMP echo.",
+    )
+    ap.add_argument(
+        "--pmtu-backend",
+        default="icmp",
+        metavar="NAME",
+        help=f"Probe backend for targets without a prefix: {', '.join(ENGINES)} "
+        "or a registered backend (default: icmp). tracepath reports the PMTU in "
+        "one pass without bisection; probes bound to a link or fwmark use ICMP.",
+    )
+    ap.add_argument(
+        "--pmtu-target-file",
+        help="Inventory mode: read targets from FILE (one per line, '-' for stdin), "
+        "print one JSON line per target as it finishes plus a final summary line, "
+        "and exit without applying anything.",
+    )
+    ap.add_argument(
+        "--pmtu-workers",
+        type=int,
+        default=8,
+        help="Parallel probes in inventory mode and with --deadline (default: 8).",
+    )
+    ap.add_argument(
+        "--checkpoint",
+        help="Inventory mode: append finished targets to FILE and skip them when resuming.",
+    )
+    ap.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Append one JSON line per ICMP probe to FILE (target, address, payload, "
+        "timestamp, RTT, outcome, search step) for offline analysis.",
+    )
+    ap.add_argument(
+        "--record",
+        metavar="FILE",
+        help="Record every size probe (target, payload, outcome, elapsed time) and "
+        "each target's result to FILE as a replayable session, for any backend.",
+    )
+    ap.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="Answer probes from a session recorded with --record instead of the "
+        "network (no DNS). Without --pmtu-target, all recorded targets are used.",
+    )
+    ap.add_argument(
+        "--replay-speed",
+        choices=REPLAY_SPEEDS,
+        default="instant",
+        help="instant, or original to wait as long as each recorded probe took "
+        "(default: instant).",
     )
     ap.add_argument(
         "--pmtu-timeout",
@@ -39,14 +111,143 @@ def build_parser() -> argparse.ArgumentParser:
     ap.add_argument(
         "--pmtu-max-payload",
         type=int,
-        default=1472,
-        help="PMTU upper payload bound (default: 1472).",
+        default=None,
+        help=(
+            "PMTU upper payload bound (default: egress interface MTU minus "
+            "IP/ICMP headers, e.g. 1472 on 1500 and 8972 on 9000 with IPv4)."
+        ),
     )
     ap.add_argument(
         "--pmtu-policy",
-        choices=["min", "median", "max"],
+        choices=["min", "median", "max", *HISTORY_POLICIES],
         default="min",
-        help="Aggregate PMTU across targets (default: min).",
+        help="Aggregate PMTU across targets (default: min). p10, ewma and "
+        "min-window reduce each target's --history-file history, then take the minimum.",
+    )
+    ap.add_argument(
+        "--history-file",
+        nargs="?",
+        const=str(_DEFAULT_HISTORY_PATH),
+        default=None,
+        metavar="PATH",
+        help=f"Keep a per-target ring buffer of PMTU samples (SQLite; default path: {_DEFAULT_HISTORY_PATH}).",
+    )
+    ap.add_argument(
+        "--history-size",
+        type=int,
+        default=64,
+        help="Samples kept per target in --history-file (default: 64).",
+    )
+    ap.add_argument(
+        "--history-window",
+        type=int,
+        default=8,
+        help="Most recent samples considered by --pmtu-policy min-window (default: 8).",
+    )
+    ap.add_argument(
+        "--pmtu-family",
+        choices=["auto", "4", "6", "both"],
+        default="auto",
+        help="Address family for hostname targets; 'both' probes A and AAAA "
+        "separately as host@ipv4 / host@ipv6 (default: auto).",
+    )
+    ap.add_argument(
+        "--dns-ttl",
+        type=float,
+        default=300.0,
+        help="Seconds resolved hostnames stay cached in --state-file (default: 300).",
+    )
+    ap.add_argument(
+        "--throughput-validate",
+        action="store_true",
+        help="After probing, run short bulk UDP transfers to the udp: responder target "
+        "at the probed MTU and a few smaller ones; use a smaller MTU only if it is "
+        "clearly faster.",
+    )
+    ap.add_argument(
+        "--throughput-budget",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="Time budget for all --throughput-validate transfers (default: 2.0).",
+    )
+    ap.add_argument(
+        "--tunnel-stack",
+        action="store_true",
+        help="Discover tunnel links (vxlan, geneve, gre, ipip, sit, ip6tnl, wireguard) "
+        "and compute each one's MTU from its underlay minus its encapsulation; "
+        "a WG interface nested in another tunnel follows it.",
+    )
+    ap.add_argument(
+        "--apply-tunnel-mtu",
+        action="store_true",
+        help="Apply the --tunnel-stack MTUs to the tunnel links (implies --tunnel-stack; "
+        "the WG interface still follows --apply-wg-mtu).",
+    )
+    ap.add_argument(
+        "--probe-all-egress",
+        action="store_true",
+        help="Multi-homed hosts: also probe every other default-route link "
+        "(probes bound to the device) and compute a per-link effective MTU.",
+    )
+    ap.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Finish probing within SECONDS: targets are probed in parallel and "
+        "unfinished searches report their best-known bound (pmtu.partial in JSON).",
+    )
+    ap.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Cached PMTUs in --state-file are revalidated with two probes until "
+        "they are this old, then fully re-probed (default: never expire).",
+    )
+    ap.add_argument(
+        "--stability-confirm",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Hysteresis (needs --state-file): apply MTU decreases at once, increases "
+        "only after N consecutive runs measured them (default: off).",
+    )
+    ap.add_argument(
+        "--stability-threshold",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="With --stability-confirm: report increases of at most BYTES as "
+        "noise ('hold'); they still apply once confirmed (default: 0).",
+    )
+    ap.add_argument(
+        "--pmtu-hint",
+        action="append",
+        help="Last known PMTU as target=MTU (e.g. 1.1.1.1=1420). Revalidated with two probes "
+        "before falling back to a narrowed search. Repeatable or comma-separated.",
+    )
+    ap.add_argument(
+        "--state-file",
+        nargs="?",
+        const=str(_DEFAULT_STATE_PATH),
+        help=f"Read PMTU hints from and store probe results in this state file "
+        f"(default if given without value: {_DEFAULT_STATE_PATH}).",
+    )
+    ap.add_argument(
+        "--facts-file",
+        nargs="?",
+        const=str(_DEFAULT_FACTS_PATH),
+        help="After each run, write effective/egress/WG MTUs and per-target results "
+        "as Ansible local facts (ansible_local.automtu) to this file "
+        f"(default if given without value: {_DEFAULT_FACTS_PATH}).",
+    )
+    ap.add_argument(
+        "--fast-start",
+        action="store_true",
+        help="Boot mode (needs --state-file): apply the MTUs of the last run at once, "
+        "signal readiness to systemd, then probe and change only what differs.",
     )
 
     # --- Apply flags ---
@@ -77,9 +278,10 @@ def build_parser() -> argparse.ArgumentParser:
     )
     ap.add_argument(
         "--wg-overhead",
-        type=int,
-        default=int(os.environ.get("WG_OVERHEAD", "80")),
-        help="WG overhead.",
+        type=_overhead_arg,
+        default=_overhead_arg(os.environ.get("WG_OVERHEAD", "auto")),
+        help="WG overhead in bytes, or 'auto' to derive it from the peer endpoints "
+        "(60 for IPv4-only peers, 80 if any peer uses IPv6; default: auto).",
     )
     ap.add_argument(
         "--wg-min",
@@ -92,6 +294,13 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Add WG peer endpoints as PMTU targets.",
     )
+    ap.add_argument(
+        "--wg-peer-routes",
+        action="store_true",
+        help="Probe every WG peer and install 'mtu lock' routes for its allowed-ips, "
+        "keeping the interface MTU at the best common value. Stale routes from "
+        "earlier runs are removed.",
+    )
     ap.add_argument("--set-wg-mtu", type=int, help="Force MTU for WireGuard interface.")
 
     # --- Docker ---
@@ -105,6 +314,22 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Only apply to docker0, do not include br-* user bridges.",
     )
+    ap.add_argument(
+        "--apply-netns-mtu",
+        action="store_true",
+        help="Apply effective MTU inside every network namespace (/run/netns and /proc/*/ns/net).",
+    )
+    ap.add_argument(
+        "--netns-if",
+        action="append",
+        help="Interface name pattern(s) inside namespaces (repeatable or comma-separated, fnmatch; default: eth0).",
+    )
+    ap.add_argument(
+        "--netns-workers",
+        type=int,
+        default=8,
+        help="Namespaces processed in parallel (default: 8).",
+    )
 
     # --- Force egress ---
     ap.add_argument(
@@ -119,8 +344,19 @@ def build_parser() -> argparse.ArgumentParser:
     # --- Persistence ---
     ap.add_argument(
         "--persist",
-        choices=["systemd", "docker"],
-        help="Persist MTU configuration across reboots (supported: systemd, docker).",
+        choices=["systemd", "docker", "systemd-timer"],
+        help="Persist MTU configuration across reboots (supported: systemd, docker, "
+        "systemd-timer = periodic cache-aware revalidation).",
+    )
+    ap.add_argument(
+        "--timer-interval",
+        default="15min",
+        help="Run interval for --persist systemd-timer (systemd time span, default: 15min).",
+    )
+    ap.add_argument(
+        "--timer-random-delay",
+        default="5min",
+        help="RandomizedDelaySec for --persist systemd-timer (default: 5min).",
     )
     ap.add_argument(
         "--uninstall",
@@ -139,5 +375,69 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Print a JSON object with computed values (stdout) for automation.",
     )
+    ap.add_argument(
+        "--socket",
+        nargs="?",
+        const=DEFAULT_SOCKET_PATH,
+        default=None,
+        metavar="PATH",
+        help="Answer --print-mtu/--print-json from a running 'automtu serve' "
+        f"(default path: {DEFAULT_SOCKET_PATH}) started with the same probe options; "
+        "runs locally if none is listening or its options differ.",
+    )
+
+    return ap
+
 
+def build_serve_parser() -> argparse.ArgumentParser:
+    """
+    `automtu serve` takes the regular options (they define what each refresh
+    runs) plus the cache TTL; --socket is the path to listen on.
+    """
+    ap = build_parser()
+    ap.prog = "automtu serve"
+    ap.description = (
+        "Serve cached MTU results on a unix socket (GET effective|wg|egress|json)."
+    )
+    ap.add_argument(
+        "--serve-ttl",
+        type=float,
+        default=300.0,
+        metavar="SECONDS",
+        help="Re-run automtu when the cached result is older than this (default: 300).",
+    )
+    return ap
+
+
+def build_hotplug_parser() -> argparse.ArgumentParser:
+    """
+    `automtu hotplug` takes the regular options: the apply flags and Docker/WG
+    selectors choose the interfaces, --state-file holds the cached MTUs.
+    """
+    ap = build_parser()
+    ap.prog = "automtu hotplug"
+    ap.description = (
+        "Watch for new links (rtnetlink RTM_NEWLINK) and give Docker bridges and "
+        "the WireGuard interface the MTU of the last run from --state-file, "
+        "without probing."
+    )
+    return ap
+
+
+def build_responder_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(
+        prog="automtu responder",
+        description="Acknowledge UDP PMTU probes from 'automtu --pmtu-target udp:...' (no ICMP needed).",
+    )
+    ap.add_argument(
+        "--bind",
+        default="0.0.0.0",
+        help="Address to listen on (default: 0.0.0.0, use :: for IPv6).",
+    )
+    ap.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_RESPONDER_PORT,
+        help=f"UDP port to listen on (default: {DEFAULT_RESPONDER_PORT}).",
+    )
     return ap
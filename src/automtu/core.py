@@ -2,39 +2,561 @@ from __future__ import annotations
 
 import statistics
 import sys
-from dataclasses import dataclass
-from typing import Iterable, Optional
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
 
+from .boot import apply_known_good, only_changed, sd_notify
 from .docker import detect_docker_ifaces
+from .facts import update_facts
+from .history import HISTORY_POLICIES, record_history
+from .inventory import iter_target_file, run_inventory
 from .net import (
     default_route_uses_iface,
     detect_egress_iface,
+    detect_egress_ifaces,
+    dry_run_logged,
     iface_exists,
     read_iface_mtu,
     require_root,
     set_iface_mtu,
 )
-from .output import Logger, OutputMode, emit_json, emit_single_number
-from .pmtu import probe_pmtu
-from .wg import wg_is_active, wg_peer_endpoints
+from .netns import apply_namespaces
+from .output import Logger, OutputMode, build_payload, emit_json, emit_single_number
+from .pmtu import (
+    backend_names,
+    get_backend,
+    header_size,
+    probe_pmtu,
+    split_engine,
+)
+from .replay import load_session
+from .resolve import DnsCache, is_ip, resolve_hosts
+from .routes import sync_peer_routes
+from .sched import median_quorum, run_scheduled
+from .stability import stabilize
+from .state import load_state, save_known_good, save_probe_state, warm_start
+from .tcp import probe_pmtu_tcp
+from .throughput import validate_bottleneck
+from .trace import Tracer, recorded_mtu, recorded_probe, recording, tracing
+from .tracepath import probe_pmtu_tracepath
+from .tunnels import stack_tunnels
+from .udp import probe_pmtu_udp, split_hostport
+from .wg import (
+    wg_fwmark,
+    wg_is_active,
+    wg_overhead_for,
+    wg_peer_endpoints,
+)
+
+ProbeFn = Callable[[str, int | None], int | None]  # (target, hint) -> PMTU
+ApplyFn = Callable[[str, int, bool], None]  # (iface, mtu, dry_run)
+LogFn = Callable[[str], None]
+
+
+class AutoMTUError(Exception):
+    """
+    A run could not complete; code is the CLI exit status.
+    """
+
+    def __init__(self, message: str, code: int = 2) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    Typed run configuration (the library counterpart of the CLI flags).
+    """
+
+    egress_if: str | None = None
+    prefer_wg_egress: bool = False
+    force_egress_mtu: int | None = None
+    pmtu_target: tuple[str, ...] = ()
+    pmtu_hints: Mapping[str, int] = field(default_factory=dict)
+    pmtu_timeout: float = 1.0
+    pmtu_min_payload: int = 1200
+    pmtu_max_payload: int | None = None  # None: interface MTU - headers
+    pmtu_policy: str = "min"
+    pmtu_backend: str = "icmp"  # backend for targets without a prefix
+    replay_file: str | None = None  # answer probes from a recorded session
+    replay_speed: str = "instant"  # instant | original (recorded timing)
+    pmtu_family: str = "auto"  # auto | 4 | 6 | both
+    dns_ttl: float = 300.0
+    cache_ttl: float | None = None  # max age of cached PMTUs (None: no expiry)
+    stability_confirm: int | None = None  # runs an increase must be seen (None: off)
+    stability_threshold: int = 0  # bytes of difference treated as noise
+    history_file: str | None = None
+    history_size: int = 64  # samples kept per target
+    history_window: int = 8  # samples considered by min-window
+    deadline: float | None = None  # seconds for the whole run
+    pmtu_workers: int = 8
+    state_file: str | None = None
+    facts_file: str | None = None  # Ansible local facts (facts.d) to write
+    apply_egress_mtu: bool = False
+    apply_wg_mtu: bool = False
+    apply_docker_mtu: bool = False
+    wg_if: str = "wg0"
+    wg_overhead: int | str = "auto"  # bytes, or "auto" from peer endpoints
+    wg_min: int = 1280
+    auto_pmtu_from_wg: bool = False
+    set_wg_mtu: int | None = None
+    wg_peer_routes: bool = False
+    docker_if: tuple[str, ...] = ()
+    docker_no_user_bridges: bool = False
+    throughput_validate: bool = False  # bulk transfers to a udp: responder target
+    throughput_budget: float = 2.0  # seconds for all transfers
+    probe_all_egress: bool = False
+    tunnel_stack: bool = False  # layered MTUs for tunnels stacked on the egress
+    apply_tunnel_mtu: bool = False
+    apply_netns_mtu: bool = False
+    netns_if: tuple[str, ...] = ("eth0",)  # fnmatch patterns
+    netns_workers: int = 8
+    dry_run: bool = False
 
 
 @dataclass(frozen=True)
 class Result:
-    egress: str
+    """
+    Everything a run detected, probed and applied. Field names match
+    output.build_payload(); to_dict() returns the --print-json structure.
+    """
+
+    egress_iface: str
     base_mtu: int
     effective_mtu: int
-    wg_if: str
+    egress_forced_mtu: int | None
+    egress_applied: bool
+    pmtu_targets: list[str]
+    pmtu_auto_targets_added: list[str]
+    pmtu_policy: str
+    pmtu_chosen: int | None
+    pmtu_results: dict[str, int | None]
+    wg_iface: str
     wg_mtu: int
+    wg_overhead: int
+    wg_min: int
+    wg_set_mtu: int | None
+    wg_clamped: bool
+    wg_present: bool
+    wg_active: bool
+    wg_applied: bool
+    docker_ifaces: list[str]
+    docker_applied: list[str]
+    dry_run: bool
+    pmtu_addresses: dict[str, str | None] = field(default_factory=dict)
+    wg_overhead_detail: dict = field(default_factory=dict)
+    wg_peer_routes: dict = field(default_factory=dict)
+    pmtu_partial: bool = False
+    pmtu_schedule: dict = field(default_factory=dict)
+    netns: dict = field(default_factory=dict)
+    egress_links: dict = field(default_factory=dict)
+    pmtu_wg_fwmark: int | None = None
+    pmtu_cache: dict = field(default_factory=dict)
+    stability: dict = field(default_factory=dict)
+    pmtu_history: dict = field(default_factory=dict)
+    pmtu_throughput: dict = field(default_factory=dict)
+    tunnels: dict = field(default_factory=dict)
 
+    def to_dict(self) -> dict:
+        return build_payload(**asdict(self))
 
-def _split_targets(items: Optional[list[str]]) -> list[str]:
+
+def _split_targets(items: list[str] | None) -> list[str]:
     raw: list[str] = []
     for item in items or []:
         raw.extend([x.strip() for x in item.split(",") if x.strip()])
     return list(dict.fromkeys(raw))
 
 
+def _check_backend(name: str) -> str:
+    if name not in backend_names():
+        raise ValueError(
+            f"unknown probe backend: {name} (available: {', '.join(backend_names())})"
+        )
+    return name
+
+
+def _check_targets(items: tuple[str, ...], backend: str) -> tuple[str, ...]:
+    """
+    Reject unknown backend prefixes and bad host:port specs before probing.
+    """
+    for target in _split_targets(list(items)):
+        engine, spec = split_engine(target, backend)
+        _check_backend(engine)
+        if engine in ("udp", "tcp"):
+            split_hostport(spec, 0)
+    return items
+
+
+def _parse_hints(items: list[str] | None) -> dict[str, int]:
+    """
+    Parse --pmtu-hint values of the form target=MTU (repeatable / comma-separated).
+    """
+    hints: dict[str, int] = {}
+    for item in _split_targets(items):
+        target, sep, mtu = item.rpartition("=")
+        if not sep or not target.strip():
+            raise ValueError(f"invalid --pmtu-hint {item!r} (expected target=MTU)")
+        try:
+            hints[target.strip()] = int(mtu)
+        except ValueError:
+            raise ValueError(
+                f"invalid --pmtu-hint {item!r} (MTU must be a number)"
+            ) from None
+    return hints
+
+
+def _probe_for(engine: str):
+    if engine == "udp":
+        return probe_pmtu_udp
+    if engine == "tcp":
+        return probe_pmtu_tcp
+    if engine == "tracepath":
+        return probe_pmtu_tracepath
+    if engine == "icmp":
+        return probe_pmtu
+    return get_backend(engine)  # registered with pmtu.register_backend()
+
+
+def _max_payload(args, engine: str, spec: str, ceiling: int | None) -> int:
+    """
+    Upper payload bound: --pmtu-max-payload, else the interface MTU (ceiling,
+    default 1500) minus the IP + ICMP/UDP headers of the target's family.
+    """
+    if args.pmtu_max_payload is not None:
+        return args.pmtu_max_payload
+    host = split_hostport(spec, 0)[0] if engine in ("udp", "tcp") else spec
+    return (ceiling or 1500) - header_size(host)
+
+
+def _probe_target(
+    args,
+    target: str,
+    hint: int | None = None,
+    *,
+    ceiling: int | None = None,
+    **bind: object,
+) -> int | None:
+    """
+    Probe with the backend named by the target prefix (else --pmtu-backend);
+    bind (iface=, fwmark=) pins the probes to one link or routing policy.
+    ceiling is the MTU of the interface the probes leave through.
+    """
+    engine, spec = split_engine(target, getattr(args, "pmtu_backend", "icmp"))
+    return _probe_for(engine)(
+        spec,
+        args.pmtu_min_payload,
+        _max_payload(args, engine, spec, ceiling),
+        args.pmtu_timeout,
+        hint=hint,
+        **bind,
+    )
+
+
+def _resolve_targets(
+    targets: list[str], family: str, cache: DnsCache, backend: str = "icmp"
+) -> tuple[list[str], dict[str, str | None]]:
+    """
+    Resolve hostname targets that use a host-only backend (ICMP, tracepath).
+    Returns the probe keys (one per target, or host@ipv4 / host@ipv6 with
+    family 'both') and the address per resolved key.
+    """
+    families = ("4", "6") if family == "both" else (family,)
+    hosts = [
+        t
+        for t in targets
+        if split_engine(t, backend)[0] in ("icmp", "tracepath")
+        and t == split_engine(t, backend)[1]
+        and not is_ip(t)
+    ]
+    answers = resolve_hosts(hosts, families, cache=cache)
+
+    keys: list[str] = []
+    addresses: dict[str, str | None] = {}
+    for t in targets:
+        if t not in hosts:
+            keys.append(t)
+            continue
+        for fam in families:
+            key = t if len(families) == 1 else f"{t}@ipv{fam}"
+            found = answers.get((t, fam)) or []
+            keys.append(key)
+            addresses[key] = found[0] if found else None
+    return keys, addresses
+
+
+def _probe_key(
+    cfg: Config,
+    key: str,
+    addresses: Mapping[str, str | None],
+    hint: int | None = None,
+    *,
+    ceiling: int | None = None,
+    **bind: object,
+) -> int | None:
+    """
+    Probe one key from _resolve_targets(): resolved hostnames at their
+    address (None if resolution failed), everything else as given.
+    """
+    if key in addresses:
+        addr = addresses[key]
+        if not addr:
+            return None
+        return _probe_target(cfg, addr, hint, ceiling=ceiling, **bind)
+    return _probe_target(cfg, key, hint, ceiling=ceiling, **bind)
+
+
+def _egress_iface(cfg: Config, log: LogFn) -> str:
+    """
+    --egress-if, else the device of the default route; the WireGuard
+    interface instead with --prefer-wg-egress when the default route uses it.
+    """
+    egress = cfg.egress_if or detect_egress_iface(ignore_vpn=not cfg.prefer_wg_egress)
+    if not egress:
+        raise AutoMTUError("Could not detect egress interface (use --egress-if).", 2)
+    if not iface_exists(egress):
+        raise AutoMTUError(f"Interface {egress} does not exist.", 3)
+
+    if (
+        cfg.egress_if is None
+        and cfg.prefer_wg_egress
+        and iface_exists(cfg.wg_if)
+        and wg_is_active(cfg.wg_if)
+        and default_route_uses_iface(cfg.wg_if)
+    ):
+        egress = cfg.wg_if
+        log(f"[automtu] Using WireGuard interface {cfg.wg_if} as egress basis.")
+    return egress
+
+
+def _inventory_probe(cfg: Config, log: LogFn) -> Callable[[str], int | None]:
+    """
+    Probe one inventory target the way compute() probes its targets:
+    hostnames resolved per --pmtu-family, probes bounded by the egress MTU.
+    A target probed in several families reports the lowest PMTU found.
+    """
+    egress = _egress_iface(cfg, log)
+    ceiling = int(cfg.force_egress_mtu or read_iface_mtu(egress))
+    dns_cache = DnsCache(cfg.dns_ttl)
+
+    def probe(target: str) -> int | None:
+        keys, addresses = _resolve_targets(
+            [target], cfg.pmtu_family, dns_cache, cfg.pmtu_backend
+        )
+        found = [_probe_key(cfg, k, addresses, ceiling=ceiling) for k in keys]
+        known = [p for p in found if p is not None]
+        return min(known) if known else None
+
+    return probe
+
+
+def _wg_auto_targets(cfg: Config, log: LogFn) -> list[str]:
+    """
+    WG peer endpoints added as PMTU targets (--auto-pmtu-from-wg and
+    --wg-peer-routes).
+    """
+    if not (cfg.auto_pmtu_from_wg or cfg.wg_peer_routes):
+        return []
+    if not wg_is_active(cfg.wg_if):
+        log(f"[automtu] INFO: {cfg.wg_if} not active; skipping auto PMTU targets.")
+        return []
+    peers = wg_peer_endpoints(cfg.wg_if)
+    if peers:
+        log(
+            f"[automtu] Auto-added WG peer endpoints as PMTU targets: {', '.join(peers)}"
+        )
+    return peers
+
+
+def _auto_wg_overhead(wg_if: str, cache: DnsCache, log: LogFn) -> tuple[int, dict]:
+    """
+    Derive the WG overhead from the address family of the peer endpoints.
+    """
+    endpoints = wg_peer_endpoints(wg_if) if wg_is_active(wg_if) else []
+    names = [e for e in endpoints if not is_ip(e)]
+    answers = resolve_hosts(names, ("auto",), cache=cache) if names else {}
+
+    families: dict[str, str | None] = {}
+    for ep in endpoints:
+        if ep in names:
+            addrs = answers.get((ep, "auto")) or []
+        else:
+            addrs = [ep]
+        families[ep] = ("ipv6" if ":" in addrs[0] else "ipv4") if addrs else None
+
+    overhead, breakdown = wg_overhead_for(families.values())
+    log(
+        f"[automtu] WG overhead from peer endpoints: {overhead} "
+        f"(outer family: {breakdown['outer_family'] or 'unknown'})"
+    )
+    return overhead, {"mode": "auto", "endpoints": families, **breakdown}
+
+
+def _probe_binding(
+    cfg: Config, wg_targets: list[str], probe_keys: list[str], log: LogFn
+) -> tuple[int | None, Callable[..., dict]]:
+    """
+    WG's fwmark (None if unset or without WG targets) and bind(key, iface=None),
+    the iface= / fwmark= keyword arguments a probe of key uses.
+    """
+    wg_mark = wg_fwmark(cfg.wg_if) if wg_targets else None
+    wg_keys = {k for t in wg_targets for k in (t, f"{t}@ipv4", f"{t}@ipv6")}
+    if wg_mark:
+        log(f"[automtu] Probing WG peer endpoints with fwmark {wg_mark:#x}")
+    if (wg_mark or cfg.probe_all_egress) and any(
+        split_engine(k, cfg.pmtu_backend)[0] == "tracepath" for k in probe_keys
+    ):
+        log(
+            "[automtu] INFO: tracepath cannot bind to a link or fwmark; bound probes use ICMP."
+        )
+
+    def bind(target: str, iface: str | None = None) -> dict:
+        kwargs: dict = {"iface": iface} if iface else {}
+        if wg_mark and target in wg_keys:
+            kwargs["fwmark"] = wg_mark
+        return kwargs
+
+    return wg_mark, bind
+
+
+def _probe_links(
+    cfg: Config,
+    links: list[str],
+    probe_keys: list[str],
+    hints: Mapping[str, int],
+    probe: Callable[..., int | None],
+    started: float,
+    iface_mtu: Callable[[str], int],
+    log: LogFn,
+) -> dict:
+    """
+    Probe every target through every link in parallel (probes bound with
+    SO_BINDTODEVICE) and derive a per-link effective MTU.
+    """
+    jobs = {f"{link}|{t}": (link, t) for link in links for t in probe_keys}
+    sched = run_scheduled(
+        list(jobs),
+        lambda key, hint: probe(jobs[key][1], hint, iface=jobs[key][0]),
+        hints={k: hints[t] for k, (_, t) in jobs.items() if t in hints},
+        deadline_s=cfg.deadline,
+        workers=cfg.pmtu_workers,
+        started=started,
+    )
+
+    out: dict = {}
+    for link in links:
+        results = {t: sched.results.get(f"{link}|{t}") for t in probe_keys}
+        good = [int(p) for p in results.values() if p]
+        chosen = _choose(good, cfg.pmtu_policy) if good else None
+        base = iface_mtu(link)
+        out[link] = {
+            "base_mtu": base,
+            "chosen": chosen,
+            "effective_mtu": min(base, chosen) if chosen else base,
+            "results": results,
+            "applied": False,
+        }
+        log(
+            f"[automtu] Egress {link}: PMTU {chosen or 'unknown'}, "
+            f"effective MTU {out[link]['effective_mtu']}"
+        )
+    return out
+
+
+def _probe_targets(
+    cfg: Config,
+    probe_keys: list[str],
+    probe: Callable[..., int | None],
+    hints: Mapping[str, int],
+    started: float,
+    log: LogFn,
+) -> tuple[dict[str, int | None], bool, dict]:
+    """
+    Probe every key (in parallel, stopping at the deadline or at a median
+    quorum, when either applies) and log the outcomes. Returns (results,
+    partial, JSON schedule detail).
+    """
+    log(
+        f"[automtu] Probing Path MTU for: {', '.join(probe_keys)} (policy={cfg.pmtu_policy})"
+    )
+    for t in probe_keys:
+        if t in hints:
+            log(f"[automtu]  - {t}: revalidating last known PMTU {hints[t]}")
+
+    probe_results: dict[str, int | None] = {}
+    partial = False
+    schedule: dict = {}
+    # median: once more than half of all targets agree, the result is fixed
+    quorum = cfg.pmtu_policy == "median" and len(probe_keys) > 2
+    if cfg.deadline is None and not quorum:
+        for t in probe_keys:
+            probe_results[t] = probe(t, hints.get(t))
+    else:
+        # Parallel, most informative probes first; stop at the deadline
+        sched = run_scheduled(
+            probe_keys,
+            probe,
+            hints=hints,
+            deadline_s=cfg.deadline,
+            workers=cfg.pmtu_workers,
+            started=started,
+            on_result=median_quorum(len(probe_keys)) if quorum else None,
+        )
+        probe_results.update(sched.results)
+        partial = bool(sched.partial or sched.cancelled)
+        schedule = {
+            "deadline": float(cfg.deadline) if cfg.deadline is not None else None,
+            "elapsed": round(time.monotonic() - started, 3),
+            "partial": sched.partial,
+            "cancelled": sched.cancelled,
+            "short_circuited": sched.short_circuited,
+        }
+        if sched.short_circuited:
+            log(
+                "[automtu] Median fixed by a majority of targets; skipped: "
+                + ", ".join(sched.short_circuited)
+            )
+
+    for t, p in probe_results.items():
+        if t in schedule.get("partial", ()):
+            log(f"[automtu]  - {t}: {p if p else 'no bound'} (deadline, best known)")
+        elif t in schedule.get("cancelled", ()):
+            log(f"[automtu]  - {t}: not probed (deadline)")
+        elif t in schedule.get("short_circuited", ()):
+            log(f"[automtu]  - {t}: not needed (quorum)")
+        else:
+            log(f"[automtu]  - {t}: {p if p else 'probe failed'}")
+    return probe_results, partial, schedule
+
+
+def _select_pmtu(
+    cfg: Config,
+    probe_results: Mapping[str, int | None],
+    history: Mapping[str, dict],
+    log: LogFn,
+) -> int | None:
+    """
+    Combine the probe results (or, for history policies, every target's
+    reduced history) with the policy; None if every probe failed.
+    """
+    if cfg.pmtu_policy in HISTORY_POLICIES:
+        good = [h["value"] for h in history.values() if h["value"]]
+    else:
+        good = [int(p) for p in probe_results.values() if p]
+    if not good:
+        log("[automtu] WARNING: All PMTU probes failed. Falling back to egress MTU.")
+        return None
+    # history policies already reduced each target; combine them safely
+    chosen = _choose(
+        good, "min" if cfg.pmtu_policy in HISTORY_POLICIES else cfg.pmtu_policy
+    )
+    log(f"[automtu] Selected Path MTU (policy={cfg.pmtu_policy}): {chosen}")
+    return chosen
+
+
 def _choose(values: Iterable[int], policy: str) -> int:
     vals = sorted(values)
     if policy == "min":
@@ -47,184 +569,438 @@ def _choose(values: Iterable[int], policy: str) -> int:
 
 
 def run_automtu(args) -> int:
-    # Expand apply-all -> set apply flags
-    if getattr(args, "apply_all", False):
-        args.apply_egress_mtu = True
-        args.apply_wg_mtu = True
-        args.apply_docker_mtu = True
+    trace_path = getattr(args, "trace", None)
+    if not trace_path:
+        return _run_recorded(args)
+    try:
+        tracer = Tracer(Path(trace_path))
+    except OSError as e:
+        print(f"[automtu][ERROR] Cannot open trace file: {e}", file=sys.stderr)
+        return 2
+    with tracing(tracer):
+        return _run_recorded(args)
 
-    mode = OutputMode(
-        print_mtu=getattr(args, "print_mtu", None),
-        print_json=bool(getattr(args, "print_json", False)),
-    )
-    err = mode.validate()
-    if err:
-        print(f"[automtu][ERROR] {err}", file=sys.stderr)
-        return 4
 
-    log = Logger(mode.machine).log
+def _run_recorded(args) -> int:
+    record_path = getattr(args, "record", None)
+    if not record_path:
+        return _run_automtu(args)
+    try:
+        recorder = Tracer(Path(record_path))
+    except OSError as e:
+        print(f"[automtu][ERROR] Cannot open session file: {e}", file=sys.stderr)
+        return 2
+    with recording(recorder):
+        return _run_automtu(args)
 
-    needs_root = bool(
-        getattr(args, "apply_egress_mtu", False)
-        or getattr(args, "apply_wg_mtu", False)
-        or getattr(args, "apply_docker_mtu", False)
-        or (getattr(args, "force_egress_mtu", None) is not None)
-        or (getattr(args, "persist", None) is not None)
+
+def config_from_args(args) -> Config:
+    """
+    Build a Config from parsed CLI arguments (raises ValueError on bad hints,
+    targets or an unknown probe backend).
+    """
+    return Config(
+        egress_if=args.egress_if,
+        prefer_wg_egress=bool(args.prefer_wg_egress),
+        force_egress_mtu=args.force_egress_mtu,
+        pmtu_target=_check_targets(
+            tuple(args.pmtu_target or ()), getattr(args, "pmtu_backend", "icmp")
+        ),
+        pmtu_hints=_parse_hints(getattr(args, "pmtu_hint", None)),
+        pmtu_timeout=args.pmtu_timeout,
+        pmtu_min_payload=args.pmtu_min_payload,
+        pmtu_max_payload=args.pmtu_max_payload,
+        pmtu_policy=args.pmtu_policy,
+        pmtu_backend=_check_backend(getattr(args, "pmtu_backend", "icmp")),
+        replay_file=getattr(args, "replay", None),
+        replay_speed=getattr(args, "replay_speed", "instant"),
+        pmtu_family=getattr(args, "pmtu_family", "auto"),
+        dns_ttl=getattr(args, "dns_ttl", 300.0),
+        cache_ttl=getattr(args, "cache_ttl", None),
+        stability_confirm=getattr(args, "stability_confirm", None),
+        stability_threshold=getattr(args, "stability_threshold", 0),
+        history_file=getattr(args, "history_file", None),
+        history_size=getattr(args, "history_size", 64),
+        history_window=getattr(args, "history_window", 8),
+        deadline=getattr(args, "deadline", None),
+        pmtu_workers=getattr(args, "pmtu_workers", 8),
+        state_file=getattr(args, "state_file", None),
+        facts_file=getattr(args, "facts_file", None),
+        apply_egress_mtu=bool(args.apply_egress_mtu),
+        apply_wg_mtu=bool(args.apply_wg_mtu),
+        apply_docker_mtu=bool(args.apply_docker_mtu),
+        wg_if=args.wg_if,
+        wg_overhead=args.wg_overhead,
+        wg_min=args.wg_min,
+        auto_pmtu_from_wg=bool(args.auto_pmtu_from_wg),
+        set_wg_mtu=args.set_wg_mtu,
+        wg_peer_routes=bool(getattr(args, "wg_peer_routes", False)),
+        docker_if=tuple(getattr(args, "docker_if", None) or ()),
+        docker_no_user_bridges=bool(getattr(args, "docker_no_user_bridges", False)),
+        throughput_validate=bool(getattr(args, "throughput_validate", False)),
+        throughput_budget=getattr(args, "throughput_budget", 2.0),
+        probe_all_egress=bool(getattr(args, "probe_all_egress", False)),
+        tunnel_stack=bool(getattr(args, "tunnel_stack", False)),
+        apply_tunnel_mtu=bool(getattr(args, "apply_tunnel_mtu", False)),
+        apply_netns_mtu=bool(getattr(args, "apply_netns_mtu", False)),
+        netns_if=tuple(_split_targets(getattr(args, "netns_if", None))) or ("eth0",),
+        netns_workers=getattr(args, "netns_workers", 8),
+        dry_run=bool(args.dry_run),
     )
-    require_root(dry=args.dry_run, needs_root=needs_root)
 
-    # Persistence mode: install/uninstall persistence mechanism and exit.
-    if getattr(args, "persist", None):
-        if args.persist == "systemd":
-            from .persist import persist_systemd, uninstall_systemd
 
-            if getattr(args, "uninstall", False):
-                uninstall_systemd(dry=args.dry_run)
-                return 0
+def _quiet(msg: str) -> None:
+    pass
 
-            persist_systemd(sys.argv, dry=args.dry_run)
-            return 0
 
-        print(
-            f"[automtu][ERROR] Unknown persist backend: {args.persist}", file=sys.stderr
-        )
-        return 4
+def _remembering(apply: ApplyFn, applied: dict[str, int]) -> ApplyFn:
+    def remember(iface: str, mtu: int, dry_run: bool) -> None:
+        apply(iface, mtu, dry_run)
+        applied[iface] = int(mtu)
 
-    egress = args.egress_if or detect_egress_iface(ignore_vpn=not args.prefer_wg_egress)
-    if not egress:
-        print(
-            "[automtu][ERROR] Could not detect egress interface (use --egress-if).",
-            file=sys.stderr,
-        )
-        return 2
-    if not iface_exists(egress):
-        print(f"[automtu][ERROR] Interface {egress} does not exist.", file=sys.stderr)
-        return 3
+    return remember
 
-    if (
-        args.egress_if is None
-        and args.prefer_wg_egress
-        and iface_exists(args.wg_if)
-        and wg_is_active(args.wg_if)
-        and default_route_uses_iface(args.wg_if)
-    ):
-        egress = args.wg_if
-        log(f"[automtu] Using WireGuard interface {args.wg_if} as egress basis.")
 
+def compute(
+    cfg: Config,
+    *,
+    probe: ProbeFn | None = None,
+    apply: ApplyFn | None = None,
+    log: LogFn | None = None,
+    dns_cache: DnsCache | None = None,
+) -> Result:
+    """
+    Detect, probe, compute and (optionally) apply MTUs without printing.
+
+    probe(target, hint) and apply(iface, mtu, dry_run) replace the built-in
+    probe engines and `ip link set`. Raises AutoMTUError if no usable egress
+    interface is found. dns_cache lets callers keep resolved hostnames
+    across runs.
+    """
+    started = time.monotonic()
+    replay = None
+    if cfg.replay_file and probe is None:
+        # offline: probe keys, bounds and hints as recorded, no DNS, outcomes
+        # from the session; nothing on the system or in the caches changes
+        if cfg.pmtu_policy in HISTORY_POLICIES:
+            raise AutoMTUError(
+                f"--pmtu-policy {cfg.pmtu_policy} is not supported with --replay.", 4
+            )
+        try:
+            replay = load_session(Path(cfg.replay_file), speed=cfg.replay_speed)
+        except (OSError, ValueError) as e:
+            raise AutoMTUError(f"Cannot replay {cfg.replay_file}: {e}", 2) from e
+        cfg = replace(
+            cfg, dry_run=True, state_file=None, history_file=None, facts_file=None
+        )
+    if cfg.pmtu_policy in HISTORY_POLICIES and not cfg.history_file:
+        raise AutoMTUError(f"--pmtu-policy {cfg.pmtu_policy} needs --history-file.", 4)
+    if log is None:
+        log = _quiet
+    if apply is None:
+        apply = dry_run_logged(set_iface_mtu, log)
+    applied_mtus: dict[str, int] = {}
+    apply = _remembering(apply, applied_mtus)
+
+    recorded_egress = replay.egress if replay is not None else None
+    egress = recorded_egress[0] if recorded_egress else _egress_iface(cfg, log)
     log(f"[automtu] Detected egress interface: {egress}")
 
     # Base MTU (optionally forced)
-    if args.force_egress_mtu:
-        log(f"[automtu] Forcing egress MTU {args.force_egress_mtu} on {egress}")
-        set_iface_mtu(egress, args.force_egress_mtu, args.dry_run)
-        base_mtu = int(args.force_egress_mtu)
+    if cfg.force_egress_mtu:
+        log(f"[automtu] Forcing egress MTU {cfg.force_egress_mtu} on {egress}")
+        apply(egress, cfg.force_egress_mtu, cfg.dry_run)
+        base_mtu = int(cfg.force_egress_mtu)
+    elif recorded_egress:
+        base_mtu = recorded_egress[1]
     else:
         base_mtu = int(read_iface_mtu(egress))
     log(f"[automtu] Egress base MTU: {base_mtu}")
+    recorded_mtu(egress, base_mtu, egress=True)  # no-op unless --record
+
+    def iface_mtu(iface: str) -> int:
+        if replay is not None:
+            mtu = replay.mtu(iface)
+            return mtu if mtu is not None else base_mtu
+        mtu = int(read_iface_mtu(iface))
+        recorded_mtu(iface, mtu)
+        return mtu
 
     # Targets (explicit + optional WG auto targets)
-    targets = _split_targets(args.pmtu_target)
-    auto_targets_added: list[str] = []
-
-    if args.auto_pmtu_from_wg:
-        if wg_is_active(args.wg_if):
-            peers = wg_peer_endpoints(args.wg_if)
-            if peers:
-                auto_targets_added = peers[:]
-                log(
-                    f"[automtu] Auto-added WG peer endpoints as PMTU targets: {', '.join(peers)}"
-                )
-                targets = list(dict.fromkeys([*targets, *peers]))
-        else:
-            log(f"[automtu] INFO: {args.wg_if} not active; skipping auto PMTU targets.")
+    targets = _split_targets(list(cfg.pmtu_target))
+    auto_targets_added = _wg_auto_targets(cfg, log)
+    targets = list(dict.fromkeys([*targets, *auto_targets_added]))
 
-    # PMTU probing
-    effective_mtu = base_mtu
-    probe_results: dict[str, Optional[int]] = {}
-    chosen_pmtu: Optional[int] = None
+    # Warm-start hints (state file first, explicit hints win). Cached values
+    # older than cache_ttl, or cached on a different egress path, get a full probe.
+    state = load_state(cfg.state_file) if cfg.state_file else {}
+    path = {"egress": egress, "base_mtu": base_mtu}
+    cached, expired, path_changed = warm_start(
+        state, path, max_age=cfg.cache_ttl, log=log
+    )
+    hints = {**(replay.hints() if replay is not None else cached), **cfg.pmtu_hints}
 
-    if targets:
+    # Resolve hostname targets once, concurrently (instead of once per ping)
+    if dns_cache is None:
+        dns_cache = DnsCache(cfg.dns_ttl)
+        dns_cache.load_state(state.get("dns") or {})
+    if replay is not None:
+        log(f"[automtu] Replaying probes from {cfg.replay_file} ({cfg.replay_speed})")
+        probe_keys = replay.keys(targets or replay.targets())
+        addresses: dict[str, str | None] = {}
+    else:
+        probe_keys, addresses = _resolve_targets(
+            targets, cfg.pmtu_family, dns_cache, cfg.pmtu_backend
+        )
+    for key, addr in addresses.items():
         log(
-            f"[automtu] Probing Path MTU for: {', '.join(targets)} (policy={args.pmtu_policy})"
+            f"[automtu]  - {key}: {'resolved to ' + addr if addr else 'resolution failed'}"
         )
-        good: list[int] = []
-        for t in targets:
-            p = probe_pmtu(
-                t, args.pmtu_min_payload, args.pmtu_max_payload, args.pmtu_timeout
+
+    # WG peer endpoints are probed with WG's fwmark, so they follow the same
+    # routing table as the encapsulated traffic (not the tunnel itself)
+    wg_mark, probe_bind = _probe_binding(cfg, auto_targets_added, probe_keys, log)
+
+    builtin_probe = probe is None
+    if replay is not None:
+
+        def probe(
+            target: str, hint: int | None, iface: str | None = None
+        ) -> int | None:
+            return replay.probe(
+                f"{target}%{iface}" if iface else target,
+                cfg.pmtu_min_payload,
+                _max_payload(
+                    cfg,
+                    *split_engine(target, cfg.pmtu_backend),
+                    iface_mtu(iface) if iface else base_mtu,
+                ),
+                cfg.pmtu_timeout,
+                hint=hint,
             )
-            probe_results[t] = p
-            log(f"[automtu]  - {t}: {p if p else 'probe failed'}")
-            if p:
-                good.append(int(p))
 
-        if good:
-            chosen_pmtu = _choose(good, args.pmtu_policy)
-            log(
-                f"[automtu] Selected Path MTU (policy={args.pmtu_policy}): {chosen_pmtu}"
+    elif probe is None:
+
+        def probe(
+            target: str, hint: int | None, iface: str | None = None
+        ) -> int | None:
+            ceiling = iface_mtu(iface) if iface else base_mtu
+            return _probe_key(
+                cfg,
+                target,
+                addresses,
+                hint,
+                ceiling=ceiling,
+                **probe_bind(target, iface),
             )
+
+    probe = recorded_probe(probe)  # no-op unless --record
+
+    # PMTU probing
+    effective_mtu = base_mtu
+    probe_results: dict[str, int | None] = {}
+    chosen_pmtu: int | None = None
+    pmtu_partial = False
+    pmtu_schedule: dict = {}
+    pmtu_cache: dict = {}
+    stability: dict = {}
+    stability_entry: dict = {}
+    pmtu_history: dict = {}
+    pmtu_throughput: dict = {}
+
+    if probe_keys:
+        probe_results, pmtu_partial, pmtu_schedule = _probe_targets(
+            cfg, probe_keys, probe, hints, started, log
+        )
+        # Long-term history: record this run, history policies reduce per target
+        if cfg.history_file:
+            pmtu_history = record_history(
+                Path(cfg.history_file),
+                probe_results,
+                policy=cfg.pmtu_policy,
+                capacity=cfg.history_size,
+                window=cfg.history_window,
+                skip=pmtu_schedule.get("partial", ()),
+            )
+        chosen_pmtu = _select_pmtu(cfg, probe_results, pmtu_history, log)
+        if chosen_pmtu is not None:
             effective_mtu = min(base_mtu, chosen_pmtu)
+
+        # Throughput validation: the fastest of the probed MTU and a few smaller
+        if cfg.throughput_validate and chosen_pmtu is not None and replay is None:
+            budget = cfg.throughput_budget
+            if cfg.deadline is not None:
+                budget = min(budget, started + float(cfg.deadline) - time.monotonic())
+            pmtu_throughput = validate_bottleneck(
+                probe_results,
+                effective_mtu,
+                backend=cfg.pmtu_backend,
+                budget=budget,
+                bind=probe_bind,
+                log=log,
+            )
+            if pmtu_throughput:
+                effective_mtu = pmtu_throughput["chosen"]
+
+        # Hysteresis: decreases now, increases only after repeated confirmation
+        if cfg.stability_confirm and cfg.state_file:
+            effective_mtu, stability, stability_entry = stabilize(
+                effective_mtu,
+                (state.get("stability") or {}).get("effective"),
+                confirm=int(cfg.stability_confirm),
+                threshold=int(cfg.stability_threshold),
+                cap=base_mtu,
+                log=log,
+            )
+        elif cfg.stability_confirm:
+            log("[automtu] INFO: --stability-confirm needs --state-file; not gating.")
+
+        # Hints that held: a cheap two-probe revalidation, not a full probe
+        revalidated = [
+            t for t, p in probe_results.items() if t in cached and p == cached[t]
+        ]
+        if cfg.state_file:
+            if not cfg.dry_run:  # a dry run must not advance the stability gate
+                save_probe_state(
+                    Path(cfg.state_file),
+                    state,
+                    # deadline-bounded results are only lower bounds: keep the old value
+                    {
+                        t: p
+                        for t, p in probe_results.items()
+                        if t not in pmtu_schedule.get("partial", ())
+                    },
+                    revalidated=revalidated,
+                    dns=dns_cache.to_state(),
+                    egress_path=path,
+                    stability=stability_entry if stability else None,
+                )
+            pmtu_cache = {
+                "ttl": cfg.cache_ttl,
+                "path_changed": path_changed,
+                "revalidated": revalidated,
+                "expired": expired,
+            }
+
+    # Other default-route links (multi-homed hosts): probe bound to each one
+    egress_links: dict = {}
+    if cfg.probe_all_egress and probe_keys:
+        if replay is not None:
+            links = replay.links()
         else:
-            log(
-                "[automtu] WARNING: All PMTU probes failed. Falling back to egress MTU."
+            links = [d for d in detect_egress_ifaces() if d != egress]
+        if links and not builtin_probe:
+            log("[automtu] INFO: Per-egress probing needs the built-in probe engines.")
+        elif links:
+            egress_links = _probe_links(
+                cfg, links, probe_keys, hints, probe, started, iface_mtu, log
             )
 
     # Apply egress MTU (optional)
     egress_applied = False
-    if args.apply_egress_mtu:
-        if egress == args.wg_if:
+    if cfg.apply_egress_mtu:
+        if egress == cfg.wg_if:
             log(
-                f"[automtu] INFO: Skipping egress MTU apply because egress == {args.wg_if}."
+                f"[automtu] INFO: Skipping egress MTU apply because egress == {cfg.wg_if}."
             )
         else:
             log(f"[automtu] Applying effective MTU {effective_mtu} to egress {egress}")
-            set_iface_mtu(egress, effective_mtu, args.dry_run)
+            apply(egress, effective_mtu, cfg.dry_run)
             egress_applied = True
+        for link, info in egress_links.items():
+            log(
+                f"[automtu] Applying effective MTU {info['effective_mtu']} to egress {link}"
+            )
+            apply(link, info["effective_mtu"], cfg.dry_run)
+            info["applied"] = True
 
     # Compute WG MTU
-    wg_mtu = max(int(args.wg_min), int(effective_mtu) - int(args.wg_overhead))
+    if cfg.wg_overhead == "auto":
+        wg_overhead, wg_overhead_detail = _auto_wg_overhead(cfg.wg_if, dns_cache, log)
+    else:
+        wg_overhead = int(cfg.wg_overhead)
+        wg_overhead_detail = {"mode": "fixed"}
+
+    wg_mtu = max(int(cfg.wg_min), int(effective_mtu) - wg_overhead)
     log(
-        f"[automtu] Computed {args.wg_if} MTU: {wg_mtu} (overhead={args.wg_overhead}, min={args.wg_min})"
+        f"[automtu] Computed {cfg.wg_if} MTU: {wg_mtu} (overhead={wg_overhead}, min={cfg.wg_min})"
     )
 
-    wg_mtu_set: Optional[int] = None
+    # Tunnel stack (optional): every tunnel gets its underlay's MTU minus its
+    # own encapsulation; WG nested in another tunnel follows that tunnel
+    tunnels: dict = {}
+    if cfg.tunnel_stack or cfg.apply_tunnel_mtu:
+        tunnels = stack_tunnels(
+            egress=egress,
+            egress_mtu=effective_mtu,
+            wg_if=cfg.wg_if,
+            wg_overhead=(wg_overhead, wg_overhead_detail),
+            addresses=addresses,
+            apply=apply if cfg.apply_tunnel_mtu else None,
+            dry=cfg.dry_run,
+            log=log,
+        )
+        if cfg.wg_if in tunnels and tunnels[cfg.wg_if]["depth"] > 1:
+            wg_mtu = max(int(cfg.wg_min), tunnels[cfg.wg_if]["mtu"])
+            log(f"[automtu] {cfg.wg_if} is nested in a tunnel stack; MTU {wg_mtu}")
+
+    # Per-peer route MTUs (optional): interface keeps the best common value
+    wg_peer_routes: dict = {}
+    if cfg.wg_peer_routes:
+        if wg_is_active(cfg.wg_if):
+            wg_mtu, wg_peer_routes = sync_peer_routes(
+                cfg.wg_if,
+                probe_results,
+                addresses,
+                base_mtu=base_mtu,
+                wg_mtu=wg_mtu,
+                wg_min=int(cfg.wg_min),
+                wg_overhead=cfg.wg_overhead,
+                dry=cfg.dry_run,
+                log=log,
+            )
+        else:
+            log(f"[automtu] INFO: {cfg.wg_if} not active; skipping per-peer routes.")
+
+    wg_mtu_set: int | None = None
     wg_mtu_clamped = False
 
-    if args.set_wg_mtu is not None:
-        wg_mtu_set = int(args.set_wg_mtu)
-        forced = max(int(args.wg_min), wg_mtu_set)
+    if cfg.set_wg_mtu is not None:
+        wg_mtu_set = int(cfg.set_wg_mtu)
+        forced = max(int(cfg.wg_min), wg_mtu_set)
         wg_mtu_clamped = forced != wg_mtu_set
         if wg_mtu_clamped:
             log(
-                f"[automtu][WARN] --set-wg-mtu clamped to {forced} (wg-min={args.wg_min})."
+                f"[automtu][WARN] --set-wg-mtu clamped to {forced} (wg-min={cfg.wg_min})."
             )
         wg_mtu = forced
         log(f"[automtu] Forcing WireGuard MTU (override): {wg_mtu}")
 
     # Apply WG MTU (optional)
-    wg_present = iface_exists(args.wg_if)
-    wg_active = wg_is_active(args.wg_if) if wg_present else False
+    wg_present = iface_exists(cfg.wg_if)
+    wg_active = wg_is_active(cfg.wg_if) if wg_present else False
     wg_applied = False
 
-    if args.apply_wg_mtu:
+    if cfg.apply_wg_mtu:
         if wg_present:
-            set_iface_mtu(args.wg_if, wg_mtu, args.dry_run)
-            log(f"[automtu] Applied: {args.wg_if} MTU {wg_mtu}")
+            apply(cfg.wg_if, wg_mtu, cfg.dry_run)
+            log(f"[automtu] Applied: {cfg.wg_if} MTU {wg_mtu}")
             wg_applied = True
         else:
             log(
-                f"[automtu] NOTE: {args.wg_if} not present yet. Start WireGuard first, then re-run."
+                f"[automtu] NOTE: {cfg.wg_if} not present yet. Start WireGuard first, then re-run."
             )
     else:
         log("[automtu] INFO: Not applying WireGuard MTU (use --apply-wg-mtu).")
 
     # Apply Docker MTU (optional)
     docker_ifaces = detect_docker_ifaces(
-        getattr(args, "docker_if", None),
-        include_user_bridges=not bool(getattr(args, "docker_no_user_bridges", False)),
+        list(cfg.docker_if) or None,
+        include_user_bridges=not cfg.docker_no_user_bridges,
     )
     docker_applied: list[str] = []
 
-    if args.apply_docker_mtu:
+    if cfg.apply_docker_mtu:
         if not docker_ifaces:
             log("[automtu] INFO: No Docker interfaces detected for MTU apply.")
         else:
@@ -233,35 +1009,48 @@ def run_automtu(args) -> int:
             )
             for d in docker_ifaces:
                 if iface_exists(d):
-                    set_iface_mtu(d, effective_mtu, args.dry_run)
+                    apply(d, effective_mtu, cfg.dry_run)
                     docker_applied.append(d)
     else:
         log(
             "[automtu] INFO: Not applying Docker MTU (use --apply-docker-mtu or --apply-all)."
         )
 
-    # Machine-readable outputs
-    if emit_single_number(
-        mode, base_mtu=base_mtu, effective_mtu=effective_mtu, wg_mtu=wg_mtu
-    ):
-        return 0
+    # Apply inside network namespaces (optional): containers / pods
+    netns: dict = {}
+    if cfg.apply_netns_mtu:
+        netns = apply_namespaces(
+            effective_mtu,
+            patterns=cfg.netns_if,
+            dry=cfg.dry_run,
+            workers=cfg.netns_workers,
+            log=log,
+        )
 
-    if emit_json(
-        mode,
+    # Last known-good values, re-applied first by --fast-start at the next boot;
+    # `automtu hotplug` gives interfaces that appear later the cached MTUs
+    if cfg.state_file and not cfg.dry_run:
+        save_known_good(
+            Path(cfg.state_file),
+            {"effective": effective_mtu, "wg": wg_mtu},
+            applied_mtus,
+        )
+
+    result = Result(
         egress_iface=egress,
         base_mtu=base_mtu,
         effective_mtu=effective_mtu,
-        egress_forced_mtu=int(args.force_egress_mtu) if args.force_egress_mtu else None,
+        egress_forced_mtu=int(cfg.force_egress_mtu) if cfg.force_egress_mtu else None,
         egress_applied=egress_applied,
         pmtu_targets=targets,
         pmtu_auto_targets_added=auto_targets_added,
-        pmtu_policy=args.pmtu_policy,
+        pmtu_policy=cfg.pmtu_policy,
         pmtu_chosen=chosen_pmtu,
         pmtu_results=probe_results,
-        wg_iface=args.wg_if,
+        wg_iface=cfg.wg_if,
         wg_mtu=wg_mtu,
-        wg_overhead=int(args.wg_overhead),
-        wg_min=int(args.wg_min),
+        wg_overhead=wg_overhead,
+        wg_min=int(cfg.wg_min),
         wg_set_mtu=wg_mtu_set,
         wg_clamped=wg_mtu_clamped,
         wg_present=wg_present,
@@ -269,15 +1058,213 @@ def run_automtu(args) -> int:
         wg_applied=wg_applied,
         docker_ifaces=docker_ifaces,
         docker_applied=docker_applied,
-        dry_run=bool(args.dry_run),
+        dry_run=cfg.dry_run,
+        pmtu_addresses=addresses,
+        wg_overhead_detail=wg_overhead_detail,
+        wg_peer_routes=wg_peer_routes,
+        pmtu_partial=pmtu_partial,
+        pmtu_schedule=pmtu_schedule,
+        netns=netns,
+        egress_links=egress_links,
+        pmtu_wg_fwmark=wg_mark,
+        pmtu_cache=pmtu_cache,
+        stability=stability,
+        pmtu_history=pmtu_history,
+        tunnels=tunnels,
+        pmtu_throughput=pmtu_throughput,
+    )
+
+    # Precomputed facts for configuration management (ansible_local.automtu)
+    if cfg.facts_file and not cfg.dry_run:
+        update_facts(
+            Path(cfg.facts_file),
+            result,
+            skip=pmtu_schedule.get("partial", ()),
+            log=log,
+        )
+    return result
+
+
+def _changes_system(args) -> bool:
+    return bool(
+        getattr(args, "apply_egress_mtu", False)
+        or getattr(args, "apply_wg_mtu", False)
+        or getattr(args, "apply_docker_mtu", False)
+        or getattr(args, "wg_peer_routes", False)
+        or getattr(args, "apply_netns_mtu", False)
+        or getattr(args, "apply_tunnel_mtu", False)
+        or (getattr(args, "force_egress_mtu", None) is not None)
+        or (getattr(args, "persist", None) is not None)
+    )
+
+
+def expand_apply_all(args) -> None:
+    """
+    Expand --apply-all into the individual apply flags.
+    """
+    if getattr(args, "apply_all", False):
+        args.apply_egress_mtu = True
+        args.apply_wg_mtu = True
+        args.apply_docker_mtu = True
+
+
+def check_root(args) -> None:
+    """
+    Exit unless running as root when the options change the system (and it
+    is not a dry run).
+    """
+    require_root(dry=args.dry_run, needs_root=_changes_system(args))
+
+
+def _run_automtu(args) -> int:
+    expand_apply_all(args)
+    if getattr(args, "replay", None):
+        if getattr(args, "fast_start", False) or getattr(args, "persist", None):
+            print(
+                "[automtu][ERROR] --replay cannot be combined with --fast-start "
+                "or --persist.",
+                file=sys.stderr,
+            )
+            return 4
+        args.dry_run = True  # a replay never changes the system
+
+    mode = OutputMode(
+        print_mtu=getattr(args, "print_mtu", None),
+        print_json=bool(getattr(args, "print_json", False)),
+    )
+    err = mode.validate()
+    if err:
+        print(f"[automtu][ERROR] {err}", file=sys.stderr)
+        return 4
+
+    log = Logger(mode.machine).log
+
+    # Thin client: read-only queries are answered by a running `automtu serve`
+    # that runs the same probe options (else the answer would be for its own)
+    sock = getattr(args, "socket", None)
+    if sock and mode.machine and not _changes_system(args):
+        from .serve import config_digest, query
+
+        try:
+            digest = config_digest(config_from_args(args))
+            print(query(sock, mode.print_mtu or "json", digest=digest))
+            return 0
+        except (OSError, ValueError) as e:
+            log(f"[automtu] INFO: No answer from {sock} ({e}); running locally.")
+
+    check_root(args)
+
+    # Persistence mode: install/uninstall persistence mechanism and exit.
+    if getattr(args, "persist", None):
+        uninstall = bool(getattr(args, "uninstall", False))
+        if args.persist == "systemd":
+            from .persist import persist_systemd, uninstall_systemd
+
+            if uninstall:
+                uninstall_systemd(dry=args.dry_run)
+                return 0
+
+            persist_systemd(sys.argv, dry=args.dry_run)
+            return 0
+
+        if args.persist == "docker":
+            from .persist import persist_docker, uninstall_docker
+
+            if uninstall:
+                uninstall_docker(dry=args.dry_run)
+                return 0
+
+            persist_docker(sys.argv, dry=args.dry_run)
+            return 0
+
+        if args.persist == "systemd-timer":
+            from .persist import persist_systemd_timer, uninstall_systemd_timer
+
+            if uninstall:
+                uninstall_systemd_timer(dry=args.dry_run)
+                return 0
+
+            persist_systemd_timer(
+                sys.argv,
+                dry=args.dry_run,
+                interval=getattr(args, "timer_interval", "15min"),
+                random_delay=getattr(args, "timer_random_delay", "5min"),
+            )
+            return 0
+
+        print(
+            f"[automtu][ERROR] Unknown persist backend: {args.persist}", file=sys.stderr
+        )
+        return 4
+
+    # Inventory mode: stream one JSON line per target from a file/stdin and exit.
+    target_file = getattr(args, "pmtu_target_file", None)
+    if target_file:
+        if args.pmtu_policy in HISTORY_POLICIES:
+            print(
+                f"[automtu][ERROR] --pmtu-policy {args.pmtu_policy} is not supported "
+                "with --pmtu-target-file.",
+                file=sys.stderr,
+            )
+            return 4
+        try:
+            probe = _inventory_probe(config_from_args(args), Logger(True).log)
+        except ValueError as e:
+            print(f"[automtu][ERROR] {e}", file=sys.stderr)
+            return 4
+        except AutoMTUError as e:
+            print(f"[automtu][ERROR] {e}", file=sys.stderr)
+            return e.code
+        checkpoint = getattr(args, "checkpoint", None)
+        try:
+            run_inventory(
+                iter_target_file(target_file),
+                probe,
+                policy=args.pmtu_policy,
+                workers=getattr(args, "pmtu_workers", 8),
+                checkpoint=Path(checkpoint) if checkpoint else None,
+            )
+        except OSError as e:
+            print(f"[automtu][ERROR] Inventory failed: {e}", file=sys.stderr)
+            return 2
+        return 0
+
+    try:
+        cfg = config_from_args(args)
+    except ValueError as e:
+        print(f"[automtu][ERROR] {e}", file=sys.stderr)
+        return 4
+
+    apply: ApplyFn | None = None
+    if getattr(args, "fast_start", False):
+        if not cfg.state_file:
+            print("[automtu][ERROR] --fast-start needs --state-file.", file=sys.stderr)
+            return 4
+        # Phase 1: last known-good values at once, then release dependent units
+        known = apply_known_good(
+            load_state(cfg.state_file),
+            dry_run_logged(set_iface_mtu, log),
+            dry=cfg.dry_run,
+            log=log,
+        )
+        sd_notify(f"READY=1\nSTATUS=Applied {len(known)} known-good MTUs; probing")
+        # Phase 2: probe; interfaces that already have the result stay untouched
+        apply = only_changed(dry_run_logged(set_iface_mtu, log), log)
+
+    try:
+        result = compute(cfg, log=log, apply=apply)
+    except AutoMTUError as e:
+        print(f"[automtu][ERROR] {e}", file=sys.stderr)
+        return e.code
+
+    # Machine-readable outputs
+    if emit_single_number(
+        mode,
+        base_mtu=result.base_mtu,
+        effective_mtu=result.effective_mtu,
+        wg_mtu=result.wg_mtu,
     ):
         return 0
 
-    _ = Result(
-        egress=egress,
-        base_mtu=base_mtu,
-        effective_mtu=effective_mtu,
-        wg_if=args.wg_if,
-        wg_mtu=wg_mtu,
-    )
+    emit_json(mode, **asdict(result))
     return 0
@@ -1,15 +1,13 @@
 from __future__ import annotations
 
 import re
-from typing import Optional
 
 from .net import iface_exists, list_ifaces
 
-
 _BRIDGE_RE = re.compile(r"^br-[0-9a-f]+$", re.IGNORECASE)
 
 
-def _split_items(items: Optional[list[str]]) -> list[str]:
+def _split_items(items: list[str] | None) -> list[str]:
     raw: list[str] = []
     for item in items or []:
         raw.extend([x.strip() for x in item.split(",") if x.strip()])
@@ -18,7 +16,7 @@ def _split_items(items: Optional[list[str]]) -> list[str]:
 
 
 def detect_docker_ifaces(
-    docker_if_args: Optional[list[str]], *, include_user_bridges: bool
+    docker_if_args: list[str] | None, *, include_user_bridges: bool
 ) -> list[str]:
     """
     Determine Docker-related interfaces to apply MTU to.
@@ -46,3 +44,16 @@ def detect_docker_ifaces(
 
     # de-dup (defensive)
     return list(dict.fromkeys(found))
+
+
+def is_docker_iface(
+    name: str, docker_if_args: list[str] | None, *, include_user_bridges: bool
+) -> bool:
+    """
+    Whether name is selected by the same rules as detect_docker_ifaces (for
+    interfaces that appear later, see hotplug).
+    """
+    explicit = _split_items(docker_if_args)
+    if explicit:
+        return name in explicit
+    return name == "docker0" or bool(include_user_bridges and _BRIDGE_RE.match(name))
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from .state import record_pmtus
+
+# Ansible local facts (--facts-file): after every run, write the computed MTUs
+# to /etc/ansible/facts.d/automtu.fact, so fact gathering exposes them as
+# ansible_local.automtu and playbooks never have to run a probe themselves.
+
+_DEFAULT_FACTS_PATH = Path("/etc/ansible/facts.d/automtu.fact")
+_FACTS_VERSION = 1
+
+
+def build_facts(
+    result,
+    previous: dict | None = None,
+    *,
+    now: float | None = None,
+    skip: Iterable[str] = (),
+) -> dict:
+    """
+    Facts for a core.Result. Targets whose probe failed (or is in skip, e.g.
+    deadline-bounded) keep the value and timestamp from previous facts.
+    """
+    ts = time.time() if now is None else now
+    skip = set(skip)
+    fresh = {t: p for t, p in result.pmtu_results.items() if t not in skip}
+    prev_targets = (previous or {}).get("pmtu", {}).get("targets") or {}
+    known = record_pmtus({"targets": prev_targets}, fresh, now=ts)["targets"]
+    targets = {
+        t: {"pmtu": e["pmtu"], "ts": e["ts"]}
+        for t, e in known.items()
+        if t in result.pmtu_results
+    }
+    for t in result.pmtu_results:
+        targets.setdefault(t, {"pmtu": None, "ts": None})
+    return {
+        "version": _FACTS_VERSION,
+        "ts": ts,
+        "effective_mtu": int(result.effective_mtu),
+        "egress": {"iface": result.egress_iface, "mtu": int(result.base_mtu)},
+        "wg": {"iface": result.wg_iface, "mtu": int(result.wg_mtu)},
+        "pmtu": {
+            "policy": result.pmtu_policy,
+            "chosen": result.pmtu_chosen,
+            "targets": targets,
+        },
+    }
+
+
+def load_facts(path: Path) -> dict:
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_facts(path: Path, facts: dict) -> None:
+    """
+    Atomically write the fact file (readers never see a partial file). It is
+    kept non-executable: Ansible would run an executable .fact file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(facts, sort_keys=True, indent=2) + "\n")
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def update_facts(
+    path: Path,
+    result,
+    *,
+    skip: Iterable[str] = (),
+    log: Callable[[str], None] = print,
+) -> None:
+    """
+    Merge a run's result into the fact file at path; a write error is only
+    logged (the run itself succeeded).
+    """
+    try:
+        write_facts(path, build_facts(result, load_facts(path), skip=skip))
+    except OSError as e:
+        log(f"[automtu][WARN] Cannot write facts file {path}: {e}")
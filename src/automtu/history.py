@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import array
+import sqlite3
+import time
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+# Probe history (--history-file): a fixed-size ring buffer of PMTU samples per
+# target, stored as one SQLite row (packed uint16 array + write position), plus
+# an incrementally updated EWMA. Adding a sample or reading a target touches a
+# single row by primary key, so the cost per target does not grow with history.
+
+_DEFAULT_HISTORY_PATH = Path("/var/lib/automtu/history.sqlite")
+
+HISTORY_POLICIES = ("p10", "ewma", "min-window")
+
+_EWMA_ALPHA = 0.3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    target TEXT PRIMARY KEY,
+    head INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    ring BLOB NOT NULL,
+    ewma REAL NOT NULL,
+    ts REAL NOT NULL
+)
+"""
+
+
+class History:
+    def __init__(self, path: Path, capacity: int = 64) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.capacity = int(capacity)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute(_SCHEMA)
+
+    def _row(self, target: str) -> tuple[int, int, array.array, float] | None:
+        row = self._db.execute(
+            "SELECT head, n, ring, ewma FROM history WHERE target = ?", (target,)
+        ).fetchone()
+        if row is None:
+            return None
+        ring = array.array("H")
+        ring.frombytes(row[2])
+        return row[0], row[1], ring, row[3]
+
+    def add(self, target: str, mtu: int, *, now: float | None = None) -> None:
+        row = self._row(target)
+        if row is None or len(row[2]) != self.capacity:
+            # new target (or capacity changed): start a fresh ring
+            head, n, ewma = 0, 0, float(mtu)
+            ring = array.array("H", [0] * self.capacity)
+        else:
+            head, n, ring, ewma = row
+            ewma = _EWMA_ALPHA * mtu + (1 - _EWMA_ALPHA) * ewma
+        ring[head] = int(mtu)
+        self._db.execute(
+            "INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                target,
+                (head + 1) % self.capacity,
+                min(n + 1, self.capacity),
+                ring.tobytes(),
+                ewma,
+                time.time() if now is None else now,
+            ),
+        )
+
+    def samples(self, target: str) -> list[int]:
+        """
+        Stored samples for target, oldest first.
+        """
+        row = self._row(target)
+        if row is None:
+            return []
+        head, n, ring, _ = row
+        start = (head - n) % len(ring)
+        return [ring[(start + i) % len(ring)] for i in range(n)]
+
+    def ewma(self, target: str) -> float | None:
+        row = self._row(target)
+        return row[3] if row is not None else None
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+
+def reduce_history(
+    history: History, target: str, policy: str, *, window: int = 8
+) -> int | None:
+    """
+    Reduce a target's history to one PMTU:
+    p10 (10th percentile, nearest rank), ewma (rounded down) or
+    min-window (minimum of the last `window` samples).
+    """
+    if policy == "ewma":
+        value = history.ewma(target)
+        return int(value) if value is not None else None
+    samples = history.samples(target)
+    if not samples:
+        return None
+    if policy == "p10":
+        return sorted(samples)[(len(samples) - 1) // 10]
+    if policy == "min-window":
+        return min(samples[-max(1, window) :])
+    raise ValueError(f"unknown history policy: {policy}")
+
+
+def record_history(
+    path: Path,
+    results: Mapping[str, int | None],
+    *,
+    policy: str,
+    capacity: int = 64,
+    window: int = 8,
+    skip: Iterable[str] = (),
+) -> dict:
+    """
+    Append a run's results (except failed ones and those in skip) to the
+    history at path and reduce every target's history with policy (p10 for
+    reporting when policy is not a history policy).
+    """
+    policy = policy if policy in HISTORY_POLICIES else "p10"
+    skip = set(skip)
+    history = History(Path(path), capacity=capacity)
+    try:
+        for t, p in results.items():
+            if p is not None and t not in skip:
+                history.add(t, int(p))
+        return {
+            t: {
+                "samples": len(history.samples(t)),
+                "value": reduce_history(history, t, policy, window=window),
+            }
+            for t in results
+        }
+    finally:
+        history.close()
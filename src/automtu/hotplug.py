@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import errno
+import socket
+import struct
+import subprocess
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from .boot import sd_notify
+from .docker import is_docker_iface
+from .state import load_state
+
+# `automtu hotplug`: Docker bridges appear whenever a compose project starts
+# and wg-quick brings its interface up after boot. Listen for RTM_NEWLINK on
+# rtnetlink and give matching interfaces the MTU of the last run (state file)
+# as soon as they exist; nothing is probed.
+#
+# The kernel sends RTM_NEWLINK for every change of an existing link too (MTU,
+# flags, state). Only links whose ifindex was not there when listening started
+# (an RTM_GETLINK dump taken before subscribing; a second dump right after
+# subscribing catches links created in between) are touched, once, when they
+# are first seen up: later MTU changes by a full run or by hand are left alone,
+# and wg-quick, which sets its own MTU while bringing the link up, does not
+# override ours.
+
+RTMGRP_LINK = 0x1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+_NLMSG_ERROR, _NLMSG_DONE = 2, 3
+_NLM_F_REQUEST, _NLM_F_DUMP = 0x1, 0x300
+_IFF_UP = 0x1
+
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_LINKINFO = 18
+IFLA_INFO_KIND = 1
+
+_NLMSGHDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_IFINFOMSG = struct.Struct("=BxHiII")  # family, type, index, flags, change
+_RTATTR = struct.Struct("=HH")  # len, type
+
+ApplyFn = Callable[[str, int, bool], None]
+LogFn = Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class Link:
+    index: int
+    name: str
+    mtu: int | None
+    kind: str | None = None  # IFLA_INFO_KIND, e.g. bridge, wireguard
+    up: bool = False  # IFF_UP
+
+
+def _align(n: int) -> int:
+    return (n + 3) & ~3
+
+
+def _attrs(data: bytes, off: int, end: int) -> Iterator[tuple[int, bytes]]:
+    while off + _RTATTR.size <= end:
+        length, kind = _RTATTR.unpack_from(data, off)
+        if length < _RTATTR.size:
+            return
+        yield kind & 0x3FFF, data[off + _RTATTR.size : off + length]  # no NLA flags
+        off += _align(length)
+
+
+def _cstr(value: bytes) -> str:
+    return value.split(b"\0", 1)[0].decode("utf-8", "replace")
+
+
+def _messages(data: bytes) -> Iterator[tuple[int, int, int]]:
+    # -> (type, body offset, end offset) per netlink message
+    off = 0
+    while off + _NLMSGHDR.size <= len(data):
+        length, msg_type = _NLMSGHDR.unpack_from(data, off)[:2]
+        if length < _NLMSGHDR.size or off + length > len(data):
+            return
+        yield msg_type, off + _NLMSGHDR.size, off + length
+        off += _align(length)
+
+
+def parse_links(data: bytes, msg_type: int = RTM_NEWLINK) -> list[Link]:
+    """
+    Parse the RTM_NEWLINK (or msg_type) messages in one netlink datagram.
+    """
+    links: list[Link] = []
+    for t, body, end in _messages(data):
+        if t != msg_type or end - body < _IFINFOMSG.size:
+            continue
+        index, flags = _IFINFOMSG.unpack_from(data, body)[2:4]
+        name: str | None = None
+        mtu: int | None = None
+        kind: str | None = None
+        for attr, value in _attrs(data, body + _IFINFOMSG.size, end):
+            if attr == IFLA_IFNAME:
+                name = _cstr(value)
+            elif attr == IFLA_MTU and len(value) >= 4:
+                mtu = struct.unpack_from("=I", value)[0]
+            elif attr == IFLA_LINKINFO:
+                for sub, sub_value in _attrs(value, 0, len(value)):
+                    if sub == IFLA_INFO_KIND:
+                        kind = _cstr(sub_value)
+        if name:
+            links.append(Link(index, name, mtu, kind, bool(flags & _IFF_UP)))
+    return links
+
+
+def dump_links() -> list[Link]:
+    """
+    All current links (RTM_GETLINK dump).
+    """
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as s:
+        body = _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+        header = _NLMSGHDR.pack(
+            _NLMSGHDR.size + len(body), RTM_GETLINK, _NLM_F_REQUEST | _NLM_F_DUMP, 1, 0
+        )
+        s.sendto(header + body, (0, 0))
+        links: list[Link] = []
+        while True:
+            data = s.recv(65536)
+            links.extend(parse_links(data))
+            types = {t for t, _, _ in _messages(data)}
+            if not data or types & {_NLMSG_DONE, _NLMSG_ERROR}:
+                return links
+
+
+def new_links(data: bytes, seen: set[int]) -> list[Link]:
+    """
+    Links in one datagram that are up and whose ifindex is not in seen (the
+    links that existed when listening started, and those handled since).
+    Updates seen; a removed link's index is forgotten.
+    """
+    for link in parse_links(data, RTM_DELLINK):
+        seen.discard(link.index)
+    fresh: list[Link] = []
+    for link in parse_links(data):
+        if link.up and link.index not in seen:
+            seen.add(link.index)
+            fresh.append(link)
+    return fresh
+
+
+def resync(seen: set[int]) -> list[Link]:
+    """
+    After a netlink overrun (ENOBUFS, events lost): dump all links and
+    return the ones new_links would have reported. Updates seen.
+    """
+    links = dump_links()
+    seen.intersection_update(link.index for link in links)
+    fresh = [link for link in links if link.up and link.index not in seen]
+    seen.update(link.index for link in fresh)
+    return fresh
+
+
+def open_link_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    sock.bind((0, RTMGRP_LINK))
+    return sock
+
+
+@dataclass(frozen=True)
+class Selectors:
+    """
+    Which new links get an MTU: Docker interfaces chosen like
+    detect_docker_ifaces, and the WireGuard interface.
+    """
+
+    docker: bool = False
+    docker_if: tuple[str, ...] = ()  # explicit names; empty: docker0 + br-*
+    user_bridges: bool = True
+    wg_if: str | None = None
+
+    def role(self, name: str) -> str | None:
+        # -> "wg" / "effective" (the cached MTU the link gets), None: not selected
+        if self.wg_if is not None and name == self.wg_if:
+            return "wg"
+        if self.docker and is_docker_iface(
+            name, list(self.docker_if), include_user_bridges=self.user_bridges
+        ):
+            return "effective"
+        return None
+
+
+def target_mtu(link: Link, state: dict, selectors: Selectors) -> int | None:
+    """
+    MTU for a new link from a loaded state: the MTU last applied to that
+    name, else the cached effective MTU (Docker) or WireGuard MTU. None if
+    the link is not selected or nothing is cached.
+    """
+    role = selectors.role(link.name)
+    if role is None:
+        return None
+    applied = (state.get("applied") or {}).get(link.name)
+    mtu = applied if isinstance(applied, int) else (state.get("mtus") or {}).get(role)
+    return mtu if isinstance(mtu, int) else None
+
+
+def handle_links(
+    links: Iterable[Link],
+    state: dict,
+    selectors: Selectors,
+    apply: ApplyFn,
+    *,
+    dry: bool,
+    log: LogFn,
+) -> dict[str, int]:
+    """
+    Apply the cached MTU to every selected link that does not have it yet.
+    Returns iface -> MTU for the links that were changed.
+    """
+    changed: dict[str, int] = {}
+    for link in links:
+        mtu = target_mtu(link, state, selectors)
+        if mtu is None or link.mtu == mtu:
+            continue
+        log(f"[automtu] Hotplug: {link.name} has MTU {link.mtu}; applying {mtu}")
+        try:
+            apply(link.name, mtu, dry)
+        except (OSError, subprocess.SubprocessError) as e:  # link gone again?
+            log(f"[automtu][WARN] Hotplug: cannot set MTU on {link.name}: {e}")
+            continue
+        changed[link.name] = mtu
+    return changed
+
+
+def run_hotplug(args) -> int:
+    from .core import config_from_args, expand_apply_all
+    from .net import dry_run_logged, require_root, set_iface_mtu
+    from .output import Logger
+
+    expand_apply_all(args)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as e:
+        print(f"[automtu][ERROR] {e}", file=sys.stderr)
+        return 4
+    if not cfg.state_file:
+        print("[automtu][ERROR] automtu hotplug needs --state-file.", file=sys.stderr)
+        return 4
+    if not (cfg.apply_docker_mtu or cfg.apply_wg_mtu):
+        print(
+            "[automtu][ERROR] automtu hotplug needs --apply-docker-mtu, "
+            "--apply-wg-mtu or --apply-all.",
+            file=sys.stderr,
+        )
+        return 4
+    require_root(dry=cfg.dry_run, needs_root=True)
+
+    log = Logger(True).log
+    try:
+        seen = {link.index for link in dump_links()}
+        sock = open_link_socket()
+        # a link created before the subscription took effect sends no event
+        # we receive, but shows up in a dump taken after it
+        links = resync(seen)
+    except OSError as e:
+        print(f"[automtu][ERROR] Cannot listen on rtnetlink: {e}", file=sys.stderr)
+        return 2
+
+    selectors = Selectors(
+        docker=cfg.apply_docker_mtu,
+        docker_if=cfg.docker_if,
+        user_bridges=not cfg.docker_no_user_bridges,
+        wg_if=cfg.wg_if if cfg.apply_wg_mtu else None,
+    )
+    sd_notify("READY=1")
+    log(f"[automtu] Hotplug: watching new links (state {cfg.state_file})")
+    try:
+        while True:
+            if links:
+                # re-read: the state follows the latest full run (timer, serve)
+                handle_links(
+                    links,
+                    load_state(cfg.state_file),
+                    selectors,
+                    dry_run_logged(set_iface_mtu, log),
+                    dry=cfg.dry_run,
+                    log=log,
+                )
+            try:
+                links = new_links(sock.recv(65536), seen)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                log("[automtu][WARN] Hotplug: netlink events lost; resyncing links.")
+                links = resync(seen)
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"[automtu][ERROR] Hotplug listener failed: {e}", file=sys.stderr)
+        return 2
+    finally:
+        sock.close()
+    return 0
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import subprocess
+import sys
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import TextIO
+
+# What a single target's probe may raise (bad spec, socket or tool failure).
+_PROBE_ERRORS = (OSError, ValueError, subprocess.SubprocessError)
+
+
+def iter_target_file(path: str) -> Iterator[str]:
+    """
+    Lazily yield targets from a file (one per line, '#' comments allowed); '-' reads stdin.
+    """
+    if path == "-":
+        yield from _targets(sys.stdin)
+        return
+    with open(path, encoding="utf-8") as fh:
+        yield from _targets(fh)
+
+
+def _targets(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        t = line.split("#", 1)[0].strip()
+        if t:
+            yield t
+
+
+def choose_from_counts(counts: Counter, policy: str) -> int | None:
+    """
+    Same semantics as core._choose, but over a histogram of MTU values so the
+    memory footprint does not grow with the number of targets.
+    """
+    n = sum(counts.values())
+    if n == 0:
+        return None
+    keys = sorted(counts)
+    if policy == "min":
+        return keys[0]
+    if policy == "max":
+        return keys[-1]
+    if policy == "median":
+        lo_idx, hi_idx = (n - 1) // 2, n // 2
+        lo_val = hi_val = None
+        seen = 0
+        for k in keys:
+            seen += counts[k]
+            if lo_val is None and seen > lo_idx:
+                lo_val = k
+            if seen > hi_idx:
+                hi_val = k
+                break
+        return int((lo_val + hi_val) / 2)
+    raise ValueError(f"unknown policy: {policy}")
+
+
+def _digest(target: str) -> bytes:
+    return hashlib.blake2b(target.encode(), digest_size=8).digest()
+
+
+def _load_checkpoint(path: Path | None) -> tuple[set[bytes], Counter]:
+    # -> (digests of finished targets, histogram of their PMTUs)
+    done: set[bytes] = set()
+    counts: Counter = Counter()
+    if path is None or not path.exists():
+        return done, counts
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            if not isinstance(rec, dict) or "target" not in rec:
+                continue
+            digest = _digest(str(rec["target"]))
+            if digest in done:
+                continue
+            done.add(digest)
+            if isinstance(rec.get("pmtu"), int):
+                counts[rec["pmtu"]] += 1
+    return done, counts
+
+
+def _open_checkpoint(path: Path) -> TextIO:
+    # Terminate a torn last line first, so new records do not get glued to it.
+    torn = False
+    if path.exists() and path.stat().st_size:
+        with path.open("rb") as fh:
+            fh.seek(-1, 2)
+            torn = fh.read(1) != b"\n"
+    fh = path.open("a", encoding="utf-8")
+    if torn:
+        fh.write("\n")
+    return fh
+
+
+def run_inventory(
+    targets: Iterable[str],
+    probe: Callable[[str], int | None],
+    *,
+    policy: str,
+    workers: int = 8,
+    checkpoint: Path | None = None,
+    out: TextIO = sys.stdout,
+) -> dict:
+    """
+    Probe targets with bounded parallelism and stream one JSON line per target.
+
+    At most 2*workers probes are in flight, so memory stays bounded regardless
+    of input size. Finished targets are appended to the checkpoint; on resume
+    they are skipped but still count towards the aggregated policy result,
+    which is emitted as a final {"summary": ...} line and returned. Resuming
+    keeps an 8-byte digest per checkpointed target in memory.
+
+    A target whose probe raises (e.g. a malformed udp:host:port) is reported
+    as failed with an "error" field; the audit goes on.
+    """
+    workers = max(1, int(workers))
+    done, counts = _load_checkpoint(checkpoint)
+    probed = failed = 0
+    resumed = len(done)
+
+    ckpt = _open_checkpoint(checkpoint) if checkpoint else None
+
+    def emit(target: str, pmtu: int | None, error: str | None = None) -> None:
+        rec: dict = {"target": target, "pmtu": pmtu}
+        if error is not None:
+            rec["error"] = error
+        line = json.dumps(rec, sort_keys=True)
+        out.write(line + "\n")
+        out.flush()
+        if ckpt:
+            ckpt.write(line + "\n")
+            ckpt.flush()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: dict[Future, str] = {}
+
+            def collect() -> None:
+                nonlocal probed, failed
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    target = pending.pop(fut)
+                    error: str | None = None
+                    try:
+                        pmtu = fut.result()
+                    except _PROBE_ERRORS as e:  # one bad target must not end the audit
+                        pmtu, error = None, f"{type(e).__name__}: {e}"
+                    probed += 1
+                    if pmtu is None:
+                        failed += 1
+                    else:
+                        counts[int(pmtu)] += 1
+                    emit(target, pmtu, error)
+
+            for t in targets:
+                if done and _digest(t) in done:
+                    continue
+                while len(pending) >= 2 * workers:
+                    collect()
+                pending[pool.submit(probe, t)] = t
+            while pending:
+                collect()
+    finally:
+        if ckpt:
+            ckpt.close()
+
+    summary = {
+        "policy": policy,
+        "chosen": choose_from_counts(counts, policy),
+        "probed": probed,
+        "failed": failed,
+        "resumed": resumed,
+    }
+    out.write(json.dumps({"summary": summary}, sort_keys=True) + "\n")
+    out.flush()
+    return summary
@@ -5,7 +5,7 @@ import pathlib
 import re
 import subprocess
 import sys
-from typing import Optional
+from collections.abc import Callable
 
 
 def _run(cmd: list[str]) -> str:
@@ -39,11 +39,26 @@ def read_iface_mtu(iface: str) -> int:
 
 def set_iface_mtu(iface: str, mtu: int, dry: bool) -> None:
     if dry:
-        print(f"[automtu] DRY-RUN: ip link set mtu {mtu} dev {iface}")
-        return
+        return  # see dry_run_logged
     subprocess.run(["ip", "link", "set", "mtu", str(mtu), "dev", iface], check=True)
 
 
+def dry_run_logged(
+    apply: Callable[[str, int, bool], None], log: Callable[[str], None]
+) -> Callable[[str, int, bool], None]:
+    """
+    Wrap set_iface_mtu (or a compatible apply) so a dry run reports the
+    command it would run through log instead of printing it.
+    """
+
+    def apply_or_report(iface: str, mtu: int, dry: bool) -> None:
+        if dry:
+            log(f"[automtu] DRY-RUN: ip link set mtu {mtu} dev {iface}")
+        apply(iface, mtu, dry)
+
+    return apply_or_report
+
+
 def require_root(*, dry: bool, needs_root: bool) -> None:
     if needs_root and (not dry) and os.geteuid() != 0:
         print(
@@ -53,16 +68,17 @@ def require_root(*, dry: bool, needs_root: bool) -> None:
         raise SystemExit(1)
 
 
-def detect_egress_iface(ignore_vpn: bool = True) -> Optional[str]:
+def detect_egress_ifaces(ignore_vpn: bool = True) -> list[str]:
+    """
+    All default-route devices in route order (multi-homed / ECMP / backup uplinks).
+    """
     devs: list[str] = []
     for cmd in (
         ["ip", "-4", "route", "show", "default"],
         ["ip", "-6", "route", "show", "default"],
     ):
         for line in _run(cmd).splitlines():
-            m = re.search(r"\bdev\s+(\S+)", line)
-            if m:
-                devs.append(m.group(1))
+            devs.extend(re.findall(r"\bdev\s+(\S+)", line))
 
     if not devs:
         for cmd in (
@@ -73,17 +89,29 @@ def detect_egress_iface(ignore_vpn: bool = True) -> Optional[str]:
             if m:
                 devs.append(m.group(1))
 
-    seen: set[str] = set()
+    out: list[str] = []
     for d in devs:
         if not d or d == "lo" or not iface_exists(d):
             continue
         if ignore_vpn and re.match(r"^(wg|tun)\d*$", d):
             continue
-        if d in seen:
-            continue
-        seen.add(d)
-        return d
-    return None
+        if d not in out:
+            out.append(d)
+    return out
+
+
+def detect_egress_iface(ignore_vpn: bool = True) -> str | None:
+    devs = detect_egress_ifaces(ignore_vpn=ignore_vpn)
+    return devs[0] if devs else None
+
+
+def route_dev(addr: str) -> str | None:
+    """
+    Device the kernel routes traffic to addr through (`ip route get`).
+    """
+    cmd = ["ip", "-6" if ":" in addr else "-4", "route", "get", addr]
+    m = re.search(r"\bdev\s+(\S+)", _run(cmd))
+    return m.group(1) if m else None
 
 
 def default_route_uses_iface(iface: str) -> bool:
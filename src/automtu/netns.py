@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import ctypes
+import fnmatch
+import os
+import re
+import subprocess
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+# Network namespace fan-out: apply the effective MTU to interfaces inside
+# every named (/run/netns) and process (/proc/*/ns/net) namespace.
+#
+# setns() only switches the calling thread, so each worker thread enters a
+# namespace, runs `ip` there (children inherit the thread's namespace) and
+# switches back to the host namespace before taking the next job.
+
+_CLONE_NEWNET = 0x40000000
+
+_LINK_RE = re.compile(r"^\d+:\s+([^:@\s]+)(?:@\S+)?:.*?\bmtu\s+(\d+)")
+
+
+@dataclass(frozen=True)
+class Namespace:
+    name: str  # netns name, or "pid:<pid>" for process namespaces
+    path: str
+
+
+def _setns(fd: int) -> None:
+    if hasattr(os, "setns"):  # Python 3.12+
+        os.setns(fd, _CLONE_NEWNET)
+        return
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.setns(fd, _CLONE_NEWNET) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+
+@contextmanager
+def _entered(path: str) -> Iterator[None]:
+    """
+    Run the block with the calling thread inside the namespace at path.
+    """
+    home = os.open("/proc/thread-self/ns/net", os.O_RDONLY)
+    try:
+        target = os.open(path, os.O_RDONLY)
+        try:
+            _setns(target)
+        finally:
+            os.close(target)
+        try:
+            yield
+        finally:
+            try:
+                _setns(home)
+            except OSError as e:
+                # the worker thread would keep running in the wrong namespace
+                raise RuntimeError(f"cannot return to host namespace: {e}") from e
+    finally:
+        os.close(home)
+
+
+def list_namespaces(
+    proc_root: str = "/proc", run_netns: str = "/run/netns"
+) -> list[Namespace]:
+    """
+    Enumerate network namespaces, deduplicated by inode; named ones win over
+    process ones. The namespace automtu itself runs in is skipped.
+    """
+    seen: set[tuple[int, int]] = set()
+    try:
+        st = os.stat(Path(proc_root) / "self" / "ns" / "net")
+        seen.add((st.st_dev, st.st_ino))
+    except OSError:
+        pass
+
+    candidates: list[Namespace] = []
+    run_dir = Path(run_netns)
+    if run_dir.is_dir():
+        for p in sorted(run_dir.iterdir()):
+            candidates.append(Namespace(p.name, str(p)))
+    proc_dir = Path(proc_root)
+    if proc_dir.is_dir():
+        pids = sorted(
+            (p for p in proc_dir.iterdir() if p.name.isdigit()),
+            key=lambda p: int(p.name),
+        )
+        for p in pids:
+            candidates.append(Namespace(f"pid:{p.name}", str(p / "ns" / "net")))
+
+    out: list[Namespace] = []
+    for ns in candidates:
+        try:
+            st = os.stat(ns.path)
+        except OSError:
+            continue  # process exited or not permitted
+        key = (st.st_dev, st.st_ino)
+        if key not in seen:
+            seen.add(key)
+            out.append(ns)
+    return out
+
+
+def parse_links(text: str) -> dict[str, int]:
+    """
+    Parse `ip -o link show` into iface -> MTU (veth peers lose their @ifN suffix).
+    """
+    links: dict[str, int] = {}
+    for line in text.splitlines():
+        m = _LINK_RE.match(line)
+        if m:
+            links[m.group(1)] = int(m.group(2))
+    return links
+
+
+def _run(cmd: list[str]) -> str:
+    return subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+
+
+def apply_in_namespace(
+    ns: Namespace,
+    mtu: int,
+    patterns: Iterable[str],
+    dry: bool,
+    *,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """
+    Set mtu on the interfaces matching patterns (fnmatch) inside ns.
+    """
+    result: dict = {"ns": ns.name, "path": ns.path, "ifaces": {}, "error": None}
+    try:
+        with _entered(ns.path):
+            links = parse_links(_run(["ip", "-o", "link", "show"]))
+            for iface, before in links.items():
+                if not any(fnmatch.fnmatchcase(iface, p) for p in patterns):
+                    continue
+                changed = before != mtu
+                if changed and dry:
+                    log(
+                        f"[automtu] DRY-RUN: ({ns.name}) ip link set mtu {mtu} dev {iface}"
+                    )
+                elif changed:
+                    _run(["ip", "link", "set", "mtu", str(mtu), "dev", iface])
+                result["ifaces"][iface] = {"before": before, "changed": changed}
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None)
+        result["error"] = (stderr or str(e)).strip()
+    return result
+
+
+def fan_out(
+    namespaces: list[Namespace],
+    mtu: int,
+    *,
+    patterns: Iterable[str] = ("eth0",),
+    dry: bool = False,
+    workers: int = 8,
+    log: Callable[[str], None] = print,
+) -> list[dict]:
+    """
+    Apply mtu inside every namespace with at most `workers` in parallel.
+    Returns one result per namespace, in input order.
+    """
+    patterns = tuple(patterns)
+    if not namespaces:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(namespaces)))) as pool:
+        return list(
+            pool.map(
+                lambda ns: apply_in_namespace(ns, mtu, patterns, dry, log=log),
+                namespaces,
+            )
+        )
+
+
+def apply_namespaces(
+    mtu: int,
+    *,
+    patterns: Iterable[str],
+    dry: bool,
+    workers: int = 8,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """
+    fan_out() to every namespace on the host and log a summary; returns the
+    JSON detail.
+    """
+    patterns = list(patterns)
+    results = fan_out(
+        list_namespaces(), mtu, patterns=patterns, dry=dry, workers=workers, log=log
+    )
+    changed = sum(1 for r in results for i in r["ifaces"].values() if i["changed"])
+    failed = [r for r in results if r["error"]]
+    log(
+        f"[automtu] Network namespaces: {len(results)} "
+        f"({changed} ifaces changed, {len(failed)} failed)"
+    )
+    for r in failed:
+        log(f"[automtu][WARN] Namespace {r['ns']}: {r['error']}")
+    return {"patterns": patterns, "namespaces": results}
@@ -4,19 +4,18 @@ from __future__ import annotations
 import json
 import sys
 from dataclasses import dataclass
-from typing import Optional
 
 
 @dataclass(frozen=True)
 class OutputMode:
-    print_mtu: Optional[str]  # "egress" | "effective" | "wg" | None
+    print_mtu: str | None  # "egress" | "effective" | "wg" | None
     print_json: bool
 
     @property
     def machine(self) -> bool:
         return bool(self.print_mtu or self.print_json)
 
-    def validate(self) -> Optional[str]:
+    def validate(self) -> str | None:
         if self.print_mtu and self.print_json:
             return "--print-mtu and --print-json are mutually exclusive."
         return None
@@ -61,38 +60,47 @@ def emit_single_number(
     raise SystemExit(4)
 
 
-def emit_json(
-    mode: OutputMode,
+def build_payload(
     *,
     egress_iface: str,
     base_mtu: int,
     effective_mtu: int,
-    egress_forced_mtu: Optional[int],
+    egress_forced_mtu: int | None,
     egress_applied: bool,
     pmtu_targets: list[str],
     pmtu_auto_targets_added: list[str],
     pmtu_policy: str,
-    pmtu_chosen: Optional[int],
-    pmtu_results: dict[str, Optional[int]],
+    pmtu_chosen: int | None,
+    pmtu_results: dict[str, int | None],
     wg_iface: str,
     wg_mtu: int,
     wg_overhead: int,
     wg_min: int,
-    wg_set_mtu: Optional[int],
+    wg_set_mtu: int | None,
     wg_clamped: bool,
     wg_present: bool,
     wg_active: bool,
     wg_applied: bool,
-    docker_ifaces: Optional[list[str]] = None,
-    docker_applied: Optional[list[str]] = None,
+    docker_ifaces: list[str] | None = None,
+    docker_applied: list[str] | None = None,
     dry_run: bool,
-) -> bool:
+    pmtu_addresses: dict[str, str | None] | None = None,
+    wg_overhead_detail: dict | None = None,
+    wg_peer_routes: dict | None = None,
+    pmtu_partial: bool = False,
+    pmtu_schedule: dict | None = None,
+    netns: dict | None = None,
+    egress_links: dict | None = None,
+    pmtu_wg_fwmark: int | None = None,
+    pmtu_cache: dict | None = None,
+    stability: dict | None = None,
+    pmtu_history: dict | None = None,
+    tunnels: dict | None = None,
+    pmtu_throughput: dict | None = None,
+) -> dict:
     """
-    Returns True if it emitted output (and caller should return).
+    Build the JSON-serializable result payload (as printed by --print-json).
     """
-    if not mode.print_json:
-        return False
-
     docker_ifaces = list(docker_ifaces or [])
     docker_applied = list(docker_applied or [])
 
@@ -105,6 +113,7 @@ def emit_json(
             if egress_forced_mtu is not None
             else None,
             "applied": bool(egress_applied),
+            "links": dict(egress_links or {}),
         },
         "pmtu": {
             "targets": list(pmtu_targets),
@@ -114,24 +123,48 @@ def emit_json(
             "results": {
                 k: (int(v) if v is not None else None) for k, v in pmtu_results.items()
             },
+            "addresses": dict(pmtu_addresses or {}),
+            "wg_fwmark": pmtu_wg_fwmark,
+            "partial": bool(pmtu_partial),
+            "schedule": dict(pmtu_schedule or {}),
+            "cache": dict(pmtu_cache or {}),
+            "history": dict(pmtu_history or {}),
+            "throughput": dict(pmtu_throughput or {}),
         },
         "wg": {
             "iface": wg_iface,
             "mtu": int(wg_mtu),
             "overhead": int(wg_overhead),
+            "overhead_detail": dict(wg_overhead_detail or {}),
             "min": int(wg_min),
             "set_mtu": int(wg_set_mtu) if wg_set_mtu is not None else None,
             "clamped": bool(wg_clamped),
             "present": bool(wg_present),
             "active": bool(wg_active),
             "applied": bool(wg_applied),
+            "peer_routes": dict(wg_peer_routes or {}),
         },
         "docker": {
             "ifaces": docker_ifaces,
             "applied": docker_applied,
         },
+        "netns": dict(netns or {}),
+        "tunnels": dict(tunnels or {}),
+        "stability": dict(stability or {}),
         "dry_run": bool(dry_run),
     }
 
-    print(json.dumps(payload, sort_keys=True))
+    return payload
+
+
+def emit_json(mode: OutputMode, **fields) -> bool:
+    """
+    Returns True if it emitted output (and caller should return).
+
+    fields are the keyword arguments of build_payload().
+    """
+    if not mode.print_json:
+        return False
+
+    print(json.dumps(build_payload(**fields), sort_keys=True))
     return True
@@ -4,18 +4,22 @@ import shlex
 import shutil
 import subprocess
 from pathlib import Path
-from typing import List
-
 
 _SYSTEMD_UNIT_PATH = Path("/etc/systemd/system/automtu.service")
 _DOCKER_SYSTEMD_UNIT_PATH = Path("/etc/systemd/system/automtu-docker.service")
+_TIMER_SERVICE_PATH = Path("/etc/systemd/system/automtu-revalidate.service")
+_TIMER_UNIT_PATH = Path("/etc/systemd/system/automtu-revalidate.timer")
+
+# Persistence-only options that take a value (stripped from ExecStart).
+_PERSIST_VALUE_ARGS = ("--persist", "--timer-interval", "--timer-random-delay")
 
 
-def _strip_persist_args(argv: List[str]) -> List[str]:
+def _strip_persist_args(argv: list[str]) -> list[str]:
     """
     Remove persistence-only arguments from argv:
-    - --persist systemd|docker
-    - --persist=systemd|docker
+    - --persist systemd|docker|systemd-timer
+    - --persist=systemd|docker|systemd-timer
+    - --timer-interval / --timer-random-delay (both forms)
     - --uninstall
     Keeps all other args as-is.
     """
@@ -23,12 +27,12 @@ def _strip_persist_args(argv: List[str]) -> List[str]:
     i = 0
     while i < len(argv):
         a = argv[i]
-        if a == "--persist":
+        if a in _PERSIST_VALUE_ARGS:
             i += 1
             if i < len(argv) and not argv[i].startswith("-"):
                 i += 1
             continue
-        if a.startswith("--persist="):
+        if a.startswith(tuple(f"{opt}=" for opt in _PERSIST_VALUE_ARGS)):
             i += 1
             continue
         if a == "--uninstall":
@@ -51,14 +55,14 @@ def _resolve_exec(argv0: str) -> str:
     return argv0
 
 
-def _needs_docker_ordering(filtered_argv: List[str]) -> bool:
+def _needs_docker_ordering(filtered_argv: list[str]) -> bool:
     """
     Heuristic: If we apply docker MTU (directly or via --apply-all), order after docker.service.
     """
     return ("--apply-docker-mtu" in filtered_argv) or ("--apply-all" in filtered_argv)
 
 
-def _build_unit(execstart: str, *, docker_ordering: bool) -> str:
+def _build_unit(execstart: str, *, docker_ordering: bool, notify: bool = False) -> str:
     after_lines = ["network-online.target"]
     wants_lines = ["network-online.target"]
 
@@ -69,6 +73,11 @@ def _build_unit(execstart: str, *, docker_ordering: bool) -> str:
     after = " ".join(after_lines)
     wants = " ".join(wants_lines)
 
+    # --fast-start: the unit counts as started once the known-good MTUs are
+    # applied (READY=1), not when probing ends, so units ordered after it
+    # are not held up by the probes.
+    service_type = "notify" if notify else "oneshot"
+
     return f"""\
 [Unit]
 Description=Auto MTU via automtu
@@ -76,7 +85,7 @@ After={after}
 Wants={wants}
 
 [Service]
-Type=oneshot
+Type={service_type}
 ExecStart={execstart}
 
 [Install]
@@ -84,6 +93,50 @@ WantedBy=multi-user.target
 """
 
 
+def _build_timer_service(execstart: str, *, docker_ordering: bool) -> str:
+    after = (
+        "network-online.target docker.service"
+        if docker_ordering
+        else "network-online.target"
+    )
+    return f"""\
+[Unit]
+Description=Revalidate MTU via automtu
+After={after}
+Wants=network-online.target
+
+[Service]
+Type=oneshot
+ExecStart={execstart}
+"""
+
+
+def _build_timer(interval: str, random_delay: str) -> str:
+    # RandomizedDelaySec spreads runs across a fleet (no synchronized full probes).
+    return f"""\
+[Unit]
+Description=Periodic MTU revalidation via automtu
+
+[Timer]
+OnBootSec={interval}
+OnUnitActiveSec={interval}
+RandomizedDelaySec={random_delay}
+
+[Install]
+WantedBy=timers.target
+"""
+
+
+def _with_state_file(args: list[str]) -> list[str]:
+    """
+    Timer runs revalidate against cached results and --fast-start re-applies
+    the last run's values, so both need a state file.
+    """
+    if any(a == "--state-file" or a.startswith("--state-file=") for a in args):
+        return args
+    return [*args, "--state-file"]
+
+
 def _install_unit(unit_path: Path, unit_text: str, *, dry: bool) -> None:
     if dry:
         print(f"[automtu] DRY-RUN: would write systemd unit to {unit_path}")
@@ -115,10 +168,11 @@ def _uninstall_unit(unit_path: Path, *, dry: bool) -> None:
     print(f"[automtu] Uninstalled systemd service: {unit_path.name}")
 
 
-def persist_systemd(argv: List[str], *, dry: bool) -> None:
+def persist_systemd(argv: list[str], *, dry: bool) -> None:
     """
     Install a systemd oneshot service that re-runs automtu with the same arguments.
-    Adds docker ordering automatically if docker MTU is applied.
+    Adds docker ordering automatically if docker MTU is applied; with
+    --fast-start the service is Type=notify instead.
     """
     if not argv:
         raise ValueError("argv must not be empty")
@@ -129,9 +183,14 @@ def persist_systemd(argv: List[str], *, dry: bool) -> None:
 
     exe = _resolve_exec(filtered[0])
     args = [exe, *filtered[1:]]
+    notify = "--fast-start" in filtered
+    if notify:
+        args = _with_state_file(args)
     execstart = shlex.join(args)
 
-    unit = _build_unit(execstart, docker_ordering=_needs_docker_ordering(filtered))
+    unit = _build_unit(
+        execstart, docker_ordering=_needs_docker_ordering(filtered), notify=notify
+    )
     _install_unit(_SYSTEMD_UNIT_PATH, unit, dry=dry)
 
 
@@ -142,7 +201,7 @@ def uninstall_systemd(*, dry: bool) -> None:
     _uninstall_unit(_SYSTEMD_UNIT_PATH, dry=dry)
 
 
-def persist_docker(argv: List[str], *, dry: bool) -> None:
+def persist_docker(argv: list[str], *, dry: bool) -> None:
     """
     Docker-focused persistence backend:
     always orders after docker.service (even if args don't include docker flags),
@@ -157,9 +216,12 @@ def persist_docker(argv: List[str], *, dry: bool) -> None:
 
     exe = _resolve_exec(filtered[0])
     args = [exe, *filtered[1:]]
+    notify = "--fast-start" in filtered
+    if notify:
+        args = _with_state_file(args)
     execstart = shlex.join(args)
 
-    unit = _build_unit(execstart, docker_ordering=True)
+    unit = _build_unit(execstart, docker_ordering=True, notify=notify)
     _install_unit(_DOCKER_SYSTEMD_UNIT_PATH, unit, dry=dry)
 
 
@@ -168,3 +230,70 @@ def uninstall_docker(*, dry: bool) -> None:
     Uninstall the docker-ordered systemd backend.
     """
     _uninstall_unit(_DOCKER_SYSTEMD_UNIT_PATH, dry=dry)
+
+
+def persist_systemd_timer(
+    argv: list[str],
+    *,
+    dry: bool,
+    interval: str = "15min",
+    random_delay: str = "5min",
+) -> None:
+    """
+    Install a oneshot service plus a timer that re-runs automtu periodically.
+    Runs revalidate cached PMTUs (--state-file is added if missing); see
+    --cache-ttl for when a full probe is due.
+    """
+    if not argv:
+        raise ValueError("argv must not be empty")
+
+    filtered = _strip_persist_args(argv[:])
+    if not filtered:
+        raise ValueError("argv filtered to empty; cannot persist")
+
+    exe = _resolve_exec(filtered[0])
+    args = _with_state_file([exe, *filtered[1:]])
+    execstart = shlex.join(args)
+
+    service = _build_timer_service(
+        execstart, docker_ordering=_needs_docker_ordering(filtered)
+    )
+    timer = _build_timer(interval, random_delay)
+    if dry:
+        print(f"[automtu] DRY-RUN: would write systemd unit to {_TIMER_SERVICE_PATH}")
+        print(service.rstrip())
+        print(f"[automtu] DRY-RUN: would write systemd timer to {_TIMER_UNIT_PATH}")
+        print(timer.rstrip())
+        print("[automtu] DRY-RUN: would run: systemctl daemon-reload")
+        print(
+            f"[automtu] DRY-RUN: would run: systemctl enable --now {_TIMER_UNIT_PATH.name}"
+        )
+        return
+
+    _TIMER_SERVICE_PATH.write_text(service)
+    _TIMER_UNIT_PATH.write_text(timer)
+    subprocess.run(["systemctl", "daemon-reload"], check=True)
+    subprocess.run(["systemctl", "enable", "--now", _TIMER_UNIT_PATH.name], check=True)
+    print(f"[automtu] Installed and started systemd timer: {_TIMER_UNIT_PATH.name}")
+
+
+def uninstall_systemd_timer(*, dry: bool) -> None:
+    """
+    Uninstall the timer backend (timer and its service).
+    """
+    if dry:
+        print(
+            f"[automtu] DRY-RUN: would run: systemctl disable --now {_TIMER_UNIT_PATH.name}"
+        )
+        print(
+            f"[automtu] DRY-RUN: would remove: {_TIMER_UNIT_PATH}, {_TIMER_SERVICE_PATH} (if exist)"
+        )
+        print("[automtu] DRY-RUN: would run: systemctl daemon-reload")
+        return
+
+    subprocess.run(["systemctl", "disable", "--now", _TIMER_UNIT_PATH.name], check=True)
+    for path in (_TIMER_UNIT_PATH, _TIMER_SERVICE_PATH):
+        if path.exists():
+            path.unlink()
+    subprocess.run(["systemctl", "daemon-reload"], check=True)
+    print(f"[automtu] Uninstalled systemd timer: {_TIMER_UNIT_PATH.name}")
@@ -1,8 +1,76 @@
 from __future__ import annotations
 
 import ipaddress
+import re
 import subprocess
-from typing import Optional
+import sys
+import time
+from collections.abc import Callable, Generator
+from importlib.metadata import entry_points
+
+from .sched import DeadlineExceeded, capped, expired, remaining
+from .trace import current_step, get_tracer, recorded, set_step
+
+# A search yields payload sizes to probe, receives whether each probe passed
+# and finally returns the largest passing payload (or None).
+Search = Generator[int, bool, int | None]
+
+
+# Built-in probe backends; more can be added with register_backend().
+ENGINES = ("icmp", "udp", "tcp", "tracepath")
+
+# name -> probe(spec, lo_payload, hi_payload, timeout, hint=None, **bind) -> PMTU
+_BACKENDS: dict[str, Callable[..., int | None]] = {}
+
+
+def register_backend(name: str, probe: Callable[..., int | None]) -> None:
+    """
+    Register a probe backend under name, selectable per target ('name:host')
+    or as the default (--pmtu-backend). probe has the signature of
+    probe_pmtu(); backends that test one size at a time can be built with
+    size_backend().
+    """
+    if name in ENGINES or not name.isidentifier():
+        raise ValueError(f"invalid backend name: {name!r}")
+    _BACKENDS[name] = probe
+
+
+def get_backend(name: str) -> Callable[..., int | None]:
+    try:
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown probe backend: {name}") from None
+
+
+def backend_names() -> tuple[str, ...]:
+    return (*ENGINES, *_BACKENDS)
+
+
+def load_backends() -> None:
+    """
+    Register the backends installed as 'automtu.backends' entry points (entry
+    name = backend name, object = probe). Broken plugins are skipped with a
+    warning on stderr.
+    """
+    for ep in entry_points(group="automtu.backends"):
+        try:
+            register_backend(ep.name, ep.load())
+        except (ImportError, AttributeError, ValueError) as e:
+            print(
+                f"[automtu] WARNING: probe backend {ep.name!r} not loaded: {e}",
+                file=sys.stderr,
+            )
+
+
+def split_engine(spec: str, default: str = "icmp") -> tuple[str, str]:
+    """
+    Split an optional backend prefix off a target spec: 'udp:host:port' -> ('udp', 'host:port').
+    Targets without a known prefix (including bare IPv6 addresses) use default.
+    """
+    engine, sep, rest = spec.partition(":")
+    if sep and engine in backend_names():
+        return engine, rest
+    return default, spec
 
 
 def _is_ipv6(target: str) -> bool:
@@ -12,13 +80,77 @@ def _is_ipv6(target: str) -> bool:
         return ":" in target  # best-effort for hostnames
 
 
-def _rc(cmd: list[str]) -> int:
-    return subprocess.run(
-        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-    ).returncode
+def _rc(cmd: list[str], timeout: float | None = None) -> int:
+    try:
+        return subprocess.run(
+            cmd,
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        ).returncode
+    except subprocess.TimeoutExpired:
+        return 1
+
+
+_PING_ADDR_RE = re.compile(r"^PING\s+\S+?\s*\(([^)]+)\)", re.MULTILINE)
+_PING_RTT_RE = re.compile(r"\btime[=<]([\d.]+)\s*ms")
+_PING_MTU_RE = re.compile(r"\bmtu\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def _traced_ping(
+    cmd: list[str], payload: int, target: str, timeout: float | None = None
+) -> bool:
+    """
+    Run one ping and append a trace record: resolved address, RTT and outcome
+    (ok / too-big with the reported next-hop MTU / timeout).
+    """
+    ts = time.time()
+    try:
+        proc = subprocess.run(
+            cmd,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+        out, ok = proc.stdout or "", proc.returncode == 0
+    except subprocess.TimeoutExpired:
+        out, ok = "", False
+
+    addr = _PING_ADDR_RE.search(out)
+    rtt = _PING_RTT_RE.search(out)
+    mtu = _PING_MTU_RE.search(out)
+    if ok:
+        outcome = "ok"
+    elif mtu:
+        outcome = "too-big"
+    else:
+        outcome = "timeout"
 
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.record(
+            target=target,
+            addr=addr.group(1) if addr else None,
+            payload=payload,
+            ts=round(ts, 6),
+            rtt_ms=float(rtt.group(1)) if rtt else None,
+            outcome=outcome,
+            mtu=int(mtu.group(1)) if mtu and not ok else None,
+            step=current_step(),
+        )
+    return ok
 
-def _ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+
+def _ping_ok(
+    payload: int,
+    target: str,
+    timeout_s: float,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> bool:
     cmd = [
         "ping",
         "-M",
@@ -28,33 +160,202 @@ def _ping_ok(payload: int, target: str, timeout_s: float) -> bool:
         "-s",
         str(payload),
         "-W",
-        str(max(1, int(round(timeout_s)))),
+        str(max(1, round(timeout_s))),
     ]
     if _is_ipv6(target):
         cmd.insert(1, "-6")
-    return _rc(cmd + [target]) == 0
+    if iface:
+        cmd[1:1] = ["-I", iface]  # SO_BINDTODEVICE
+    if fwmark:
+        cmd[1:1] = [
+            "-m",
+            str(fwmark),
+        ]  # SO_MARK: follow the policy routing of that mark
+    # under --deadline, kill a ping that would outlive the run
+    kill_after = capped(timeout_s) + 0.05 if remaining() is not None else None
+    if get_tracer() is not None:
+        return _traced_ping(cmd + [target], payload, target, kill_after)
+    return _rc(cmd + [target], kill_after) == 0
 
 
-def probe_pmtu(
-    target: str, lo_payload: int = 1200, hi_payload: int = 1472, timeout: float = 1.0
-) -> Optional[int]:
-    hdr = 48 if _is_ipv6(target) else 28
+def header_size(target: str) -> int:
+    """
+    IP + ICMP header bytes added on top of the probe payload.
+    """
+    return 48 if _is_ipv6(target) else 28
 
-    if not _ping_ok(lo_payload, target, timeout):
-        for p in (1180, 1160, 1140):
-            if _ping_ok(p, target, timeout):
-                lo_payload = p
-                break
-        else:
-            return None
 
-    lo, hi, best = lo_payload, hi_payload, None
+# Common MTUs, largest first: jumbo frames, Ethernet, PPPoE, IP-in-IP/GRE,
+# VXLAN, WireGuard, IPv6 minimum. Galloping stops at the first that passes.
+MTU_PLATEAUS = (9216, 9000, 1500, 1492, 1480, 1476, 1450, 1420, 1400, 1280)
+_STANDARD_MTU = 1500
+
+
+def _bisect(lo: int, hi: int, best: int | None = None) -> Search:
+    set_step("bisect")
     while lo <= hi:
         mid = (lo + hi) // 2
-        if _ping_ok(mid, target, timeout):
+        if (yield mid):
             best = mid
             lo = mid + 1
         else:
             hi = mid - 1
+    return best
+
+
+def payload_search(
+    lo: int, hi: int, hint: int | None = None, *, hdr: int = 28
+) -> Search:
+    """
+    Find the largest passing payload in [lo, hi].
+
+    With a hint (last known good payload), first revalidate it with two probes:
+    hint passes and hint+1 fails. Only if that confirmation fails, fall back to
+    a search narrowed to the side of the hint that is still open.
+
+    When hi exceeds a standard Ethernet frame (hdr: header bytes on top of
+    the payload), first probe hi itself; if that fails, gallop down through
+    the common MTU plateaus and confirm the first one that passes like a
+    hint, so a jumbo path costs one probe and a 1500 path behind a jumbo
+    link three.
+    """
+    if hint is not None and lo <= hint <= hi:
+        set_step("hint")
+        if (yield hint):
+            set_step("hint-confirm")
+            if hint == hi or not (yield hint + 1):
+                return hint
+            return (yield from _bisect(hint + 2, hi, best=hint + 1))
+        hi = hint - 1
+
+    if hi + hdr > _STANDARD_MTU:
+        set_step("ceiling")
+        if (yield hi):
+            return hi
+        for mtu in MTU_PLATEAUS:
+            p = mtu - hdr
+            if not lo < p < hi:
+                continue
+            set_step("gallop")
+            if (yield p):
+                set_step("gallop-confirm")
+                if p + 1 == hi or not (yield p + 1):
+                    return p
+                return (yield from _bisect(p + 2, hi - 1, best=p + 1))
+            hi = p
+        hi -= 1
+
+    set_step("floor")
+    if not (yield lo):
+        set_step("floor-fallback")
+        for p in (1180, 1160, 1140):
+            if (yield p):
+                lo = p
+                break
+        else:
+            return None
+
+    return (yield from _bisect(lo, hi))
 
+
+def run_search(search: Search, ok: Callable[[int], bool]) -> int | None:
+    """
+    Drive a search to completion using ok(payload) as the probe.
+
+    Under a run deadline (see sched), raises DeadlineExceeded with the largest
+    payload that passed so far once time is up; a probe cut short by the
+    deadline does not count as a failure.
+    """
+    best: int | None = None
+    ok = recorded(ok)
+    try:
+        payload = next(search)
+        while True:
+            if expired():
+                raise DeadlineExceeded(best)
+            passed = ok(payload)
+            if passed and (best is None or payload > best):
+                best = payload
+            elif not passed and expired():
+                raise DeadlineExceeded(best)
+            payload = search.send(passed)
+    except StopIteration as stop:
+        return stop.value
+
+
+def probe_pmtu(
+    target: str,
+    lo_payload: int = 1200,
+    hi_payload: int = 1472,
+    timeout: float = 1.0,
+    hint: int | None = None,
+    *,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> int | None:
+    """
+    Probe the Path MTU towards target via DF-ping.
+
+    hint is a previously known PMTU (not payload); if given, it is revalidated
+    with two probes before falling back to a narrowed bisection. iface / fwmark
+    bind the probes to one link or routing policy.
+    """
+    hdr = header_size(target)
+    bind = {k: v for k, v in (("iface", iface), ("fwmark", fwmark)) if v}
+    try:
+        best = run_search(
+            payload_search(
+                lo_payload,
+                hi_payload,
+                hint - hdr if hint is not None else None,
+                hdr=hdr,
+            ),
+            lambda p: _ping_ok(p, target, timeout, **bind),
+        )
+    except DeadlineExceeded as e:
+        raise DeadlineExceeded(e.best + hdr if e.best is not None else None) from None
     return (best + hdr) if best is not None else None
+
+
+def size_backend(
+    make_ok: Callable[..., Callable[[int], bool]],
+    *,
+    header: Callable[[str], int] = header_size,
+) -> Callable[..., int | None]:
+    """
+    Build a backend from a single-size probe: make_ok(target, timeout) returns
+    ok(payload) -> bool. The search (hint revalidation, floor, bisection),
+    header accounting and deadline handling are the same as for ICMP;
+    header(target) gives the bytes added on top of the payload.
+
+    Bound probes pass iface= / fwmark= on to make_ok as keywords; a make_ok
+    that does not take them fails with TypeError instead of silently probing
+    the default route.
+    """
+
+    def probe(
+        target: str,
+        lo_payload: int = 1200,
+        hi_payload: int = 1472,
+        timeout: float = 1.0,
+        hint: int | None = None,
+        **bind: object,
+    ) -> int | None:
+        hdr = header(target)
+        try:
+            best = run_search(
+                payload_search(
+                    lo_payload,
+                    hi_payload,
+                    hint - hdr if hint is not None else None,
+                    hdr=hdr,
+                ),
+                make_ok(target, timeout, **{k: v for k, v in bind.items() if v}),
+            )
+        except DeadlineExceeded as e:
+            raise DeadlineExceeded(
+                e.best + hdr if e.best is not None else None
+            ) from None
+        return (best + hdr) if best is not None else None
+
+    return probe
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .pmtu import header_size, size_backend
+from .sched import capped
+from .trace import SESSION_VERSION
+
+# Replay of a recorded probe session (--record FILE, then --replay FILE): the
+# normal search runs against the recorded outcomes instead of the network.
+#
+# Payloads the recording never sent are answered from its bounds: at or below
+# the largest passing payload they pass, anything larger fails. A replay thus
+# never reports a larger PMTU than the recording proved, whatever search
+# strategy asks the questions.
+#
+# The search bounds (egress and link MTUs) and the hints also come from the
+# recording, and a replay never changes the system or the state, history and
+# facts files: the same session gives the same result on any host.
+
+REPLAY_SPEEDS = ("instant", "original")
+
+
+@dataclass
+class _Target:
+    probes: dict[int, tuple[bool, float]] = field(default_factory=dict)
+    pmtu: int | None = None
+    hint: int | None = None  # hint the recorded run started from
+
+    def header(self, key: str) -> int:
+        passed = [p for p, (ok, _) in self.probes.items() if ok]
+        if self.pmtu is not None and passed:
+            return self.pmtu - max(passed)  # what the recording backend added
+        host = key.partition("%")[0]
+        return 48 if host.endswith("@ipv6") else header_size(host)
+
+    def bound(self, key: str) -> int | None:
+        """
+        Largest payload known to pass (from probes, else from the result).
+        """
+        passed = [p for p, (ok, _) in self.probes.items() if ok]
+        if passed:
+            return max(passed)
+        return self.pmtu - self.header(key) if self.pmtu is not None else None
+
+    def typical(self, ok: bool) -> float:
+        times = [t for (o, t) in self.probes.values() if o == ok]
+        return statistics.median(times) if times else 0.0
+
+
+class Replay:
+    def __init__(
+        self,
+        targets: dict[str, _Target],
+        *,
+        speed: str = "instant",
+        mtus: dict[str, int] | None = None,
+        egress: str | None = None,
+    ) -> None:
+        if speed not in REPLAY_SPEEDS:
+            raise ValueError(f"unknown replay speed: {speed}")
+        self._targets = targets
+        self._mtus = mtus or {}
+        self.speed = speed
+        self.probe = size_backend(self._make_ok, header=self._header)
+        # (iface, MTU) of the recorded egress; None for sessions without it
+        self.egress = (egress, self._mtus[egress]) if egress in self._mtus else None
+
+    def mtu(self, iface: str) -> int | None:
+        """
+        Recorded MTU of an interface the probes left through.
+        """
+        return self._mtus.get(iface)
+
+    def links(self) -> list[str]:
+        """
+        Other egress links the recorded run probed through (--probe-all-egress).
+        """
+        egress = self.egress[0] if self.egress else None
+        return sorted(i for i in self._mtus if i != egress)
+
+    def hints(self) -> dict[str, int]:
+        """
+        The hints the recorded run started from, per probe key.
+        """
+        return {k: t.hint for k, t in self._targets.items() if t.hint is not None}
+
+    def targets(self) -> list[str]:
+        """
+        Recorded target keys, without per-link probes (key%iface).
+        """
+        return [k for k in self._targets if "%" not in k]
+
+    def keys(self, targets: list[str]) -> list[str]:
+        """
+        Probe keys for targets as recorded: host@ipv4 / host@ipv6 if the
+        session probed both families, else the target itself.
+        """
+        keys: list[str] = []
+        for t in targets:
+            split = [k for k in self.targets() if k.rpartition("@")[0] == t]
+            keys.extend([t] if t in self._targets or not split else split)
+        return keys
+
+    def _header(self, key: str) -> int:
+        target = self._targets.get(key)
+        return target.header(key) if target else 28
+
+    def _make_ok(self, key: str, timeout: float) -> Callable[[int], bool]:
+        target = self._targets.get(key)
+
+        def ok(payload: int) -> bool:
+            if target is None:
+                return False
+            if payload in target.probes:
+                passed, elapsed = target.probes[payload]
+            else:
+                bound = target.bound(key)
+                passed = bound is not None and payload <= bound
+                elapsed = target.typical(passed)
+            if self.speed == "original" and elapsed > 0:
+                wait = capped(elapsed)
+                time.sleep(wait)
+                if wait < elapsed:
+                    return False  # cut short by the run deadline
+            return passed
+
+        return ok
+
+
+def load_session(path: Path, *, speed: str = "instant") -> Replay:
+    """
+    Load a session recorded with --record. Sessions appended to the same file
+    are merged; later outcomes win. Raises OSError / ValueError.
+    """
+    targets: dict[str, _Target] = {}
+    mtus: dict[str, int] = {}
+    egress: str | None = None
+    seen_header = False
+    with Path(path).open(encoding="utf-8") as fh:
+        for n, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                kind = rec.get("type")
+                if kind == "session" and rec.get("version") != SESSION_VERSION:
+                    raise ValueError(
+                        f"unsupported session version {rec.get('version')}"
+                    )
+                seen_header = seen_header or kind == "session"
+                if kind == "probe":
+                    target = targets.setdefault(str(rec["target"]), _Target())
+                    target.probes[int(rec["payload"])] = (
+                        bool(rec["ok"]),
+                        float(rec.get("elapsed") or 0.0),
+                    )
+                elif kind == "result":
+                    target = targets.setdefault(str(rec["target"]), _Target())
+                    pmtu, hint = rec.get("pmtu"), rec.get("hint")
+                    target.pmtu = pmtu if isinstance(pmtu, int) else None
+                    target.hint = hint if isinstance(hint, int) else None
+                elif kind == "mtu":
+                    mtus[str(rec["iface"])] = int(rec["mtu"])
+                    if rec.get("egress"):
+                        egress = str(rec["iface"])
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"line {n}: {e!s}") from None
+    if not seen_header:
+        raise ValueError("not a recorded automtu session")
+    return Replay(targets, speed=speed, mtus=mtus, egress=egress)
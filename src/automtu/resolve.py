@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import ipaddress
+import socket
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+# Hostname targets are resolved once per run (concurrently, A and AAAA in
+# parallel) instead of once per ping. Probes then go to the address, so the
+# header size follows the real address family.
+
+FAMILIES = {
+    "auto": socket.AF_UNSPEC,
+    "4": socket.AF_INET,
+    "6": socket.AF_INET6,
+}
+
+
+def is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _lookup(host: str, family: str) -> list[str]:
+    try:
+        infos = socket.getaddrinfo(
+            host, None, FAMILIES[family], socket.SOCK_DGRAM, socket.IPPROTO_UDP
+        )
+    except OSError:
+        return []
+    return list(dict.fromkeys(str(info[4][0]) for info in infos))
+
+
+class DnsCache:
+    """
+    Resolved addresses per (host, family) with a fixed TTL. Serializable into
+    the state file so answers can be reused across runs.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = float(ttl)
+        self._entries: dict[tuple[str, str], tuple[float, list[str]]] = {}
+
+    def get(
+        self, host: str, family: str, *, now: float | None = None
+    ) -> list[str] | None:
+        entry = self._entries.get((host, family))
+        if entry is None:
+            return None
+        ts, addrs = entry
+        if (time.time() if now is None else now) - ts > self.ttl:
+            return None
+        return addrs
+
+    def put(
+        self, host: str, family: str, addrs: list[str], *, now: float | None = None
+    ) -> None:
+        self._entries[(host, family)] = (time.time() if now is None else now, addrs)
+
+    def to_state(self) -> dict:
+        return {
+            f"{family}|{host}": {"ts": ts, "addrs": addrs}
+            for (host, family), (ts, addrs) in self._entries.items()
+            if addrs
+        }
+
+    def load_state(self, data: dict) -> None:
+        for key, entry in (data or {}).items():
+            family, sep, host = key.partition("|")
+            if not sep or family not in FAMILIES or not isinstance(entry, dict):
+                continue
+            addrs = [a for a in entry.get("addrs") or [] if isinstance(a, str)]
+            ts = entry.get("ts")
+            if addrs and isinstance(ts, (int, float)):
+                self._entries.setdefault((host, family), (float(ts), addrs))
+
+
+def resolve_hosts(
+    hosts: Iterable[str],
+    families: Iterable[str],
+    *,
+    cache: DnsCache,
+    workers: int = 8,
+) -> dict[tuple[str, str], list[str]]:
+    """
+    Resolve every (host, family) pair that is not cached, concurrently.
+
+    Returns addresses per (host, family); empty lists mean resolution failed
+    (failures are not cached).
+    """
+    out: dict[tuple[str, str], list[str]] = {}
+    todo: list[tuple[str, str]] = []
+    for host in dict.fromkeys(hosts):
+        for family in families:
+            cached = cache.get(host, family)
+            if cached is not None:
+                out[(host, family)] = cached
+            else:
+                todo.append((host, family))
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as pool:
+            for key, addrs in zip(
+                todo, pool.map(lambda k: _lookup(*k), todo), strict=True
+            ):
+                out[key] = addrs
+                if addrs:
+                    cache.put(key[0], key[1], addrs)
+    return out
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import re
+import subprocess
+from collections.abc import Callable, Collection, Mapping
+
+from .wg import WgPeer, wg_overhead_for, wg_peers
+
+# Per-peer route MTUs on a WireGuard interface: every peer's allowed-ips get a
+# route with "mtu lock <peer MTU>", so one bad peer does not force a low MTU
+# on the whole interface. Routes are tagged with their own protocol number so
+# re-runs can diff against (and clean up) exactly the routes automtu owns.
+# Installing one replaces the plain route wg-quick added for that allowed-ip,
+# so a prefix that is still a peer's allowed-ip is handed back as a plain
+# route (proto boot, no MTU) instead of being deleted.
+
+ROUTE_PROTO = "233"
+
+_MTU_RE = re.compile(r"\bmtu\s+(?:lock\s+)?(\d+)")
+
+
+def _run(cmd: list[str]) -> str:
+    return subprocess.run(
+        cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    ).stdout.strip()
+
+
+def _is_default(prefix: str) -> bool:
+    return prefix.split("/")[-1] == "0"
+
+
+def current_routes(wg_if: str) -> dict[str, int]:
+    """
+    Routes previously installed by automtu on wg_if: prefix -> locked MTU.
+    """
+    routes: dict[str, int] = {}
+    for fam in ("-4", "-6"):
+        out = _run(["ip", fam, "route", "show", "dev", wg_if, "proto", ROUTE_PROTO])
+        for line in out.splitlines():
+            parts = line.split()
+            m = _MTU_RE.search(line)
+            if parts and m:
+                prefix = parts[0]
+                if "/" not in prefix:
+                    prefix += "/128" if ":" in prefix else "/32"
+                routes[prefix] = int(m.group(1))
+    return routes
+
+
+def plan_peer_routes(
+    peers: list[WgPeer],
+    peer_mtus: dict[str, int | None],
+    fallback_mtu: int,
+) -> tuple[dict[str, int], int, dict]:
+    """
+    Compute the desired routes (prefix -> MTU) and the interface MTU.
+
+    peer_mtus maps peer public keys to their WG MTU (None if unknown). Peers
+    whose MTU is unknown, or whose allowed-ips contain a default route, stay
+    on the interface MTU; that MTU is the lowest of those peers (unknown ones
+    count as fallback_mtu), capped at the best routed peer.
+
+    Returns (routes, iface_mtu, per-peer detail).
+    """
+    routes: dict[str, int] = {}
+    detail: dict[str, dict] = {}
+    routed: list[int] = []
+    on_iface: list[int] = []
+
+    for peer in peers:
+        mtu = peer_mtus.get(peer.public_key)
+        routable = [p for p in peer.allowed_ips if not _is_default(p)]
+        covered = mtu is not None and len(routable) == len(peer.allowed_ips)
+        if covered:
+            for prefix in routable:
+                # overlapping prefixes from several peers: keep the safer MTU
+                routes[prefix] = min(mtu, routes.get(prefix, mtu))
+            routed.append(mtu)
+        else:
+            on_iface.append(mtu if mtu is not None else fallback_mtu)
+        detail[peer.public_key] = {
+            "endpoint": peer.endpoint,
+            "mtu": mtu,
+            "prefixes": list(peer.allowed_ips),
+            "routed": covered,
+        }
+
+    if on_iface:
+        iface_mtu = min(on_iface)
+        if routed:
+            iface_mtu = min(iface_mtu, max(routed))
+    elif routed:
+        iface_mtu = max(routed)
+    else:
+        iface_mtu = fallback_mtu
+    return routes, iface_mtu, detail
+
+
+def sync_routes(
+    wg_if: str,
+    desired: dict[str, int],
+    current: dict[str, int],
+    dry: bool,
+    *,
+    allowed: Collection[str] = (),
+    log: Callable[[str], None] = print,
+) -> tuple[list[str], list[str]]:
+    """
+    Bring automtu's routes on wg_if to the desired state in one `ip -batch` call.
+    Unchanged routes are left alone. Removed prefixes that are still in allowed
+    (the peers' allowed-ips) get their plain route back; the others are
+    deleted. Returns (installed/changed, removed) prefixes.
+    """
+    changed = [p for p, mtu in desired.items() if current.get(p) != mtu]
+    removed = [p for p in current if p not in desired]
+
+    cmds = [
+        f"route replace {p} dev {wg_if} proto {ROUTE_PROTO} mtu lock {desired[p]}"
+        for p in changed
+    ] + [
+        f"route replace {p} dev {wg_if} proto boot"
+        if p in allowed
+        else f"route del {p} dev {wg_if} proto {ROUTE_PROTO}"
+        for p in removed
+    ]
+
+    if not cmds:
+        return changed, removed
+    if dry:
+        for c in cmds:
+            log(f"[automtu] DRY-RUN: ip {c}")
+        return changed, removed
+
+    subprocess.run(
+        ["ip", "-batch", "-"], input="\n".join(cmds) + "\n", text=True, check=True
+    )
+    return changed, removed
+
+
+def sync_peer_routes(
+    wg_if: str,
+    probe_results: Mapping[str, int | None],
+    addresses: Mapping[str, str | None],
+    *,
+    base_mtu: int,
+    wg_mtu: int,
+    wg_min: int,
+    wg_overhead: int | str,
+    dry: bool,
+    log: Callable[[str], None] = print,
+) -> tuple[int, dict]:
+    """
+    Give every peer of wg_if whose endpoint was probed a route MTU for its
+    allowed-ips and return (interface MTU, JSON detail).
+    """
+    peers = wg_peers(wg_if)
+    peer_mtus: dict[str, int | None] = {}
+    for peer in peers:
+        pmtu = probe_results.get(peer.endpoint) if peer.endpoint else None
+        if pmtu is None:
+            peer_mtus[peer.public_key] = None
+            continue
+        if wg_overhead == "auto":
+            addr = addresses.get(peer.endpoint) or peer.endpoint
+            overhead, _ = wg_overhead_for(["ipv6" if ":" in addr else "ipv4"])
+        else:
+            overhead = int(wg_overhead)
+        peer_mtus[peer.public_key] = max(
+            int(wg_min), min(base_mtu, int(pmtu)) - overhead
+        )
+
+    routes, iface_mtu, detail = plan_peer_routes(peers, peer_mtus, wg_mtu)
+    changed, removed = sync_routes(
+        wg_if,
+        routes,
+        current_routes(wg_if),
+        dry,
+        allowed={p for peer in peers for p in peer.allowed_ips},
+        log=log,
+    )
+    log(
+        f"[automtu] Per-peer routes on {wg_if}: {len(routes)} "
+        f"({len(changed)} changed, {len(removed)} removed); interface MTU {iface_mtu}"
+    )
+    return iface_mtu, {
+        "peers": detail,
+        "routes": routes,
+        "changed": changed,
+        "removed": removed,
+    }
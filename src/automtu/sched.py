@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+# Deadline-bounded probe scheduling (--deadline).
+#
+# Targets are probed in parallel in order of expected information per probe:
+# hinted targets (two-probe revalidation) first, then the rest. Engines read
+# the deadline from a context variable: every probe timeout is capped at the
+# remaining time and a search that runs out of time raises DeadlineExceeded
+# carrying the best bound it has proven so far.
+
+_DEADLINE: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "automtu_deadline", default=None
+)
+# Set when the run stops early (e.g. quorum reached): searches end at their next step.
+_CANCEL: contextvars.ContextVar[threading.Event | None] = contextvars.ContextVar(
+    "automtu_cancel", default=None
+)
+
+# Extra time granted to in-flight probes after the deadline before they are abandoned.
+_GRACE_S = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """
+    The run deadline hit during a search; best is the largest value proven so far.
+    """
+
+    def __init__(self, best: int | None) -> None:
+        super().__init__("deadline exceeded")
+        self.best = best
+
+
+def remaining() -> float | None:
+    """
+    Seconds left until the deadline of the current context (None: no deadline).
+    """
+    cancel = _CANCEL.get()
+    if cancel is not None and cancel.is_set():
+        return 0.0
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def capped(timeout: float) -> float:
+    """
+    Cap a probe timeout at the remaining time (never below 1 ms).
+    """
+    rem = remaining()
+    if rem is None:
+        return timeout
+    return max(0.001, min(timeout, rem))
+
+
+def expired() -> bool:
+    rem = remaining()
+    return rem is not None and rem <= 0
+
+
+@dataclass
+class Schedule:
+    results: dict[str, int | None] = field(default_factory=dict)
+    partial: list[str] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+    short_circuited: list[str] = field(default_factory=list)
+
+
+def order_by_information(keys: list[str], hints: Mapping[str, int]) -> list[str]:
+    """
+    Cheap, high-confidence probes first: hinted targets revalidate in two
+    probes, unhinted ones need a full search. Input order is kept otherwise.
+    """
+    return sorted(keys, key=lambda k: 0 if k in hints else 1)
+
+
+def median_quorum(n: int) -> Callable[[str, int | None, Schedule], bool]:
+    """
+    Early-exit check (on_result) for the median policy: if more than n/2 of
+    all n targets report the same PMTU, the median is that value whatever
+    the rest return (failures only shrink the set the median is taken over).
+    """
+
+    def reached(key: str, pmtu: int | None, sched: Schedule) -> bool:
+        counts = Counter(v for v in sched.results.values() if v)
+        return bool(counts) and counts.most_common(1)[0][1] * 2 > n
+
+    return reached
+
+
+def run_scheduled(
+    keys: list[str],
+    probe: Callable[[str, int | None], int | None],
+    *,
+    hints: Mapping[str, int],
+    deadline_s: float | None,
+    workers: int = 8,
+    started: float | None = None,
+    on_result: Callable[[str, int | None, Schedule], bool] | None = None,
+) -> Schedule:
+    """
+    Probe keys in parallel until done or until deadline_s (seconds since
+    started) passes. Probes that run out of time report their best-known
+    bound and are listed as partial; probes that never ran or did not return
+    in time are listed as cancelled.
+
+    on_result(key, pmtu, schedule) is called as results arrive; returning
+    True stops the run early: queued probes are dropped, running searches end
+    at their next step, and the unfinished keys are listed as short-circuited.
+    """
+    start = time.monotonic() if started is None else started
+    deadline = None if deadline_s is None else start + float(deadline_s)
+    cancel = threading.Event()
+    sched = Schedule()
+
+    def task(key: str) -> int | None:
+        _DEADLINE.set(deadline)
+        _CANCEL.set(cancel)
+        return probe(key, hints.get(key))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, int(workers)))
+    pending: dict[Future, str] = {}
+    stop = False
+    try:
+        for key in order_by_information(keys, hints):
+            ctx = contextvars.copy_context()
+            pending[pool.submit(ctx.run, task, key)] = key
+
+        while pending and not stop:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0.0, deadline + _GRACE_S - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # grace period over
+            for fut in done:
+                key = pending.pop(fut)
+                if fut.cancelled():
+                    continue
+                try:
+                    pmtu = fut.result()
+                except DeadlineExceeded as e:
+                    pmtu = e.best
+                    sched.partial.append(key)
+                sched.results[key] = pmtu
+                if on_result is not None and on_result(key, pmtu, sched):
+                    stop = True
+    finally:
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    for key in pending.values():
+        sched.results[key] = None
+        (sched.short_circuited if stop else sched.cancelled).append(key)
+    # report in input order
+    sched.results = {k: sched.results[k] for k in keys if k in sched.results}
+    return sched
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import fields
+from typing import Generic, TypeVar
+
+from .core import AutoMTUError, Config
+
+# `automtu serve`: answer local queries for the current MTUs from memory.
+#
+# Protocol (one request per connection, line based):
+#   GET effective|wg|egress|json      -> cached answer (refreshed after the TTL)
+#   REFRESH effective|wg|egress|json  -> force a new run first
+# Either may end with the client's config digest; the server then answers
+# only if its own config matches, so a thin client never gets results for
+# other targets, overheads or backends than it asked for.
+# Replies are one line: the number, the --print-json document, or "ERR <msg>".
+
+DEFAULT_SOCKET_PATH = "/run/automtu.sock"
+FIELDS = ("effective", "wg", "egress", "json")
+
+# What a failed compute() run raises; reported instead of ending the server.
+_RUN_ERRORS = (AutoMTUError, OSError, ValueError, subprocess.SubprocessError)
+
+# Config fields that decide what a run changes, not what it measures.
+_NOT_DIGESTED = frozenset(
+    {
+        "apply_egress_mtu",
+        "apply_wg_mtu",
+        "apply_docker_mtu",
+        "apply_tunnel_mtu",
+        "apply_netns_mtu",
+        "wg_peer_routes",
+        "facts_file",
+        "dry_run",
+        "pmtu_workers",
+        "netns_workers",
+    }
+)
+
+T = TypeVar("T")
+
+
+def config_digest(cfg: Config) -> str:
+    """
+    Short digest of the Config fields that affect the reported MTUs.
+    """
+    probe = {f.name: getattr(cfg, f.name) for f in fields(cfg)}
+    for name in _NOT_DIGESTED:
+        probe.pop(name)
+    doc = json.dumps(probe, sort_keys=True, default=str)
+    return hashlib.blake2b(doc.encode(), digest_size=8).hexdigest()
+
+
+class SingleFlight(Generic[T]):
+    """
+    A value computed by fn and cached for ttl seconds. Concurrent callers that
+    need a new value share one in-flight computation instead of each running fn.
+    """
+
+    def __init__(self, fn: Callable[[], T], ttl: float) -> None:
+        self._fn = fn
+        self._ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._value: T | None = None
+        self._ts = 0.0
+        self._inflight: Future | None = None
+
+    def get(self, *, refresh: bool = False) -> T:
+        with self._lock:
+            fresh = self._value is not None and time.monotonic() - self._ts < self._ttl
+            if fresh and not refresh:
+                return self._value  # type: ignore[return-value]
+            leader = self._inflight is None
+            if leader:
+                self._inflight = Future()
+            fut = self._inflight
+
+        if leader:
+            try:
+                value = self._fn()
+            except BaseException as e:  # incl. SystemExit: never strand followers
+                fut.set_exception(e)
+                raise
+            else:
+                with self._lock:
+                    self._value, self._ts = value, time.monotonic()
+                fut.set_result(value)
+            finally:
+                with self._lock:
+                    self._inflight = None
+        return fut.result()
+
+
+def answer(result, field: str) -> str:
+    """
+    Render one field of a core.Result the way --print-mtu / --print-json do.
+    """
+    if field == "effective":
+        return str(int(result.effective_mtu))
+    if field == "wg":
+        return str(int(result.wg_mtu))
+    if field == "egress":
+        return str(int(result.base_mtu))
+    return json.dumps(result.to_dict(), sort_keys=True)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(256).decode("ascii", "replace").split()
+        if (
+            len(line) not in (2, 3)
+            or line[0] not in ("GET", "REFRESH")
+            or line[1] not in FIELDS
+        ):
+            self._reply(f"ERR usage: GET|REFRESH {'|'.join(FIELDS)} [DIGEST]")
+            return
+        if len(line) == 3 and line[2] != self.server.digest:  # type: ignore[attr-defined]
+            self._reply("ERR options differ from the server's")
+            return
+        try:
+            result = self.server.results.get(refresh=line[0] == "REFRESH")  # type: ignore[attr-defined]
+        except _RUN_ERRORS as e:  # reported to the client, the server keeps running
+            self._reply(f"ERR {e}")
+            return
+        self._reply(answer(result, line[1]))
+
+    def _reply(self, text: str) -> None:
+        self.wfile.write(text.encode() + b"\n")
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self, path: str, results: SingleFlight, digest: str | None = None
+    ) -> None:
+        _remove_stale(path)
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+        self.results = results
+        self.digest = digest  # config_digest() of the config the server runs
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+        except OSError:
+            pass
+
+
+def _remove_stale(path: str) -> None:
+    """
+    Remove a socket file left behind by a dead server; refuse to steal a live
+    one or to remove anything that is not a socket.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    raise OSError(f"{path} is in use by a running server")
+
+
+def query(
+    path: str,
+    field: str,
+    *,
+    refresh: bool = False,
+    timeout: float = 30.0,
+    digest: str | None = None,
+) -> str:
+    """
+    Ask a running `automtu serve` for a field (raises OSError if none is
+    running, or if digest is given and the server runs another config).
+    """
+    request = f"{'REFRESH' if refresh else 'GET'} {field}"
+    if digest:
+        request += f" {digest}"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall(f"{request}\n".encode())
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    reply = data.decode().strip()
+    if not reply or reply.startswith("ERR"):
+        raise OSError(reply[4:] or "empty reply from server")
+    return reply
+
+
+def run_serve(args) -> int:
+    from .core import check_root, compute, config_from_args, expand_apply_all
+    from .output import Logger
+
+    expand_apply_all(args)
+    try:
+        cfg = config_from_args(args)
+    except ValueError as e:
+        print(f"[automtu][ERROR] {e}", file=sys.stderr)
+        return 4
+    check_root(args)
+
+    log = Logger(True).log
+    results = SingleFlight(lambda: compute(cfg, log=log), args.serve_ttl)
+    path = args.socket or DEFAULT_SOCKET_PATH
+    try:
+        server = Server(path, results, config_digest(cfg))
+    except OSError as e:
+        print(f"[automtu][ERROR] Cannot listen on {path}: {e}", file=sys.stderr)
+        return 2
+
+    # warm the cache; early queries join this run instead of starting their own
+    threading.Thread(target=_warm, args=(results,), daemon=True).start()
+    print(f"[automtu] Serving on {path} (ttl {args.serve_ttl:g}s)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def _warm(results: SingleFlight) -> None:
+    try:
+        results.get()
+    except _RUN_ERRORS as e:
+        print(f"[automtu][WARN] Initial run failed: {e}", file=sys.stderr)
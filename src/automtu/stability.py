@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+# Hysteresis for live MTU changes. Every MTU change can reset links and flush
+# the kernel's PMTU cache, so a single noisy measurement should not move a
+# production interface. Decreases are applied at once (too large an MTU
+# blackholes traffic); increases must be measured in `confirm` consecutive
+# runs first. Increases within `threshold` bytes are held as likely noise,
+# but they count towards the confirmation like any other increase.
+#
+# The gate state lives in the state file under "stability".
+
+
+def gate(
+    measured: int,
+    entry: dict | None,
+    *,
+    confirm: int,
+    threshold: int = 0,
+) -> tuple[dict, dict]:
+    """
+    Decide which MTU to use given a fresh measurement and the previous gate
+    state (entry: {"applied", "candidate", "count"} or None).
+
+    Returns (decision, new entry). decision["decision"] is one of:
+    apply (first value, decrease or confirmed increase), unchanged, hold
+    (increase within threshold, awaiting confirmation) or pending (larger
+    increase awaiting confirmation).
+    """
+    entry = entry or {}
+    previous = entry.get("applied")
+    previous = previous if isinstance(previous, int) else None
+    candidate: int | None = None
+    count = 0
+
+    if previous is None:
+        decision, value = "apply", measured
+    elif measured == previous:
+        decision, value = "unchanged", previous
+    elif measured < previous:
+        decision, value = "apply", measured
+    else:
+        # increase: count consecutive confirmations, keep the lowest candidate
+        prev_candidate = entry.get("candidate")
+        count = int(entry.get("count") or 0) + 1
+        candidate = (
+            min(measured, prev_candidate)
+            if isinstance(prev_candidate, int) and prev_candidate > previous
+            else measured
+        )
+        if count >= confirm:
+            decision, value = "apply", candidate
+            candidate, count = None, 0
+        else:
+            noise = measured - previous <= threshold
+            decision, value = "hold" if noise else "pending", previous
+
+    new_entry = {"applied": value, "candidate": candidate, "count": count}
+    return {
+        "decision": decision,
+        "measured": measured,
+        "previous": previous,
+        "value": value,
+        "candidate": candidate,
+        "count": count,
+        "confirm": confirm,
+        "threshold": threshold,
+    }, new_entry
+
+
+def stabilize(
+    measured: int,
+    entry: dict | None,
+    *,
+    confirm: int,
+    threshold: int,
+    cap: int,
+    log: Callable[[str], None],
+) -> tuple[int, dict, dict]:
+    """
+    gate() a run's effective MTU and log the decision. Returns (the MTU to
+    use, at most cap; the decision; the new entry).
+    """
+    decision, new_entry = gate(measured, entry, confirm=confirm, threshold=threshold)
+    mtu = min(cap, decision["value"])
+    log(
+        f"[automtu] Stability gate: {decision['decision']} "
+        f"(measured {measured}, using {mtu}"
+        + (
+            f", {decision['count']}/{confirm} confirmations)"
+            if decision["decision"] == "pending"
+            else ")"
+        )
+    )
+    return mtu, decision, new_entry
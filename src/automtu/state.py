@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+_DEFAULT_STATE_PATH = Path("/var/lib/automtu/state.json")
+_STATE_VERSION = 1
+
+
+def load_state(path: Path) -> dict:
+    """
+    Load the automtu state file. Missing or unreadable files yield an empty state,
+    so a broken cache never prevents a (full) probe run.
+    """
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {"version": _STATE_VERSION}
+    if not isinstance(data, dict) or data.get("version") != _STATE_VERSION:
+        return {"version": _STATE_VERSION}
+    return data
+
+
+def save_state(path: Path, state: dict) -> None:
+    """
+    Atomically write the state file (write temp file, then rename).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    state = {**state, "version": _STATE_VERSION}
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(state, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _full_ts(entry: dict) -> float | None:
+    ts = entry.get("full_ts", entry.get("ts"))
+    return float(ts) if isinstance(ts, (int, float)) else None
+
+
+def known_pmtus(
+    state: dict, *, max_age: float | None = None, now: float | None = None
+) -> dict[str, int]:
+    """
+    Return the last known PMTU per target from a loaded state.
+
+    With max_age, entries whose last full probe is older than max_age seconds
+    are left out, so those targets get a full probe instead of a revalidation.
+    """
+    ts = time.time() if now is None else now
+    out: dict[str, int] = {}
+    for target, entry in (state.get("targets") or {}).items():
+        pmtu = entry.get("pmtu") if isinstance(entry, dict) else None
+        if not isinstance(pmtu, int):
+            continue
+        if max_age is not None:
+            full = _full_ts(entry)
+            if full is None or ts - full > max_age:
+                continue
+        out[target] = pmtu
+    return out
+
+
+def record_pmtus(
+    state: dict,
+    results: dict[str, int | None],
+    *,
+    now: float | None = None,
+    revalidated: Iterable[str] = (),
+) -> dict:
+    """
+    Merge fresh probe results into state. Failed probes keep the previous value.
+
+    Targets in revalidated were only re-confirmed from a hint: they keep the
+    time of their last full probe (full_ts), which is what the cache TTL ages.
+    """
+    ts = time.time() if now is None else now
+    revalidated = set(revalidated)
+    targets = dict(state.get("targets") or {})
+    for target, pmtu in results.items():
+        if pmtu is None:
+            continue
+        prev = targets.get(target)
+        full = ts
+        if target in revalidated and isinstance(prev, dict):
+            full = _full_ts(prev) or ts
+        targets[target] = {"pmtu": int(pmtu), "ts": ts, "full_ts": full}
+    return {**state, "targets": targets}
+
+
+def warm_start(
+    state: dict,
+    path: dict,
+    *,
+    max_age: float | None = None,
+    log: Callable[[str], None] = print,
+) -> tuple[dict[str, int], list[str], bool]:
+    """
+    Cached PMTUs that may be revalidated with two probes instead of a full
+    probe: not older than max_age, and measured on the same egress path
+    (path: egress iface and base MTU). Returns (cached, expired targets,
+    path changed).
+    """
+    cached = known_pmtus(state, max_age=max_age)
+    expired = sorted(set(known_pmtus(state)) - set(cached))
+    if state.get("path") and state.get("path") != path:
+        log(
+            f"[automtu] Egress path changed since last run ({state['path']}); full probe."
+        )
+        return {}, [], True
+    if expired:
+        log(f"[automtu] Cache expired for: {', '.join(expired)}; full probe.")
+    return cached, expired, False
+
+
+def save_probe_state(
+    path: Path,
+    state: dict,
+    results: dict[str, int | None],
+    *,
+    revalidated: Iterable[str],
+    dns: dict,
+    egress_path: dict,
+    stability: dict | None = None,
+) -> None:
+    """
+    Save a run's probe results into the loaded state, with the DNS cache, the
+    egress path they were measured on and the stability gate entry of the
+    effective MTU (None: keep the previous one).
+    """
+    save_state(
+        path,
+        {
+            **record_pmtus(state, results, revalidated=revalidated),
+            "dns": dns,
+            "path": egress_path,
+            "stability": {"effective": stability}
+            if stability is not None
+            else state.get("stability", {}),
+        },
+    )
+
+
+def save_known_good(path: Path, mtus: dict[str, int], applied: dict[str, int]) -> None:
+    """
+    Record the MTUs of a completed run: --fast-start re-applies them at the
+    next boot and `automtu hotplug` gives them to interfaces that appear later.
+    """
+    saved = {**load_state(path), "mtus": mtus}
+    if applied:
+        saved["applied"] = applied
+    save_state(path, saved)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import select
+import socket
+import struct
+
+from .sched import capped, expired
+from .udp import bind_route, split_hostport
+
+# TCP-based PMTU estimation for targets that only expose a TCP port.
+#
+# One connection is opened with DF forced on (IP_PMTUDISC_DO). Full-sized
+# writes are pushed through it; routers that cannot forward them answer with
+# "fragmentation needed", which lowers the kernel's per-connection path MTU.
+# That value (IP_MTU), bounded by the negotiated send MSS plus headers (MSS
+# clamping middleboxes, peers with a smaller MTU), is the estimate. The
+# same connection is reused for every size step.
+
+DEFAULT_TCP_PORT = 443
+
+_IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+_IP_PMTUDISC_DO = getattr(socket, "IP_PMTUDISC_DO", 2)
+_IP_MTU = getattr(socket, "IP_MTU", 14)
+_IPV6_MTU_DISCOVER = getattr(socket, "IPV6_MTU_DISCOVER", 23)
+_IPV6_PMTUDISC_DO = getattr(socket, "IPV6_PMTUDISC_DO", 2)
+_IPV6_MTU = getattr(socket, "IPV6_MTU", 24)
+
+_TCP_INFO = getattr(socket, "TCP_INFO", 11)
+_TCPI_OPT_TIMESTAMPS = 1
+_TCPOLEN_TSTAMP = 12  # timestamp option, padded
+
+_MAX_STEPS = 4
+
+
+def _path_mtu(sock: socket.socket, family: int) -> int | None:
+    try:
+        if family == socket.AF_INET6:
+            return sock.getsockopt(socket.IPPROTO_IPV6, _IPV6_MTU)
+        return sock.getsockopt(socket.IPPROTO_IP, _IP_MTU)
+    except OSError:
+        return None
+
+
+def _mss_mtu(sock: socket.socket, family: int) -> int | None:
+    hdr = 60 if family == socket.AF_INET6 else 40
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, _TCP_INFO, 104)
+        options, mss = info[5], struct.unpack_from("=I", info, 16)[0]  # tcpi_snd_mss
+        # the send MSS excludes the timestamp option; the IP packet does not
+        return mss + (_TCPOLEN_TSTAMP if options & _TCPI_OPT_TIMESTAMPS else 0) + hdr
+    except (OSError, struct.error, IndexError):
+        pass
+    try:
+        mss = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_MAXSEG)
+    except OSError:
+        return None
+    if mss <= 0:
+        return None
+    return mss + hdr
+
+
+def _estimate(sock: socket.socket, family: int, cap: int) -> int:
+    # IP_MTU is the route MTU until ICMP lowers it; an MSS clamp on the path
+    # (or a peer that advertises less) only shows in the negotiated MSS.
+    known = [
+        m for m in (_path_mtu(sock, family), _mss_mtu(sock, family)) if m and m > 0
+    ]
+    return min([*known, cap])
+
+
+def _drain(sock: socket.socket, timeout: float) -> bool:
+    """
+    Wait up to timeout for ICMP feedback (or peer data); return False if the peer closed.
+    """
+    readable, _, _ = select.select([sock], [], [], timeout)
+    if not readable:
+        return True
+    try:
+        return bool(sock.recv(65535))
+    except OSError:
+        return False
+
+
+def probe_pmtu_tcp(
+    target: str,
+    lo_payload: int = 1200,
+    hi_payload: int = 1472,
+    timeout: float = 1.0,
+    hint: int | None = None,
+    *,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> int | None:
+    """
+    Estimate the Path MTU towards a TCP endpoint (host[:port], default port 443).
+
+    Bounds use ICMP payload units like the other engines, so the result is
+    capped at hi_payload plus the IP/ICMP header size. hint is accepted for
+    interface compatibility; TCP estimation needs no bisection.
+    """
+    host, port = split_hostport(target, DEFAULT_TCP_PORT)
+    try:
+        info = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    except OSError:
+        return None
+    family, addr = info[0], info[4]
+
+    v6 = family == socket.AF_INET6
+    cap = hi_payload + (48 if v6 else 28)
+    ip_tcp_hdr = 60 if v6 else 40
+
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        if v6:
+            sock.setsockopt(socket.IPPROTO_IPV6, _IPV6_MTU_DISCOVER, _IPV6_PMTUDISC_DO)
+        else:
+            sock.setsockopt(socket.IPPROTO_IP, _IP_MTU_DISCOVER, _IP_PMTUDISC_DO)
+        try:
+            bind_route(sock, iface, fwmark)
+        except OSError:
+            return None  # SO_MARK / SO_BINDTODEVICE need CAP_NET_ADMIN / CAP_NET_RAW
+        sock.settimeout(capped(timeout))
+        try:
+            sock.connect(addr)
+        except OSError:
+            return None
+
+        estimate = _estimate(sock, family, cap)
+        for _ in range(_MAX_STEPS):
+            if expired():
+                break  # keep the current estimate
+            try:
+                sock.sendall(b"\0" * max(1, estimate - ip_tcp_hdr))
+            except OSError:
+                break
+            alive = _drain(sock, capped(timeout))
+            new = _estimate(sock, family, cap)
+            if new >= estimate or not alive:
+                estimate = min(estimate, new)
+                break
+            estimate = new
+
+    return estimate
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Mapping
+
+from .pmtu import split_engine
+from .udp import measure_goodput
+
+# Throughput validation (--throughput-validate): the largest MTU that passes a
+# DF probe is not always the fastest (middleboxes that slow down near their
+# limit, offload quirks). Short bulk transfers to an `automtu responder` at the
+# probed MTU and a few smaller ones decide, within a fixed time budget.
+
+THROUGHPUT_OFFSETS = (0, 20, 40, 80)
+
+# A smaller MTU must be clearly faster to win; measurement noise should not
+# cost the larger MTU.
+_MARGIN = 0.10
+
+_MIN_MTU = 1280
+
+
+def validate_throughput(
+    target: str,
+    mtu: int,
+    *,
+    budget: float = 2.0,
+    offsets: tuple[int, ...] = THROUGHPUT_OFFSETS,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> dict:
+    """
+    Measure goodput towards target at mtu and mtu - offset for each offset,
+    sharing budget seconds between them (candidates that do not fit in the
+    budget are skipped). Returns the measurements and the chosen MTU: the
+    probed one unless a smaller one is more than 10% faster.
+    """
+    candidates = [mtu - o for o in offsets if mtu - o >= _MIN_MTU]
+    end = time.monotonic() + budget
+    slot = budget / max(1, len(candidates))
+    measured: list[dict] = []
+    skipped: list[int] = []
+
+    for candidate in candidates:
+        left = min(slot, end - time.monotonic())
+        if left < slot / 2:
+            skipped.append(candidate)
+            continue
+        result = measure_goodput(
+            target,
+            candidate,
+            duration=left * 0.6,
+            timeout=left * 0.4,
+            iface=iface,
+            fwmark=fwmark,
+        )
+        measured.append(result or {"mtu": candidate, "goodput_bps": None})
+
+    chosen, best = mtu, None
+    for m in measured:
+        if m["goodput_bps"] is None:
+            continue
+        if best is None or m["goodput_bps"] > best * (1 + _MARGIN):
+            chosen, best = m["mtu"], m["goodput_bps"]
+
+    return {
+        "target": target,
+        "probed": mtu,
+        "chosen": chosen,
+        "budget": budget,
+        "measured": measured,
+        "skipped": skipped,
+    }
+
+
+def validate_bottleneck(
+    probe_results: Mapping[str, int | None],
+    mtu: int,
+    *,
+    backend: str,
+    budget: float,
+    bind: Callable[[str], dict],
+    log: Callable[[str], None],
+) -> dict:
+    """
+    Run the validation against the udp: responder target with the lowest PMTU
+    (the bottleneck path); {} if there is none or no budget is left. bind(key)
+    gives the iface= / fwmark= that target's probes used, so the transfers
+    take the same route.
+    """
+    responders: list[tuple[int, str, str]] = []
+    for t, p in probe_results.items():
+        engine, spec = split_engine(t, backend)
+        if engine == "udp" and p:
+            responders.append((p, spec, t))
+    if not responders:
+        log("[automtu] INFO: --throughput-validate needs a udp: responder target.")
+        return {}
+    if budget <= 0:
+        log("[automtu] INFO: no time left for --throughput-validate.")
+        return {}
+    _, target, key = min(responders)
+    log(
+        f"[automtu] Validating throughput towards {target} "
+        f"(MTU {mtu} and smaller, budget {budget:g}s)"
+    )
+    result = validate_throughput(target, mtu, budget=budget, **bind(key))
+    for m in result["measured"]:
+        rate = m["goodput_bps"]
+        log(
+            f"[automtu]  - MTU {m['mtu']}: "
+            + (f"{rate / 1e6:.1f} Mbit/s" if rate is not None else "no report")
+        )
+    if result["chosen"] != mtu:
+        log(f"[automtu] MTU {result['chosen']} is faster than {mtu}; using it.")
+    return result
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Per-probe trace log (--trace FILE): one compact JSON line per probe, written
+# as it happens, for offline analysis of search efficiency.
+#
+# Session recording (--record FILE) uses the same line format, but hooks the
+# search itself, so it covers every backend: one "probe" line per size probe
+# (payload, outcome, elapsed) and one "result" line per target. replay.py
+# turns such a file back into a probe backend.
+
+SESSION_VERSION = 1
+
+_TRACER: Tracer | None = None
+_RECORDER: Tracer | None = None
+_STEP: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "automtu_search_step", default=None
+)
+_TARGET: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "automtu_record_target", default=None
+)
+
+
+class Tracer:
+    def __init__(self, path: Path) -> None:
+        self._fh = Path(path).open("a", encoding="utf-8")  # noqa: SIM115 (close())
+        self._lock = threading.Lock()
+
+    def record(self, **fields: object) -> None:
+        line = json.dumps(fields, separators=(",", ":"), sort_keys=True)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+def get_tracer() -> Tracer | None:
+    return _TRACER
+
+
+@contextmanager
+def tracing(tracer: Tracer) -> Iterator[Tracer]:
+    """
+    Install a process-wide tracer for the duration of the block, then close it.
+    """
+    global _TRACER
+    _TRACER = tracer
+    try:
+        yield tracer
+    finally:
+        _TRACER = None
+        tracer.close()
+
+
+def set_step(name: str) -> None:
+    """
+    Label the probes that follow with the search step that issues them.
+    """
+    _STEP.set(name)
+
+
+def current_step() -> str | None:
+    return _STEP.get()
+
+
+@contextmanager
+def recording(recorder: Tracer) -> Iterator[Tracer]:
+    """
+    Record a probe session into recorder for the duration of the block.
+    """
+    global _RECORDER
+    recorder.record(type="session", version=SESSION_VERSION, ts=round(time.time(), 6))
+    _RECORDER = recorder
+    try:
+        yield recorder
+    finally:
+        _RECORDER = None
+        recorder.close()
+
+
+def recorded(ok: Callable[[int], bool]) -> Callable[[int], bool]:
+    """
+    Wrap a single-size probe so each call is recorded (no-op unless a session
+    is being recorded for the current target).
+    """
+    recorder, target = _RECORDER, _TARGET.get()
+    if recorder is None or target is None:
+        return ok
+
+    def probe(payload: int) -> bool:
+        started = time.monotonic()
+        passed = ok(payload)
+        recorder.record(
+            type="probe",
+            target=target,
+            payload=payload,
+            ok=passed,
+            elapsed=round(time.monotonic() - started, 6),
+            step=current_step(),
+        )
+        return passed
+
+    return probe
+
+
+def recorded_probe(
+    probe: Callable[..., int | None],
+) -> Callable[..., int | None]:
+    """
+    Wrap a probe(target, hint, iface=None) function so its size probes and
+    result are recorded under the target key (target%iface for link probes).
+    """
+
+    def wrapper(target: str, hint: int | None, iface: str | None = None) -> int | None:
+        recorder = _RECORDER
+        if recorder is None:
+            return probe(target, hint, iface) if iface else probe(target, hint)
+        key = f"{target}%{iface}" if iface else target
+        token = _TARGET.set(key)
+        started = time.monotonic()
+        try:
+            pmtu = probe(target, hint, iface) if iface else probe(target, hint)
+        finally:
+            _TARGET.reset(token)
+        recorder.record(
+            type="result",
+            target=key,
+            hint=hint,
+            pmtu=pmtu,
+            elapsed=round(time.monotonic() - started, 6),
+        )
+        return pmtu
+
+    return wrapper
+
+
+def recorded_mtu(iface: str, mtu: int, *, egress: bool = False) -> None:
+    """
+    Record the MTU of an interface the probes left through (no-op unless a
+    session is being recorded), so a replay derives the same search bounds.
+    """
+    if _RECORDER is not None:
+        _RECORDER.record(type="mtu", iface=iface, mtu=int(mtu), egress=egress)
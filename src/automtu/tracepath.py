@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import re
+import subprocess
+
+from .pmtu import header_size, probe_pmtu
+from .sched import DeadlineExceeded, capped, expired
+
+# tracepath backend ('tracepath:host' or --pmtu-backend tracepath): one pass
+# of `tracepath -n` reports the path MTU as it discovers it hop by hop, so no
+# bisection is needed. Needs no root, but cannot be bound to a device or mark:
+# bound probes (WG fwmark, --probe-all-egress) fall back to ICMP.
+
+_RESUME_RE = re.compile(r"Resume:\s+pmtu\s+(\d+)\s+hops\s+\d+")
+
+_MAX_HOPS = 30
+
+
+def parse_tracepath(text: str) -> int | None:
+    """
+    PMTU from tracepath output; None unless the destination was reached
+    ('Resume: pmtu N hops H back B').
+    """
+    m = _RESUME_RE.search(text)
+    return int(m.group(1)) if m else None
+
+
+def probe_pmtu_tracepath(
+    target: str,
+    lo_payload: int = 1200,
+    hi_payload: int = 1472,
+    timeout: float = 1.0,
+    hint: int | None = None,
+    **bind: object,
+) -> int | None:
+    """
+    Path MTU towards target via `tracepath -n`.
+
+    The first packet is sized to the upper bound, so the result never exceeds
+    hi_payload plus the header size; there is no lower bound, tracepath
+    reports what it finds. hint is ignored. tracepath cannot be bound, so
+    with bind (iface/fwmark) set the probe falls back to ICMP bisection.
+    """
+    if any(bind.values()):
+        return probe_pmtu(target, lo_payload, hi_payload, timeout, hint, **bind)
+    hdr = header_size(target)
+    cmd = ["tracepath", "-n", "-m", str(_MAX_HOPS), "-l", str(hi_payload + hdr)]
+    if hdr == 48:  # IPv6 target
+        cmd.insert(1, "-6")
+    try:
+        proc = subprocess.run(
+            cmd + [target],
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            # every hop may wait up to ~timeout for its reply
+            timeout=capped(max(5.0, timeout * _MAX_HOPS)),
+        )
+    except subprocess.TimeoutExpired:
+        if expired():
+            raise DeadlineExceeded(None) from None
+        return None
+    except OSError:
+        return None  # tracepath not installed
+
+    pmtu = parse_tracepath(proc.stdout or "")
+    return min(pmtu, hi_payload + hdr) if pmtu is not None else None
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import subprocess
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+from .net import route_dev
+from .resolve import is_ip
+from .wg import wg_is_active, wg_overhead_for, wg_peer_endpoints
+
+# Tunnel stacks (--tunnel-stack): WireGuard over VXLAN over a bond and the like.
+# Tunnel links and their encapsulation come from `ip -d -j link show`
+# (rtnetlink IFLA_LINKINFO: kind, underlay device, endpoint addresses). Each
+# tunnel gets its underlay's MTU minus its own overhead, starting from the
+# egress effective MTU, so no level of the stack fragments.
+
+_OUTER_IP = {"ipv4": 20, "ipv6": 40}
+_UDP = 8
+_ETH = 14  # inner Ethernet header of L2 tunnels
+_GRE = 4  # + 4 each for key, sequence number and checksum
+# IPv6 tunnels add a destination options header with the tunnel
+# encapsulation limit (RFC 2473) unless created with "encaplimit none".
+_ENCAP_LIMIT = 8
+_ENCAP_LIMIT_KINDS = ("ip6tnl", "ip6gre", "ip6gretap")
+
+# kind -> (encapsulation after the outer IP header, fixed outer family or None)
+_KINDS: dict[str, tuple[int, str | None]] = {
+    "vxlan": (_UDP + 8 + _ETH, None),
+    "geneve": (_UDP + 8 + _ETH, None),  # without TLV options
+    "gre": (_GRE, "ipv4"),
+    "gretap": (_GRE + _ETH, "ipv4"),
+    "ip6gre": (_GRE, "ipv6"),
+    "ip6gretap": (_GRE + _ETH, "ipv6"),
+    "ipip": (0, "ipv4"),
+    "sit": (0, "ipv4"),
+    "ip6tnl": (0, "ipv6"),
+}
+TUNNEL_KINDS = (*_KINDS, "wireguard")
+
+_ADDR_KEYS = ("remote", "local", "group", "remote6", "local6", "group6")
+
+
+@dataclass(frozen=True)
+class Tunnel:
+    name: str
+    kind: str
+    underlay: str | None  # device the tunnel is bound to; None: routed
+    family: str | None  # outer address family; None: unknown
+    gre_extra: int = 0  # GRE key / seq / csum bytes
+    mtu: int = 0  # current MTU
+    remote: str | None = None  # remote endpoint address, if configured
+    encap_limit: int = 0  # encapsulation limit option bytes (IPv6 tunnels)
+
+
+def _family(kind: str, data: dict) -> str | None:
+    fixed = _KINDS.get(kind, (0, None))[1]
+    if fixed:
+        return fixed
+    addrs = [data[k] for k in _ADDR_KEYS if isinstance(data.get(k), str)]
+    if any(":" in a for a in addrs):
+        return "ipv6"
+    return "ipv4" if addrs else None
+
+
+def parse_tunnels(text: str) -> tuple[list[Tunnel], dict[str, int]]:
+    """
+    Parse `ip -d -j link show` into tunnel links and the MTU of every link.
+    """
+    tunnels: list[Tunnel] = []
+    mtus: dict[str, int] = {}
+    for link in json.loads(text or "[]"):
+        name, mtu = link.get("ifname"), link.get("mtu")
+        if not isinstance(name, str) or not isinstance(mtu, int):
+            continue
+        mtus[name] = mtu
+        info = link.get("linkinfo") or {}
+        kind = info.get("info_kind")
+        if kind not in TUNNEL_KINDS:
+            continue
+        data = info.get("info_data") or {}
+        underlay = data.get("link") or link.get("link")
+        gre_extra = 4 * sum(1 for k in ("okey", "oseq", "ocsum") if data.get(k))
+        remote = data.get("remote") or data.get("remote6")
+        encap_limit = (
+            0
+            if kind not in _ENCAP_LIMIT_KINDS or data.get("ip6_tnl_f_ign_encap_limit")
+            else _ENCAP_LIMIT
+        )
+        tunnels.append(
+            Tunnel(
+                name=name,
+                kind=kind,
+                underlay=underlay if isinstance(underlay, str) else None,
+                family=_family(kind, data),
+                gre_extra=gre_extra
+                if kind in ("gre", "gretap", "ip6gre", "ip6gretap")
+                else 0,
+                mtu=mtu,
+                remote=remote if isinstance(remote, str) else None,
+                encap_limit=encap_limit,
+            )
+        )
+    return tunnels, mtus
+
+
+def discover_tunnels() -> tuple[list[Tunnel], dict[str, int]]:
+    try:
+        out = subprocess.run(
+            ["ip", "-d", "-j", "link", "show"],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).stdout
+        return parse_tunnels(out)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return [], {}
+
+
+def tunnel_overhead(tunnel: Tunnel) -> tuple[int, dict]:
+    """
+    Encapsulation bytes of one tunnel (unknown outer family counts as IPv6).
+    Returns (overhead, breakdown).
+    """
+    if tunnel.kind == "wireguard":
+        return wg_overhead_for([tunnel.family])
+    family = tunnel.family or "ipv6"
+    encap = _KINDS[tunnel.kind][0] + tunnel.gre_extra
+    return _OUTER_IP[family] + tunnel.encap_limit + encap, {
+        "outer_family": tunnel.family,
+        "outer_ip": _OUTER_IP[family],
+        "encap_limit": tunnel.encap_limit,
+        "encap": encap,
+    }
+
+
+def plan_stack(
+    tunnels: list[Tunnel],
+    mtus: Mapping[str, int],
+    *,
+    egress: str,
+    egress_mtu: int,
+    routed: Mapping[str, str] | None = None,
+    overrides: Mapping[str, tuple[int, dict]] | None = None,
+) -> dict[str, dict]:
+    """
+    MTU per tunnel: underlay MTU minus overhead. Tunnels without a bound
+    device ride on the device their remote end is routed through (routed),
+    else on the egress, which has egress_mtu; other plain devices keep
+    their current MTU. overrides maps a tunnel to a known (overhead,
+    breakdown), e.g. WireGuard from its peer endpoints.
+
+    Returns name -> info, underlays before the tunnels on top of them.
+    """
+    by_name = {t.name: t for t in tunnels}
+    routed = routed or {}
+    overrides = overrides or {}
+    plan: dict[str, dict] = {}
+
+    def resolve(name: str, stack: frozenset) -> tuple[int, int] | None:
+        # -> (mtu, depth) of name
+        if name == egress:
+            return egress_mtu, 0
+        if name in plan:
+            return plan[name]["mtu"], plan[name]["depth"]
+        tunnel = by_name.get(name)
+        if tunnel is None:
+            return (mtus[name], 0) if name in mtus else None
+        if name in stack:
+            return None  # loop in link info
+        lower = tunnel.underlay or routed.get(name) or egress
+        below = resolve(lower, stack | {name})
+        if below is None:
+            return None
+        overhead, detail = overrides.get(name) or tunnel_overhead(tunnel)
+        plan[name] = {
+            "kind": tunnel.kind,
+            "underlay": lower,
+            "depth": below[1] + 1,
+            "overhead": overhead,
+            "overhead_detail": detail,
+            "mtu": below[0] - overhead,
+            "current": tunnel.mtu,
+            "applied": False,
+        }
+        return plan[name]["mtu"], plan[name]["depth"]
+
+    for t in sorted(tunnels, key=lambda t: t.name):
+        resolve(t.name, frozenset())
+    return plan
+
+
+def tunnel_routes(
+    tunnels: list[Tunnel], wg_if: str, addresses: Mapping[str, str | None]
+) -> dict[str, str]:
+    """
+    Underlay of tunnels not bound to a device: the device the route to their
+    remote end (for WG: a peer endpoint) goes through.
+    """
+    routed: dict[str, str] = {}
+    for t in tunnels:
+        if t.underlay:
+            continue
+        remote = t.remote
+        if remote is None and t.name == wg_if and wg_is_active(wg_if):
+            for ep in wg_peer_endpoints(wg_if):
+                remote = ep if is_ip(ep) else addresses.get(ep)
+                if remote:
+                    break
+        dev = route_dev(remote) if remote else None
+        if dev and dev != t.name:
+            routed[t.name] = dev
+    return routed
+
+
+def stack_tunnels(
+    *,
+    egress: str,
+    egress_mtu: int,
+    wg_if: str,
+    wg_overhead: tuple[int, dict],
+    addresses: Mapping[str, str | None],
+    apply: Callable[[str, int, bool], None] | None,
+    dry: bool,
+    log: Callable[[str], None],
+) -> dict[str, dict]:
+    """
+    Discover the tunnels on this host and plan their MTUs (wg_if with the
+    given (overhead, breakdown)). With apply, every tunnel but wg_if gets its
+    MTU, underlays first; WireGuard itself follows --apply-wg-mtu.
+    """
+    found, link_mtus = discover_tunnels()
+    plan = plan_stack(
+        found,
+        link_mtus,
+        egress=egress,
+        egress_mtu=egress_mtu,
+        routed=tunnel_routes(found, wg_if, addresses),
+        overrides={wg_if: wg_overhead},
+    )
+    for name, info in plan.items():
+        log(
+            f"[automtu] Tunnel {name} ({info['kind']} over {info['underlay']}): "
+            f"MTU {info['mtu']} (overhead={info['overhead']})"
+        )
+    if apply is not None:
+        for name, info in plan.items():
+            if name != wg_if:
+                apply(name, info["mtu"], dry)
+                info["applied"] = True
+    return plan
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import errno
+import os
+import socket
+import struct
+import sys
+import time
+
+from .pmtu import payload_search, run_search
+from .sched import DeadlineExceeded, capped
+
+# Packetization-layer PMTUD (RFC 8899 style) over UDP.
+#
+# The prober sends DF datagrams padded to the probe size to a cooperating
+# responder (`automtu responder`), which answers every valid probe with a
+# small acknowledgement. An acknowledged probe means the size fits the path;
+# a lost probe (or a local EMSGSIZE) means it does not. No ICMP is needed.
+#
+# Bulk mode (throughput validation): the prober streams unacknowledged
+# datagrams tagged with a session id, then asks for a report of how many
+# datagrams and bytes of that session arrived.
+
+DEFAULT_RESPONDER_PORT = 51900
+
+_PROBE_MAGIC = b"AMTUP"
+_ACK_MAGIC = b"AMTUA"
+_SEQ = struct.Struct("!II")  # sequence number, probe length
+_BULK_MAGIC = b"AMTUB"
+_REPORT_MAGIC = b"AMTUF"
+_REPORT_ACK_MAGIC = b"AMTUR"
+_REPORT = struct.Struct("!IIQ")  # session, datagrams received, bytes received
+_MAX_BULK_SESSIONS = 64
+
+# Linux socket options (not all are exported by the socket module).
+_IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+_IP_PMTUDISC_PROBE = getattr(socket, "IP_PMTUDISC_PROBE", 3)
+_IPV6_MTU_DISCOVER = getattr(socket, "IPV6_MTU_DISCOVER", 23)
+_IPV6_PMTUDISC_PROBE = getattr(socket, "IPV6_PMTUDISC_PROBE", 3)
+_SO_BINDTODEVICE = getattr(socket, "SO_BINDTODEVICE", 25)
+_SO_MARK = getattr(socket, "SO_MARK", 36)
+
+
+def split_hostport(spec: str, default_port: int) -> tuple[str, int]:
+    """
+    Split host[:port] / [v6addr][:port] into (host, port); ValueError on a
+    port that is not a number in 1..65535.
+    """
+    if spec.startswith("["):
+        host, _, rest = spec[1:].partition("]")
+        if not rest.startswith(":"):
+            return host, default_port
+        port = rest[1:]
+    elif spec.count(":") == 1:
+        host, port = spec.split(":")
+    else:
+        return spec, default_port
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"invalid port in target {spec!r}")
+    return host, int(port)
+
+
+def _set_df(sock: socket.socket, family: int) -> None:
+    # PROBE sets DF but ignores the kernel's cached PMTU, so sizes above a
+    # previously learned value can still be tried (RFC 8899, section 4.4).
+    if family == socket.AF_INET6:
+        sock.setsockopt(socket.IPPROTO_IPV6, _IPV6_MTU_DISCOVER, _IPV6_PMTUDISC_PROBE)
+    else:
+        sock.setsockopt(socket.IPPROTO_IP, _IP_MTU_DISCOVER, _IP_PMTUDISC_PROBE)
+
+
+def bind_route(
+    sock: socket.socket, iface: str | None = None, fwmark: int | None = None
+) -> None:
+    """
+    Pin a probe socket to one link (SO_BINDTODEVICE) and/or routing policy (SO_MARK).
+    """
+    if iface:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_BINDTODEVICE, iface.encode())
+    if fwmark:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_MARK, int(fwmark))
+
+
+def _probe_once(sock: socket.socket, seq: int, payload: int) -> bool:
+    header = _PROBE_MAGIC + _SEQ.pack(seq, payload)
+    datagram = header + b"\0" * max(0, payload - len(header))
+    try:
+        sock.send(datagram)
+    except OSError as e:
+        # the failed send also leaves the error pending on the socket, where
+        # it would fail the next probe; clear it before giving the verdict
+        sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if e.errno == errno.EMSGSIZE:
+            return False
+        raise
+
+    while True:
+        try:
+            ack = sock.recv(64)
+        except TimeoutError:
+            return False
+        except OSError:
+            # e.g. ECONNREFUSED from an ICMP port unreachable
+            return False
+        if not ack.startswith(_ACK_MAGIC) or len(ack) < len(_ACK_MAGIC) + _SEQ.size:
+            continue
+        got_seq, got_len = _SEQ.unpack_from(ack, len(_ACK_MAGIC))
+        if got_seq == seq:
+            return got_len == len(datagram)
+        # stale ack for an earlier (timed out) probe: keep waiting
+
+
+def probe_pmtu_udp(
+    target: str,
+    lo_payload: int = 1200,
+    hi_payload: int = 1472,
+    timeout: float = 1.0,
+    hint: int | None = None,
+    *,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> int | None:
+    """
+    Probe the Path MTU towards an `automtu responder` at target (host[:port]).
+
+    Payload bounds and the returned MTU use the same units as ICMP probing
+    (UDP and ICMP headers are both 8 bytes).
+    """
+    host, port = split_hostport(target, DEFAULT_RESPONDER_PORT)
+    try:
+        info = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+    except OSError:
+        return None
+    family, addr = info[0], info[4]
+
+    hdr = 48 if family == socket.AF_INET6 else 28
+    seq = 0
+
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        _set_df(sock, family)
+        try:
+            bind_route(sock, iface, fwmark)
+        except OSError:
+            return None  # SO_MARK / SO_BINDTODEVICE need CAP_NET_ADMIN / CAP_NET_RAW
+        sock.settimeout(timeout)
+        try:
+            sock.connect(addr)
+        except OSError:
+            return None  # e.g. ENETUNREACH: no route to the responder
+
+        def ok(payload: int) -> bool:
+            nonlocal seq
+            seq += 1
+            sock.settimeout(capped(timeout))
+            return _probe_once(sock, seq, payload)
+
+        try:
+            best = run_search(
+                payload_search(
+                    lo_payload,
+                    hi_payload,
+                    hint - hdr if hint is not None else None,
+                    hdr=hdr,
+                ),
+                ok,
+            )
+        except DeadlineExceeded as e:
+            raise DeadlineExceeded(
+                e.best + hdr if e.best is not None else None
+            ) from None
+        except OSError:
+            return None  # a send failed for another reason than the size
+
+    return (best + hdr) if best is not None else None
+
+
+def measure_goodput(
+    target: str,
+    mtu: int,
+    *,
+    duration: float = 0.5,
+    timeout: float = 0.5,
+    iface: str | None = None,
+    fwmark: int | None = None,
+) -> dict | None:
+    """
+    Stream DF datagrams sized for mtu to an `automtu responder` for duration
+    seconds, then ask it what arrived. Returns the transfer statistics with
+    the goodput (received payload bytes per second), or None if the size does
+    not fit locally or no report came back within timeout.
+    """
+    host, port = split_hostport(target, DEFAULT_RESPONDER_PORT)
+    try:
+        info = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+    except OSError:
+        return None
+    family, addr = info[0], info[4]
+    payload = mtu - (48 if family == socket.AF_INET6 else 28)
+    session = int.from_bytes(os.urandom(4), "big")
+
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        _set_df(sock, family)
+        try:
+            bind_route(sock, iface, fwmark)
+        except OSError:
+            return None
+        sock.connect(addr)
+
+        sent = 0
+        start = time.monotonic()
+        stop = start + capped(duration)
+        sock.settimeout(0.05)
+        while time.monotonic() < stop:
+            header = _BULK_MAGIC + _SEQ.pack(session, sent)
+            try:
+                sock.send(header + b"\0" * max(0, payload - len(header)))
+            except OSError as e:
+                if e.errno == errno.EMSGSIZE:
+                    return None
+                if isinstance(e, socket.timeout) or e.errno in (
+                    errno.ENOBUFS,
+                    errno.EAGAIN,
+                ):
+                    continue  # send buffer full: the path is the bottleneck
+                return None
+            sent += 1
+
+        report = _REPORT_MAGIC + _SEQ.pack(session, sent)
+        wait_until = time.monotonic() + capped(timeout)
+        while (left := wait_until - time.monotonic()) > 0:
+            try:
+                sock.settimeout(min(left, 0.2))
+                sock.send(report)
+                data = sock.recv(64)
+            except OSError:
+                continue  # lost report or reply (or timeout): ask again
+            if not data.startswith(_REPORT_ACK_MAGIC):
+                continue
+            got_session, received, nbytes = _REPORT.unpack_from(
+                data, len(_REPORT_ACK_MAGIC)
+            )
+            if got_session != session:
+                continue
+            elapsed = time.monotonic() - start
+            return {
+                "mtu": mtu,
+                "sent": sent,
+                "received": received,
+                "loss": round(1 - received / sent, 4) if sent else None,
+                "elapsed": round(elapsed, 4),
+                "goodput_bps": int(nbytes * 8 / elapsed) if elapsed > 0 else 0,
+            }
+    return None
+
+
+class Responder:
+    """
+    Minimal echo responder: acknowledges every probe with its sequence and
+    length, and counts bulk datagrams per session for throughput reports.
+    """
+
+    def __init__(self, bind: str = "0.0.0.0", port: int = DEFAULT_RESPONDER_PORT):
+        family = socket.AF_INET6 if ":" in bind else socket.AF_INET
+        self._sock = socket.socket(family, socket.SOCK_DGRAM)
+        self._sock.bind((bind, port))
+        self._sock.settimeout(0.5)
+        self._closed = False
+        self._bulk: dict[int, tuple[int, int]] = {}  # session -> (datagrams, bytes)
+        self.port: int = self._sock.getsockname()[1]
+
+    def handle_one(self) -> None:
+        data, peer = self._sock.recvfrom(65535)
+        if len(data) < len(_PROBE_MAGIC) + _SEQ.size:
+            return
+        seq, _ = _SEQ.unpack_from(data, len(_PROBE_MAGIC))
+        if data.startswith(_PROBE_MAGIC):
+            self._sock.sendto(_ACK_MAGIC + _SEQ.pack(seq, len(data)), peer)
+        elif data.startswith(_BULK_MAGIC):
+            count, nbytes = self._bulk.pop(seq, (0, 0))
+            self._bulk[seq] = (count + 1, nbytes + len(data))
+            if len(self._bulk) > _MAX_BULK_SESSIONS:
+                del self._bulk[next(iter(self._bulk))]  # least recently active
+        elif data.startswith(_REPORT_MAGIC):
+            count, nbytes = self._bulk.get(seq, (0, 0))
+            self._sock.sendto(
+                _REPORT_ACK_MAGIC + _REPORT.pack(seq, count, nbytes), peer
+            )
+
+    def serve_forever(self) -> None:
+        while not self._closed:
+            try:
+                self.handle_one()
+            except TimeoutError:
+                continue
+            except OSError:
+                if self._closed:
+                    return
+                raise
+
+    def close(self) -> None:
+        self._closed = True
+        self._sock.close()
+
+
+def run_responder(args) -> int:
+    try:
+        responder = Responder(args.bind, args.port)
+    except OSError as e:
+        print(f"[automtu][ERROR] Cannot bind responder: {e}", file=sys.stderr)
+        return 2
+
+    print(f"[automtu] Responder listening on {args.bind} udp/{responder.port}")
+    try:
+        responder.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        responder.close()
+    return 0
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import re
 import subprocess
-from typing import List
+from collections.abc import Iterable
+from dataclasses import dataclass
 
 from .net import iface_exists
 
@@ -15,15 +16,58 @@ def _run(cmd: list[str]) -> str:
 
 def _rc(cmd: list[str]) -> int:
     return subprocess.run(
-        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
     ).returncode
 
 
+@dataclass(frozen=True)
+class WgPeer:
+    public_key: str
+    endpoint: str | None  # host only (no port), None if unknown
+    allowed_ips: tuple[str, ...]
+
+
+def wg_peers(wg_if: str) -> list[WgPeer]:
+    """
+    Parse `wg show <if> dump`: one tab-separated line per peer after the
+    interface line (public-key, preshared-key, endpoint, allowed-ips, ...).
+    """
+    peers: list[WgPeer] = []
+    lines = _run(["wg", "show", wg_if, "dump"]).splitlines()
+    for line in lines[1:]:
+        parts = line.split("\t")
+        if len(parts) < 4:
+            continue
+        endpoint = None
+        if parts[2] and parts[2] != "(none)":
+            endpoint = parts[2].rsplit(":", 1)[0].strip("[]")
+        allowed = tuple(
+            a.strip() for a in parts[3].split(",") if a.strip() and a != "(none)"
+        )
+        peers.append(WgPeer(parts[0], endpoint, allowed))
+    return peers
+
+
+def wg_fwmark(wg_if: str) -> int | None:
+    """
+    The fwmark WireGuard puts on its encapsulated packets (None if off/unset).
+    wg-quick routes unmarked traffic into the tunnel, so probes towards peer
+    endpoints must carry this mark to take the same path as WG traffic.
+    """
+    out = _run(["wg", "show", wg_if, "fwmark"])
+    if not out or out == "off":
+        return None
+    try:
+        return int(out, 0) or None
+    except ValueError:
+        return None
+
+
 def wg_is_active(wg_if: str) -> bool:
     return iface_exists(wg_if) and _rc(["wg", "show", wg_if]) == 0
 
 
-def wg_peer_endpoints(wg_if: str) -> List[str]:
+def wg_peer_endpoints(wg_if: str) -> list[str]:
     targets: list[str] = []
 
     out = _run(["wg", "show", wg_if, "endpoints"])
@@ -46,3 +90,34 @@ def wg_peer_endpoints(wg_if: str) -> List[str]:
         if t and t not in dedup:
             dedup.append(t)
     return dedup
+
+
+# Outer IP header + UDP header + WireGuard data header/auth tag.
+_WG_HEADER = 32
+_UDP_HEADER = 8
+_OUTER_IP = {"ipv4": 20, "ipv6": 40}
+WG_OVERHEAD_DEFAULT = _OUTER_IP["ipv6"] + _UDP_HEADER + _WG_HEADER  # 80
+
+
+def wg_overhead_for(families: Iterable[str | None]) -> tuple[int, dict]:
+    """
+    Compute the WireGuard encapsulation overhead from the outer address
+    families of the peer endpoints ("ipv4" / "ipv6"): 60 for IPv4-only, 80 as
+    soon as one peer uses IPv6. No endpoints, or any endpoint of unknown
+    family (e.g. unresolved), fall back to 80.
+
+    Returns (overhead, breakdown).
+    """
+    fams = list(families)
+    known = [f for f in fams if f in _OUTER_IP]
+    if fams and all(f == "ipv4" for f in fams):
+        outer = "ipv4"
+    else:
+        outer = "ipv6"
+    overhead = _OUTER_IP[outer] + _UDP_HEADER + _WG_HEADER
+    return overhead, {
+        "outer_family": outer if known else None,
+        "outer_ip": _OUTER_IP[outer],
+        "udp": _UDP_HEADER,
+        "wireguard": _WG_HEADER,
+    }
@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import Mock, patch
 
 import automtu.__main__ as entry
+from automtu import pmtu
+from automtu.core import config_from_args
 
 
 class TestMain(unittest.TestCase):
@@ -21,6 +23,51 @@ class TestMain(unittest.TestCase):
         fake_parser.parse_args.assert_called_once_with()
         p_run.assert_called_once_with(fake_args)
 
+    def test_main_dispatches_responder_subcommand(self) -> None:
+        with (
+            patch("automtu.__main__.sys.argv", ["automtu", "responder", "--port", "9"]),
+            patch("automtu.__main__.run_responder", return_value=0) as p_resp,
+            patch("automtu.__main__.run_automtu") as p_run,
+        ):
+            rc = entry.main()
+
+        self.assertEqual(rc, 0)
+        p_run.assert_not_called()
+        self.assertEqual(p_resp.call_args.args[0].port, 9)
+
+    def test_main_dispatches_serve_subcommand(self) -> None:
+        with (
+            patch(
+                "automtu.__main__.sys.argv",
+                ["automtu", "serve", "--socket", "/tmp/a.sock", "--serve-ttl", "5"],
+            ),
+            patch("automtu.__main__.run_serve", return_value=0) as p_serve,
+            patch("automtu.__main__.run_automtu") as p_run,
+        ):
+            rc = entry.main()
+
+        self.assertEqual(rc, 0)
+        p_run.assert_not_called()
+        args = p_serve.call_args.args[0]
+        self.assertEqual((args.socket, args.serve_ttl), ("/tmp/a.sock", 5.0))
+
+    def test_plugins_load_before_subcommand_parsing(self) -> None:
+        def load() -> None:
+            pmtu.register_backend("plugin", pmtu.probe_pmtu)
+
+        self.addCleanup(pmtu._BACKENDS.pop, "plugin", None)
+        argv = ["automtu", "hotplug", "--pmtu-backend", "plugin"]
+        with (
+            patch("automtu.__main__.sys.argv", argv),
+            patch("automtu.__main__.load_backends", side_effect=load),
+            patch("automtu.__main__.run_hotplug", return_value=0) as p_hotplug,
+        ):
+            rc = entry.main()
+
+        self.assertEqual(rc, 0)
+        cfg = config_from_args(p_hotplug.call_args.args[0])
+        self.assertEqual(cfg.pmtu_backend, "plugin")
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
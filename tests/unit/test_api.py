@@ -0,0 +1,268 @@
+import io
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import AutoMTUError, Config, Session, run
+from automtu.sched import DeadlineExceeded
+
+
+def _host_patches():  # type: ignore[no-untyped-def]
+    return (
+        patch("automtu.core.detect_egress_iface", return_value="eth0"),
+        patch("automtu.core.iface_exists", return_value=True),
+        patch("automtu.core.read_iface_mtu", return_value=1500),
+        patch("automtu.core.wg_is_active", return_value=False),
+        patch("automtu.core.detect_docker_ifaces", return_value=[]),
+    )
+
+
+class TestApi(unittest.TestCase):
+    def test_run_uses_injected_backends_and_prints_nothing(self) -> None:
+        applied: list[tuple[str, int, bool]] = []
+        p1, p2, p3, p4, p5 = _host_patches()
+
+        with p1, p2, p3, p4, p5:
+            out = io.StringIO()
+            with redirect_stdout(out):
+                result = run(
+                    Config(
+                        pmtu_target=("a,b",),
+                        apply_egress_mtu=True,
+                        apply_wg_mtu=True,
+                    ),
+                    probe=lambda t, hint: {"a": 1420, "b": None}[t],
+                    apply=lambda iface, mtu, dry: applied.append((iface, mtu, dry)),
+                )
+
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(result.effective_mtu, 1420)
+        self.assertEqual(result.wg_mtu, 1340)
+        self.assertEqual(result.pmtu_results, {"a": 1420, "b": None})
+        self.assertEqual(applied, [("eth0", 1420, False), ("wg0", 1340, False)])
+        self.assertEqual(result.to_dict()["pmtu"]["chosen"], 1420)
+
+    def test_dry_run_with_builtin_apply_logs_instead_of_printing(self) -> None:
+        logged: list[str] = []
+        p1, p2, p3, p4, p5 = _host_patches()
+
+        with p1, p2, p3, p4, p5, patch("automtu.net.subprocess.run") as ip:
+            out = io.StringIO()
+            with redirect_stdout(out):
+                run(
+                    Config(pmtu_target=("a",), apply_egress_mtu=True, dry_run=True),
+                    probe=lambda t, hint: 1420,
+                    log=logged.append,
+                )
+
+        self.assertEqual(out.getvalue(), "")
+        ip.assert_not_called()
+        self.assertIn("[automtu] DRY-RUN: ip link set mtu 1420 dev eth0", logged)
+
+    def test_run_raises_instead_of_exiting(self) -> None:
+        with (
+            patch("automtu.core.detect_egress_iface", return_value=None),
+            self.assertRaises(AutoMTUError) as ctx,
+        ):
+            run(Config())
+        self.assertEqual(ctx.exception.code, 2)
+
+    def test_session_reuses_known_pmtus_as_hints(self) -> None:
+        hints: list[object] = []
+
+        def probe(target: str, hint: object) -> int:
+            hints.append(hint)
+            return 1420
+
+        session = Session(probe=probe)
+        p1, p2, p3, p4, p5 = _host_patches()
+        with p1, p2, p3, p4, p5:
+            session.run(Config(pmtu_target=("a",)))
+            session.run(Config(pmtu_target=("a",)))
+
+        self.assertEqual(hints, [None, 1420])
+
+    def test_deadline_marks_partial_results(self) -> None:
+        def probe(target: str, hint: object) -> int:
+            if target == "b":
+                raise DeadlineExceeded(1380)
+            return 1420
+
+        p1, p2, p3, p4, p5 = _host_patches()
+        with p1, p2, p3, p4, p5:
+            result = run(Config(pmtu_target=("a,b",), deadline=5.0), probe=probe)
+
+        self.assertEqual(result.pmtu_results, {"a": 1420, "b": 1380})
+        self.assertEqual(result.pmtu_chosen, 1380)
+        pmtu = result.to_dict()["pmtu"]
+        self.assertTrue(pmtu["partial"])
+        self.assertEqual(pmtu["schedule"]["partial"], ["b"])
+        self.assertEqual(pmtu["schedule"]["cancelled"], [])
+
+    def test_probe_all_egress_gives_each_link_its_own_mtu(self) -> None:
+        def fake_probe(target, lo, hi, timeout, hint=None, iface=None):  # type: ignore[no-untyped-def]
+            return {None: 1500, "eth1": 1420}[iface]
+
+        applied: list[tuple[str, int]] = []
+        p1, p2, p3, p4, p5 = _host_patches()
+        with (
+            p1,
+            p2,
+            p3,
+            p4,
+            p5,
+            patch("automtu.core.detect_egress_ifaces", return_value=["eth0", "eth1"]),
+            patch("automtu.core.probe_pmtu", side_effect=fake_probe),
+        ):
+            result = run(
+                Config(
+                    pmtu_target=("192.0.2.1",),
+                    probe_all_egress=True,
+                    apply_egress_mtu=True,
+                ),
+                apply=lambda iface, mtu, dry: applied.append((iface, mtu)),
+            )
+
+        self.assertEqual(result.effective_mtu, 1500)
+        link = result.egress_links["eth1"]
+        self.assertEqual(link["results"], {"192.0.2.1": 1420})
+        self.assertEqual((link["effective_mtu"], link["applied"]), (1420, True))
+        self.assertEqual(applied, [("eth0", 1500), ("eth1", 1420)])
+
+    def test_wg_endpoints_are_probed_with_wg_fwmark(self) -> None:
+        calls: list[dict] = []
+
+        def fake_probe(target, lo, hi, timeout, hint=None, **bind):  # type: ignore[no-untyped-def]
+            calls.append({"target": target, **bind})
+            return 1500
+
+        p1, p2, p3, _, p5 = _host_patches()
+        with (
+            p1,
+            p2,
+            p3,
+            p5,
+            patch("automtu.core.wg_is_active", return_value=True),
+            patch("automtu.core.wg_peer_endpoints", return_value=["198.51.100.7"]),
+            patch("automtu.core.wg_fwmark", return_value=51820),
+            patch("automtu.core.probe_pmtu", side_effect=fake_probe),
+        ):
+            result = run(
+                Config(
+                    pmtu_target=("192.0.2.1",),
+                    auto_pmtu_from_wg=True,
+                    wg_overhead=80,
+                )
+            )
+
+        self.assertEqual(
+            calls,
+            [
+                {"target": "192.0.2.1"},
+                {"target": "198.51.100.7", "fwmark": 51820},
+            ],
+        )
+        self.assertEqual(result.to_dict()["pmtu"]["wg_fwmark"], 51820)
+
+    def test_state_cache_revalidates_until_path_changes(self) -> None:
+        hints: list[object] = []
+
+        def probe(target: str, hint: object) -> int:
+            hints.append(hint)
+            return 1420
+
+        with tempfile.TemporaryDirectory() as d:
+            cfg = Config(pmtu_target=("a",), state_file=str(Path(d) / "state.json"))
+            p1, p2, p3, p4, p5 = _host_patches()
+            with p1, p2, p3, p4, p5:
+                run(cfg, probe=probe)
+                second = run(cfg, probe=probe)
+                with patch("automtu.core.read_iface_mtu", return_value=9000):
+                    third = run(cfg, probe=probe)
+
+        self.assertEqual(hints, [None, 1420, None])
+        self.assertEqual(second.pmtu_cache["revalidated"], ["a"])
+        self.assertTrue(third.to_dict()["pmtu"]["cache"]["path_changed"])
+
+    def test_stability_gate_holds_unconfirmed_increase(self) -> None:
+        measured = iter([1400, 1500, 1500])
+        applied: list[int] = []
+
+        with tempfile.TemporaryDirectory() as d:
+            cfg = Config(
+                pmtu_target=("a",),
+                state_file=str(Path(d) / "state.json"),
+                stability_confirm=2,
+                apply_egress_mtu=True,
+            )
+            p1, p2, p3, p4, p5 = _host_patches()
+            with p1, p2, p3, p4, p5:
+                results = [
+                    run(
+                        cfg,
+                        probe=lambda t, hint: next(measured),
+                        apply=lambda iface, mtu, dry: applied.append(mtu),
+                    )
+                    for _ in range(3)
+                ]
+
+        self.assertEqual(applied, [1400, 1400, 1500])
+        gate = results[1].to_dict()["stability"]
+        self.assertEqual((gate["decision"], gate["measured"]), ("pending", 1500))
+
+    def test_history_policy_smooths_a_single_bad_run(self) -> None:
+        measured = iter([1500, 1500, 1500, 1500, 1280])
+
+        with tempfile.TemporaryDirectory() as d:
+            cfg = Config(
+                pmtu_target=("a",),
+                pmtu_policy="ewma",
+                history_file=str(Path(d) / "h.sqlite"),
+            )
+            p1, p2, p3, p4, p5 = _host_patches()
+            with p1, p2, p3, p4, p5:
+                for _ in range(5):
+                    result = run(cfg, probe=lambda t, hint: next(measured))
+
+        self.assertEqual(result.pmtu_results, {"a": 1280})
+        self.assertEqual(result.pmtu_chosen, 1434)
+        self.assertEqual(result.pmtu_history, {"a": {"samples": 5, "value": 1434}})
+
+    def test_history_policy_requires_history_file(self) -> None:
+        with self.assertRaises(AutoMTUError) as ctx:
+            run(Config(pmtu_policy="p10"))
+        self.assertEqual(ctx.exception.code, 4)
+
+    def test_median_stops_once_a_majority_agrees(self) -> None:
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def probe(target: str, hint: object) -> int:
+            if target in ("slow1", "slow2"):
+                release.wait(5)
+                return 1280
+            return 1420
+
+        p1, p2, p3, p4, p5 = _host_patches()
+        with p1, p2, p3, p4, p5:
+            result = run(
+                Config(
+                    pmtu_target=("a,b,slow1,c,slow2",),
+                    pmtu_policy="median",
+                    pmtu_workers=5,
+                ),
+                probe=probe,
+            )
+
+        self.assertEqual(result.pmtu_chosen, 1420)
+        schedule = result.to_dict()["pmtu"]["schedule"]
+        self.assertEqual(sorted(schedule["short_circuited"]), ["slow1", "slow2"])
+        self.assertFalse(result.pmtu_partial)
+        self.assertLess(schedule["elapsed"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
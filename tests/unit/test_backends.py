@@ -0,0 +1,200 @@
+import contextlib
+import os
+import socket
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import pmtu
+from automtu.cli import build_parser
+from automtu.core import config_from_args
+from automtu.tcp import probe_pmtu_tcp
+from automtu.tracepath import parse_tracepath, probe_pmtu_tracepath
+from automtu.udp import probe_pmtu_udp
+
+# Stand-ins for the external tools, driven by FAKE_PMTU (0 = unreachable).
+_FAKE_PING = """\
+import os, sys
+args = sys.argv[1:]
+size = int(args[args.index("-s") + 1]) + 28
+pmtu = int(os.environ["FAKE_PMTU"])
+sys.exit(0 if pmtu and size <= pmtu else 1)
+"""
+
+_FAKE_TRACEPATH = """\
+import os, sys
+args = sys.argv[1:]
+first = int(args[args.index("-l") + 1])
+pmtu = int(os.environ["FAKE_PMTU"])
+print(" 1?: [LOCALHOST]                      pmtu %d" % first)
+if not pmtu:
+    print("     Too many hops: pmtu %d" % first)
+    sys.exit(0)
+print(" 1:  192.0.2.1                         0.300ms pmtu %d" % min(first, pmtu))
+print(" 2:  198.51.100.7                      1.200ms reached")
+print("     Resume: pmtu %d hops 2 back 2" % min(first, pmtu))
+"""
+
+
+def _fake_ok(target: str, timeout: float):
+    pmtu_ = int(os.environ["FAKE_PMTU"])
+    return lambda payload: bool(pmtu_) and payload + pmtu.header_size(target) <= pmtu_
+
+
+class BackendContract:
+    """
+    Every backend must report the path MTU (not the payload), respect the
+    upper bound and return None for an unreachable target.
+    """
+
+    backend = staticmethod(pmtu.probe_pmtu)
+    target = "192.0.2.10"
+    timeout = 1.0
+
+    def fake(self, pmtu_: int) -> contextlib.AbstractContextManager:
+        return contextlib.nullcontext()
+
+    def probe(self, pmtu_: int, hi: int = 1472):
+        with patch.dict(os.environ, {"FAKE_PMTU": str(pmtu_)}), self.fake(pmtu_):
+            return self.backend(self.target, 1200, hi, self.timeout)
+
+    def test_reports_path_mtu(self) -> None:
+        self.assertEqual(self.probe(1400), 1400)
+
+    def test_capped_at_upper_bound(self) -> None:
+        self.assertEqual(self.probe(9000, hi=1472), 1500)
+
+    def test_unreachable_returns_none(self) -> None:
+        self.assertIsNone(self.probe(0))
+
+
+class _FakeTools(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, body in (("ping", _FAKE_PING), ("tracepath", _FAKE_TRACEPATH)):
+            path = Path(self.tmp.name) / name
+            path.write_text(f"#!{sys.executable}\n{body}")
+            path.chmod(0o755)
+        path_env = self.tmp.name + os.pathsep + os.environ.get("PATH", "")
+        p = patch.dict(os.environ, {"PATH": path_env})
+        p.start()
+        self.addCleanup(p.stop)
+
+
+class TestIcmpBackend(BackendContract, _FakeTools):
+    backend = staticmethod(pmtu.probe_pmtu)
+
+
+class TestTracepathBackend(BackendContract, _FakeTools):
+    backend = staticmethod(probe_pmtu_tracepath)
+
+    def test_bound_probe_falls_back_to_icmp(self) -> None:
+        with patch("automtu.tracepath.probe_pmtu", return_value=1380) as icmp:
+            got = probe_pmtu_tracepath("192.0.2.10", 1200, 1472, 1.0, fwmark=0xCA6C)
+        self.assertEqual(got, 1380)
+        icmp.assert_called_once_with("192.0.2.10", 1200, 1472, 1.0, None, fwmark=0xCA6C)
+
+
+class TestSizeBackend(BackendContract, unittest.TestCase):
+    backend = staticmethod(pmtu.size_backend(_fake_ok))
+
+
+class TestSizeBackendBind(unittest.TestCase):
+    def test_bind_is_passed_to_make_ok(self) -> None:
+        seen: list[dict] = []
+
+        def make_ok(target: str, timeout: float, **bind: object):
+            seen.append(bind)
+            return _fake_ok(target, timeout)
+
+        with patch.dict(os.environ, {"FAKE_PMTU": "1400"}):
+            probe = pmtu.size_backend(make_ok)
+            self.assertEqual(probe("192.0.2.10", 1200, 1472, fwmark=0xCA6C), 1400)
+            probe("192.0.2.10", 1200, 1472, iface=None)
+        self.assertEqual(seen, [{"fwmark": 0xCA6C}, {}])
+
+    def test_make_ok_without_bind_support_is_rejected(self) -> None:
+        with self.assertRaises(TypeError):
+            pmtu.size_backend(_fake_ok)("192.0.2.10", 1200, 1472, iface="eth1")
+
+
+class TestUdpBackend(BackendContract, unittest.TestCase):
+    # the datagrams go out for real; whether one got through is faked
+    backend = staticmethod(probe_pmtu_udp)
+    target = "127.0.0.1:9"
+
+    def fake(self, pmtu_: int) -> contextlib.AbstractContextManager:
+        ok = _fake_ok("127.0.0.1", self.timeout)
+        return patch("automtu.udp._probe_once", side_effect=lambda s, seq, p: ok(p))
+
+
+class TestTcpBackend(BackendContract, unittest.TestCase):
+    # a real connection to a local listener; the kernel's path MTU is faked
+    backend = staticmethod(probe_pmtu_tcp)
+    timeout = 0.05
+
+    def setUp(self) -> None:
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.addCleanup(self.listener.close)
+        self.target = f"127.0.0.1:{self.listener.getsockname()[1]}"
+
+    def fake(self, pmtu_: int) -> contextlib.AbstractContextManager:
+        if not pmtu_:
+            self.listener.close()  # connection refused
+        stack = contextlib.ExitStack()
+        stack.enter_context(patch("automtu.tcp._path_mtu", return_value=pmtu_))
+        stack.enter_context(patch("automtu.tcp._mss_mtu", return_value=None))
+        return stack
+
+
+class TestRegistry(unittest.TestCase):
+    def tearDown(self) -> None:
+        pmtu._BACKENDS.pop("fake", None)
+
+    def test_register_and_select_by_prefix(self) -> None:
+        probe = pmtu.size_backend(_fake_ok)
+        pmtu.register_backend("fake", probe)
+        self.assertIs(pmtu.get_backend("fake"), probe)
+        self.assertIn("fake", pmtu.backend_names())
+        self.assertEqual(pmtu.split_engine("fake:host"), ("fake", "host"))
+        self.assertEqual(pmtu.split_engine("host", "tracepath"), ("tracepath", "host"))
+
+    def test_rejects_builtin_and_invalid_names(self) -> None:
+        for name in ("icmp", "udp", "not-valid", ""):
+            with self.assertRaises(ValueError):
+                pmtu.register_backend(name, pmtu.probe_pmtu)
+        with self.assertRaises(ValueError):
+            pmtu.get_backend("nope")
+
+    def test_cli_accepts_registered_backend(self) -> None:
+        pmtu.register_backend("fake", pmtu.size_backend(_fake_ok))
+        args = build_parser().parse_args(["--pmtu-backend", "fake"])
+        self.assertEqual(config_from_args(args).pmtu_backend, "fake")
+        args = build_parser().parse_args(["--pmtu-backend", "nope"])
+        with self.assertRaisesRegex(ValueError, "unknown probe backend: nope"):
+            config_from_args(args)
+
+    def test_cli_rejects_bad_target_port(self) -> None:
+        args = build_parser().parse_args(["--pmtu-target", "1.1.1.1,udp:10.0.0.1:abc"])
+        with self.assertRaisesRegex(ValueError, "invalid port"):
+            config_from_args(args)
+
+
+class TestParseTracepath(unittest.TestCase):
+    def test_resume_line(self) -> None:
+        text = (
+            " 1:  192.0.2.1   0.3ms pmtu 1420\n     Resume: pmtu 1420 hops 4 back 4\n"
+        )
+        self.assertEqual(parse_tracepath(text), 1420)
+
+    def test_not_reached(self) -> None:
+        self.assertIsNone(parse_tracepath("     Too many hops: pmtu 1500\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+import io
+import json
+import os
+import socket
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from automtu.boot import apply_known_good, only_changed, sd_notify
+from automtu.core import run_automtu
+
+
+class TestBoot(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def _notify_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self.dir / "notify"))
+        sock.settimeout(1.0)
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_sd_notify_sends_to_notify_socket(self) -> None:
+        sock = self._notify_socket()
+        with patch.dict(os.environ, {"NOTIFY_SOCKET": str(self.dir / "notify")}):
+            self.assertTrue(sd_notify("READY=1"))
+        self.assertEqual(sock.recv(64), b"READY=1")
+
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertFalse(sd_notify("READY=1"))
+
+    def test_apply_known_good_skips_missing_and_unchanged(self) -> None:
+        applied: list[tuple[str, int, bool]] = []
+        state = {"applied": {"eth0": 1420, "wg0": 1340, "docker0": 1420}}
+        mtus = {"eth0": 1500, "wg0": 1340}
+
+        with (
+            patch("automtu.boot.iface_exists", side_effect=lambda i: i in mtus),
+            patch("automtu.boot.read_iface_mtu", side_effect=lambda i: mtus[i]),
+        ):
+            changed = apply_known_good(
+                state,
+                lambda i, m, d: applied.append((i, m, d)),
+                dry=False,
+                log=lambda m: None,
+            )
+
+        self.assertEqual(changed, {"eth0": 1420})
+        self.assertEqual(applied, [("eth0", 1420, False)])
+
+    def test_only_changed_leaves_matching_iface_alone(self) -> None:
+        applied: list[tuple[str, int, bool]] = []
+        apply = only_changed(lambda i, m, d: applied.append((i, m, d)), lambda m: None)
+
+        with patch("automtu.boot.read_iface_mtu", return_value=1420):
+            apply("eth0", 1420, False)
+            apply("eth0", 1400, False)
+
+        self.assertEqual(applied, [("eth0", 1400, False)])
+
+    def test_fast_start_applies_known_good_before_probing(self) -> None:
+        state_file = self.dir / "state.json"
+        state_file.write_text(json.dumps({"version": 1, "applied": {"eth0": 1420}}))
+        sock = self._notify_socket()
+        mtus = {"eth0": 1500}
+        calls: list[str] = []
+
+        def set_mtu(iface: str, mtu: int, dry: bool) -> None:
+            calls.append(f"set {iface} {mtu}")
+            mtus[iface] = mtu
+
+        def probe(*a: object, **kw: object) -> int:
+            calls.append("ready" if sock.recv(256).startswith(b"READY=1") else "?")
+            return 1400
+
+        args = SimpleNamespace(
+            dry_run=False,
+            egress_if="eth0",
+            prefer_wg_egress=False,
+            force_egress_mtu=None,
+            pmtu_target=["192.0.2.1"],
+            auto_pmtu_from_wg=False,
+            pmtu_min_payload=1200,
+            pmtu_max_payload=1472,
+            pmtu_timeout=1.0,
+            pmtu_policy="min",
+            apply_egress_mtu=True,
+            apply_wg_mtu=False,
+            apply_docker_mtu=False,
+            apply_all=False,
+            docker_if=None,
+            docker_no_user_bridges=False,
+            wg_if="wg0",
+            wg_overhead=80,
+            wg_min=1280,
+            set_wg_mtu=None,
+            persist=None,
+            uninstall=False,
+            print_mtu=None,
+            print_json=False,
+            state_file=str(state_file),
+            fast_start=True,
+        )
+        with (
+            patch.dict(os.environ, {"NOTIFY_SOCKET": str(self.dir / "notify")}),
+            patch("automtu.core.require_root", return_value=None),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.boot.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.boot.read_iface_mtu", side_effect=lambda i: mtus[i]),
+            patch("automtu.core.probe_pmtu", side_effect=probe),
+            patch("automtu.core.set_iface_mtu", side_effect=set_mtu),
+            patch("automtu.core.wg_is_active", return_value=False),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            redirect_stdout(io.StringIO()),
+        ):
+            rc = run_automtu(args)
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(calls, ["set eth0 1420", "ready", "set eth0 1400"])
+        saved = json.loads(state_file.read_text())
+        self.assertEqual(saved["applied"], {"eth0": 1400})
+
+    def test_fast_start_needs_state_file(self) -> None:
+        args = SimpleNamespace(
+            dry_run=True,
+            egress_if="eth0",
+            prefer_wg_egress=False,
+            force_egress_mtu=None,
+            pmtu_target=None,
+            auto_pmtu_from_wg=False,
+            pmtu_min_payload=1200,
+            pmtu_max_payload=1472,
+            pmtu_timeout=1.0,
+            pmtu_policy="min",
+            apply_egress_mtu=True,
+            apply_wg_mtu=False,
+            apply_docker_mtu=False,
+            apply_all=False,
+            wg_if="wg0",
+            wg_overhead=80,
+            wg_min=1280,
+            set_wg_mtu=None,
+            persist=None,
+            print_mtu=None,
+            print_json=False,
+            fast_start=True,
+        )
+        with patch("sys.stderr", new_callable=io.StringIO):
+            self.assertEqual(run_automtu(args), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,13 @@
 import io
+import json
 import unittest
 from contextlib import redirect_stdout
 from types import SimpleNamespace
 from unittest.mock import patch
 
-from automtu.core import run_automtu
+from automtu import Config, run
+from automtu.core import _resolve_targets, run_automtu
+from automtu.resolve import DnsCache
 
 
 class TestCore(unittest.TestCase):
@@ -163,6 +166,106 @@ class TestCore(unittest.TestCase):
         self.assertEqual(rc, 0)
         mock_set.assert_not_called()
 
+    def test_resolve_targets_both_families_keys_and_addresses(self) -> None:
+        answers = {
+            ("peer.example", "4"): ["192.0.2.10"],
+            ("peer.example", "6"): [],
+        }
+        with patch("automtu.core.resolve_hosts", return_value=answers) as p_res:
+            keys, addrs = _resolve_targets(
+                ["peer.example", "1.1.1.1", "udp:peer.example:9"], "both", DnsCache()
+            )
+
+        p_res.assert_called_once()
+        self.assertEqual(list(p_res.call_args.args[0]), ["peer.example"])
+        self.assertEqual(
+            keys,
+            ["peer.example@ipv4", "peer.example@ipv6", "1.1.1.1", "udp:peer.example:9"],
+        )
+        self.assertEqual(
+            addrs, {"peer.example@ipv4": "192.0.2.10", "peer.example@ipv6": None}
+        )
+
+    def test_run_automtu_auto_wg_overhead_ipv4_only_peers(self) -> None:
+        args = SimpleNamespace(
+            dry_run=True,
+            egress_if="eth0",
+            prefer_wg_egress=False,
+            force_egress_mtu=None,
+            pmtu_target=None,
+            auto_pmtu_from_wg=False,
+            pmtu_min_payload=1200,
+            pmtu_max_payload=1472,
+            pmtu_timeout=1.0,
+            pmtu_policy="min",
+            apply_egress_mtu=False,
+            apply_wg_mtu=False,
+            apply_docker_mtu=False,
+            apply_all=False,
+            docker_if=None,
+            docker_no_user_bridges=False,
+            wg_if="wg0",
+            wg_overhead="auto",
+            wg_min=1280,
+            set_wg_mtu=None,
+            persist=None,
+            uninstall=False,
+            print_mtu=None,
+            print_json=True,
+        )
+
+        with (
+            patch("automtu.core.require_root", return_value=None),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.core.wg_is_active", return_value=True),
+            patch(
+                "automtu.core.wg_peer_endpoints",
+                return_value=["46.4.224.77", "peer.example"],
+            ),
+            patch(
+                "automtu.core.resolve_hosts",
+                return_value={("peer.example", "auto"): ["192.0.2.10"]},
+            ),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+        ):
+            buf = io.StringIO()
+            with redirect_stdout(buf):
+                rc = run_automtu(args)
+
+        self.assertEqual(rc, 0)
+        payload = json.loads(buf.getvalue())
+        self.assertEqual(payload["wg"]["overhead"], 60)
+        self.assertEqual(payload["wg"]["mtu"], 1440)
+        detail = payload["wg"]["overhead_detail"]
+        self.assertEqual(detail["mode"], "auto")
+        self.assertEqual(detail["outer_family"], "ipv4")
+        self.assertEqual(
+            detail["endpoints"], {"46.4.224.77": "ipv4", "peer.example": "ipv4"}
+        )
+
+    def test_max_payload_follows_iface_mtu_and_family(self) -> None:
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="eth0"),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=9000),
+            patch("automtu.core.wg_is_active", return_value=False),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            patch("automtu.core.probe_pmtu", return_value=9000) as icmp,
+            patch("automtu.core.probe_pmtu_udp", return_value=9000) as udp,
+        ):
+            result = run(
+                Config(pmtu_target=("192.0.2.1,2001:db8::1,udp:[2001:db8::2]:5000",)),
+                apply=lambda iface, mtu, dry: None,
+            )
+
+        self.assertEqual(result.effective_mtu, 9000)
+        his = {c.args[0]: c.args[2] for c in icmp.call_args_list + udp.call_args_list}
+        self.assertEqual(
+            his,
+            {"192.0.2.1": 8972, "2001:db8::1": 8952, "[2001:db8::2]:5000": 8952},
+        )
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch
 
-import automtu.docker as docker
+from automtu import docker
 
 
 class TestDocker(unittest.TestCase):
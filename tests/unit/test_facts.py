@@ -0,0 +1,78 @@
+import json
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from automtu import Config, run
+from automtu.facts import build_facts, load_facts, write_facts
+
+
+class TestFacts(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "facts.d" / "automtu.fact"
+
+    def _run(self, probe):  # type: ignore[no-untyped-def]
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="eth0"),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.core.wg_is_active", return_value=False),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+        ):
+            return run(
+                Config(pmtu_target=("a,b",), facts_file=str(self.path)),
+                probe=probe,
+                apply=lambda iface, mtu, dry: None,
+            )
+
+    def test_run_writes_facts(self) -> None:
+        self._run(lambda t, hint: {"a": 1420, "b": None}[t])
+
+        facts = json.loads(self.path.read_text())
+        self.assertEqual(facts["effective_mtu"], 1420)
+        self.assertEqual(facts["egress"], {"iface": "eth0", "mtu": 1500})
+        self.assertEqual(facts["wg"]["mtu"], 1340)
+        self.assertEqual(facts["pmtu"]["targets"]["a"]["pmtu"], 1420)
+        self.assertIsInstance(facts["pmtu"]["targets"]["a"]["ts"], float)
+        self.assertEqual(facts["pmtu"]["targets"]["b"], {"pmtu": None, "ts": None})
+        mode = stat.S_IMODE(os.stat(self.path).st_mode)
+        self.assertEqual(mode, 0o644)
+        self.assertEqual(os.listdir(self.path.parent), ["automtu.fact"])
+
+    def test_failed_probe_keeps_previous_target_fact(self) -> None:
+        self._run(lambda t, hint: 1420)
+        before = load_facts(self.path)["pmtu"]["targets"]["b"]
+        self._run(lambda t, hint: {"a": 1400, "b": None}[t])
+
+        targets = load_facts(self.path)["pmtu"]["targets"]
+        self.assertEqual(targets["a"]["pmtu"], 1400)
+        self.assertEqual(targets["b"], before)
+
+    def test_skipped_targets_are_not_refreshed(self) -> None:
+        result = SimpleNamespace(
+            pmtu_results={"a": 1380},
+            effective_mtu=1380,
+            base_mtu=1500,
+            wg_mtu=1300,
+            egress_iface="eth0",
+            wg_iface="wg0",
+            pmtu_policy="min",
+            pmtu_chosen=1380,
+        )
+
+        previous = {"pmtu": {"targets": {"a": {"pmtu": 1420, "ts": 1.0}}}}
+        facts = build_facts(result, previous, now=2.0, skip=["a"])
+        self.assertEqual(facts["pmtu"]["targets"]["a"], {"pmtu": 1420, "ts": 1.0})
+
+        write_facts(self.path, facts)
+        self.assertEqual(load_facts(self.path), facts)
+
+
+if __name__ == "__main__":
+    unittest.main()
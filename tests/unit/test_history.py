@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from automtu.history import History, reduce_history
+
+
+class TestHistory(unittest.TestCase):
+    def test_ring_buffer_keeps_last_capacity_samples_across_reopen(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "h.sqlite"
+            h = History(path, capacity=4)
+            for mtu in (1500, 1492, 1480, 1472, 1460, 1452):
+                h.add("a", mtu)
+            h.close()
+
+            h = History(path, capacity=4)
+            self.assertEqual(h.samples("a"), [1480, 1472, 1460, 1452])
+            self.assertEqual(h.samples("missing"), [])
+            h.close()
+
+    def test_policies(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            h = History(Path(d) / "h.sqlite", capacity=64)
+            for mtu in [1500] * 18 + [1280, 1500]:
+                h.add("a", mtu)
+
+            # one 1280 outlier among 20 samples: p10 (rank 2) ignores it
+            self.assertEqual(reduce_history(h, "a", "p10"), 1500)
+            self.assertEqual(reduce_history(h, "a", "min-window", window=2), 1280)
+            self.assertEqual(reduce_history(h, "a", "min-window", window=1), 1500)
+            # 1500 -> 0.3*1280 + 0.7*1500 = 1434 -> 0.3*1500 + 0.7*1434 = 1453.8
+            self.assertEqual(reduce_history(h, "a", "ewma"), 1453)
+            self.assertIsNone(reduce_history(h, "b", "p10"))
+            h.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import io
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import Config, run
+from automtu.cli import build_hotplug_parser
+from automtu.hotplug import (
+    IFLA_IFNAME,
+    IFLA_INFO_KIND,
+    IFLA_LINKINFO,
+    IFLA_MTU,
+    RTM_DELLINK,
+    RTM_NEWLINK,
+    Link,
+    Selectors,
+    handle_links,
+    new_links,
+    parse_links,
+    resync,
+    run_hotplug,
+)
+from automtu.state import load_state
+
+
+def _attr(kind: int, value: bytes) -> bytes:
+    data = struct.pack("=HH", 4 + len(value), kind) + value
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _newlink(
+    index: int,
+    name: str,
+    mtu: int,
+    kind: str = "",
+    *,
+    up: bool = True,
+    msg_type: int = RTM_NEWLINK,
+) -> bytes:
+    attrs = _attr(IFLA_IFNAME, name.encode() + b"\0") + _attr(
+        IFLA_MTU, struct.pack("=I", mtu)
+    )
+    if kind:
+        attrs += _attr(IFLA_LINKINFO, _attr(IFLA_INFO_KIND, kind.encode() + b"\0"))
+    body = struct.pack("=BxHiII", 0, 1, index, int(up), 0) + attrs
+    return struct.pack("=IHHII", 16 + len(body), msg_type, 0, 0, 0) + body
+
+
+class TestHotplug(unittest.TestCase):
+    def test_parse_links_from_one_datagram(self) -> None:
+        data = _newlink(7, "br-0a1b2c", 1500, "bridge") + _newlink(
+            8, "wg0", 1420, up=False
+        )
+        self.assertEqual(
+            parse_links(data),
+            [Link(7, "br-0a1b2c", 1500, "bridge", True), Link(8, "wg0", 1420, None)],
+        )
+        self.assertEqual(
+            parse_links(data[:-3]), [Link(7, "br-0a1b2c", 1500, "bridge", True)]
+        )
+
+    def test_only_links_new_since_start_are_reported_once_up(self) -> None:
+        seen = {1, 2}  # eth0, wg0 existed when listening started
+        self.assertEqual(new_links(_newlink(2, "wg0", 1380), seen), [])  # MTU change
+        self.assertEqual(new_links(_newlink(9, "wg1", 1420, up=False), seen), [])
+        self.assertEqual(
+            [link.name for link in new_links(_newlink(9, "wg1", 1420), seen)], ["wg1"]
+        )
+        self.assertEqual(new_links(_newlink(9, "wg1", 1380), seen), [])  # handled
+
+        gone = _newlink(2, "wg0", 1380, msg_type=RTM_DELLINK)
+        self.assertEqual(new_links(gone + _newlink(2, "wg0", 1420), seen)[0].index, 2)
+
+    def test_resync_after_overrun_reports_missed_links(self) -> None:
+        seen = {1, 5}
+        links = [Link(1, "eth0", 1500, up=True), Link(6, "br-1", 1500, up=True)]
+        with patch("automtu.hotplug.dump_links", return_value=links):
+            self.assertEqual(resync(seen), [links[1]])
+        self.assertEqual(seen, {1, 6})
+
+    def test_links_created_while_subscribing_are_handled(self) -> None:
+        before = [Link(1, "eth0", 1500, up=True)]
+        after = [*before, Link(7, "br-new", 1500, "bridge", up=True)]
+        with tempfile.TemporaryDirectory() as tmp:
+            args = build_hotplug_parser().parse_args(
+                ["--apply-docker-mtu", "--state-file", str(Path(tmp) / "s.json")]
+            )
+            with (
+                patch("automtu.net.require_root"),
+                patch("automtu.hotplug.dump_links", side_effect=[before, after]),
+                patch("automtu.hotplug.open_link_socket") as sock,
+                patch("automtu.hotplug.handle_links") as handle,
+                patch("sys.stderr", io.StringIO()),
+            ):
+                sock.return_value.recv.side_effect = KeyboardInterrupt
+                self.assertEqual(run_hotplug(args), 0)
+
+        handle.assert_called_once()
+        self.assertEqual(handle.call_args.args[0], [after[1]])
+
+    def test_selected_links_get_cached_mtu(self) -> None:
+        state = {"mtus": {"effective": 1420, "wg": 1340}, "applied": {"docker0": 1400}}
+        selectors = Selectors(docker=True, wg_if="wg0")
+        applied: list[tuple[str, int]] = []
+
+        changed = handle_links(
+            [
+                Link(1, "br-0a1b2c", 1500),
+                Link(2, "docker0", 1500),
+                Link(3, "wg0", 1420),
+                Link(4, "veth12ab", 1500),
+                Link(5, "br-0a1b2c", 1420),  # our own change coming back
+            ],
+            state,
+            selectors,
+            lambda iface, mtu, dry: applied.append((iface, mtu)),
+            dry=False,
+            log=lambda m: None,
+        )
+
+        self.assertEqual(
+            applied, [("br-0a1b2c", 1420), ("docker0", 1400), ("wg0", 1340)]
+        )
+        self.assertEqual(changed, dict(applied))
+
+    def test_explicit_docker_names_and_nothing_cached(self) -> None:
+        selectors = Selectors(docker=True, docker_if=("docker0,br-x",))
+        self.assertIsNone(selectors.role("br-0a1b2c"))
+        self.assertEqual(selectors.role("br-x"), "effective")
+        self.assertIsNone(Selectors(wg_if="wg0").role("docker0"))
+
+        changed = handle_links(
+            [Link(1, "br-x", 1500)], {}, selectors, None, dry=False, log=lambda m: None
+        )
+        self.assertEqual(changed, {})
+
+    def test_run_caches_mtus_for_hotplug(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            with (
+                patch("automtu.core.detect_egress_iface", return_value="eth0"),
+                patch("automtu.core.iface_exists", return_value=True),
+                patch("automtu.core.read_iface_mtu", return_value=1500),
+                patch("automtu.core.wg_is_active", return_value=False),
+                patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            ):
+                run(
+                    Config(pmtu_target=("a",), state_file=str(path)),
+                    probe=lambda t, hint: 1420,
+                    apply=lambda iface, mtu, dry: None,
+                )
+            state = load_state(path)
+
+        self.assertEqual(state["mtus"], {"effective": 1420, "wg": 1340})
+        self.assertNotIn("applied", state)
+
+
+if __name__ == "__main__":
+    unittest.main()
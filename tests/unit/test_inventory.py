@@ -0,0 +1,143 @@
+import io
+import json
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import inventory
+from automtu.cli import build_parser
+from automtu.core import _choose, run_automtu
+
+
+class TestInventory(unittest.TestCase):
+    def test_choose_from_counts_matches_choose(self) -> None:
+        for values in ([1500], [1420, 1500], [1400, 1420, 1500, 1500], [1, 2, 3]):
+            for policy in ("min", "median", "max"):
+                self.assertEqual(
+                    inventory.choose_from_counts(Counter(values), policy),
+                    _choose(values, policy),
+                    (values, policy),
+                )
+        self.assertIsNone(inventory.choose_from_counts(Counter(), "min"))
+
+    def test_iter_target_file_skips_blanks_and_comments(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "targets.txt"
+            p.write_text("# mirrors\n1.1.1.1\n\n  8.8.8.8  # dns\n")
+            self.assertEqual(
+                list(inventory.iter_target_file(str(p))), ["1.1.1.1", "8.8.8.8"]
+            )
+
+    def test_run_inventory_streams_lines_and_summary(self) -> None:
+        results = {"a": 1500, "b": None, "c": 1420}
+        out = io.StringIO()
+
+        summary = inventory.run_inventory(
+            iter(["a", "b", "c"]), results.get, policy="min", workers=2, out=out
+        )
+
+        lines = [json.loads(x) for x in out.getvalue().splitlines()]
+        per_target = {x["target"]: x["pmtu"] for x in lines[:-1]}
+        self.assertEqual(per_target, results)
+        self.assertEqual(lines[-1], {"summary": summary})
+        self.assertEqual(summary["chosen"], 1420)
+        self.assertEqual(summary["probed"], 3)
+        self.assertEqual(summary["failed"], 1)
+
+    def test_run_inventory_reports_probe_errors_and_goes_on(self) -> None:
+        def probe(t: str) -> int:
+            if t == "bad":
+                raise ValueError("invalid port")
+            return 1420
+
+        out = io.StringIO()
+        summary = inventory.run_inventory(
+            iter(["a", "bad", "c"]), probe, policy="min", out=out
+        )
+
+        lines = {
+            x["target"]: x for x in map(json.loads, out.getvalue().splitlines()[:-1])
+        }
+        self.assertEqual(
+            lines["bad"],
+            {"target": "bad", "pmtu": None, "error": "ValueError: invalid port"},
+        )
+        self.assertEqual((summary["probed"], summary["failed"]), (3, 1))
+        self.assertEqual(summary["chosen"], 1420)
+
+    def test_run_inventory_resumes_from_checkpoint(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            ckpt = Path(d) / "ckpt.jsonl"
+            ckpt.write_text(
+                '{"pmtu": 1400, "target": "a"}\n{"pmtu": 14'  # torn last line
+            )
+            probed: list[str] = []
+
+            def probe(t: str) -> int:
+                probed.append(t)
+                return 1500
+
+            summary = inventory.run_inventory(
+                iter(["a", "b"]),
+                probe,
+                policy="min",
+                checkpoint=ckpt,
+                out=io.StringIO(),
+            )
+            records = [json.loads(x) for x in ckpt.read_text().splitlines()[2:]]
+
+        self.assertEqual(probed, ["b"])
+        self.assertEqual(summary["resumed"], 1)
+        self.assertEqual(summary["chosen"], 1400)
+        self.assertEqual(records, [{"pmtu": 1500, "target": "b"}])
+
+    def test_cli_inventory_resolves_and_bounds_like_single_host(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "targets.txt"
+            p.write_text("mirror.example.org\n192.0.2.9\n")
+            args = build_parser().parse_args(
+                ["--pmtu-target-file", str(p), "--pmtu-family", "both"]
+            )
+            answers = {
+                ("mirror.example.org", "4"): ["198.51.100.4"],
+                ("mirror.example.org", "6"): ["2001:db8::4"],
+            }
+            pmtus = {"198.51.100.4": 9000, "2001:db8::4": 1480, "192.0.2.9": 1400}
+            out = io.StringIO()
+            with (
+                patch("automtu.core.detect_egress_iface", return_value="eth0"),
+                patch("automtu.core.iface_exists", return_value=True),
+                patch("automtu.core.read_iface_mtu", return_value=9000),
+                patch("automtu.core.resolve_hosts", return_value=answers),
+                patch(
+                    "automtu.core.probe_pmtu",
+                    side_effect=lambda t, lo, hi, *a, **kw: pmtus[t],
+                ) as probe,
+                patch(
+                    "automtu.core.run_inventory",
+                    side_effect=lambda *a, **kw: inventory.run_inventory(
+                        *a, **kw, out=out
+                    ),
+                ),
+            ):
+                self.assertEqual(run_automtu(args), 0)
+
+        lines = [json.loads(x) for x in out.getvalue().splitlines()]
+        self.assertEqual(
+            lines[:2],
+            [
+                {"target": "mirror.example.org", "pmtu": 1480},  # lowest family
+                {"target": "192.0.2.9", "pmtu": 1400},
+            ],
+        )
+        # probed at the resolved addresses, bounded by the egress MTU
+        hi = {c.args[0]: c.args[2] for c in probe.call_args_list}
+        self.assertEqual(
+            hi, {"198.51.100.4": 8972, "2001:db8::4": 8952, "192.0.2.9": 8972}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
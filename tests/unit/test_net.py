@@ -2,7 +2,7 @@ import unittest
 from pathlib import Path
 from unittest.mock import patch
 
-import automtu.net as net
+from automtu import net
 
 
 class TestNet(unittest.TestCase):
@@ -30,6 +30,26 @@ class TestNet(unittest.TestCase):
             # ignore_vpn=False -> first seen is wg0
             self.assertEqual(net.detect_egress_iface(ignore_vpn=False), "wg0")
 
+    def test_detect_egress_ifaces_lists_every_default_link(self) -> None:
+        ip4_default = (
+            "default proto static metric 100\n"
+            "\tnexthop via 10.0.0.1 dev eth0 weight 1\n"
+            "\tnexthop via 10.1.0.1 dev eth1 weight 1\n"
+            "default via 192.168.8.1 dev wwan0 metric 600\n"
+        )
+
+        def fake_run(cmd: list[str]) -> str:
+            if cmd[:4] == ["ip", "-4", "route", "show"]:
+                return ip4_default.strip()
+            return ""
+
+        with (
+            patch("automtu.net._run", side_effect=fake_run),
+            patch("automtu.net.iface_exists", return_value=True),
+        ):
+            self.assertEqual(net.detect_egress_ifaces(), ["eth0", "eth1", "wwan0"])
+            self.assertEqual(net.detect_egress_iface(), "eth0")
+
     def test_default_route_uses_iface_true_false(self) -> None:
         ip4_default = "default via 10.0.0.1 dev eth0\n"
         ip6_default = ""
@@ -0,0 +1,112 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from contextlib import nullcontext
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import netns
+from automtu.netns import Namespace
+
+
+def _can_unshare() -> bool:
+    if os.geteuid() != 0 or shutil.which("unshare") is None:
+        return False
+    return subprocess.run(["unshare", "--net", "true"], check=False).returncode == 0
+
+
+class TestNetns(unittest.TestCase):
+    def test_list_namespaces_dedupes_by_inode_and_skips_own(self) -> None:
+        with tempfile.TemporaryDirectory() as td:
+            root = Path(td)
+            proc, run = root / "proc", root / "run"
+            for d in ("self/ns", "1/ns", "42/ns", "43/ns"):
+                (proc / d).mkdir(parents=True)
+            run.mkdir()
+            (proc / "self/ns/net").write_text("host")
+            os.link(proc / "self/ns/net", proc / "1/ns/net")  # host namespace
+            (run / "blue").write_text("blue")
+            os.link(run / "blue", proc / "42/ns/net")  # same namespace as "blue"
+            (proc / "43/ns/net").write_text("pod")
+
+            found = netns.list_namespaces(str(proc), str(run))
+
+        self.assertEqual([ns.name for ns in found], ["blue", "pid:43"])
+
+    def test_parse_links_strips_veth_peer_suffix(self) -> None:
+        text = (
+            "1: lo: <LOOPBACK,UP> mtu 65536 qdisc noqueue state UNKNOWN\n"
+            "3: eth0@if17: <BROADCAST,MULTICAST,UP> mtu 1500 qdisc noqueue\n"
+        )
+        self.assertEqual(netns.parse_links(text), {"lo": 65536, "eth0": 1500})
+
+    def test_fan_out_applies_matching_ifaces_per_namespace(self) -> None:
+        calls: list[list[str]] = []
+
+        def fake_run(cmd: list[str]) -> str:
+            calls.append(cmd)
+            return (
+                "1: lo: <LOOPBACK> mtu 65536\n"
+                "2: eth0@if9: <UP> mtu 1500\n"
+                "3: net1@if10: <UP> mtu 1420\n"
+            )
+
+        def fake_entered(path: str):  # type: ignore[no-untyped-def]
+            if path == "/bad":
+                raise PermissionError("Operation not permitted")
+            return nullcontext()
+
+        with (
+            patch("automtu.netns._entered", side_effect=fake_entered),
+            patch("automtu.netns._run", side_effect=fake_run),
+        ):
+            results = netns.fan_out(
+                [Namespace("a", "/a"), Namespace("b", "/bad")],
+                1420,
+                patterns=("eth*", "net*"),
+                workers=2,
+            )
+
+        self.assertEqual(
+            results[0]["ifaces"],
+            {
+                "eth0": {"before": 1500, "changed": True},
+                "net1": {"before": 1420, "changed": False},
+            },
+        )
+        self.assertIn(["ip", "link", "set", "mtu", "1420", "dev", "eth0"], calls)
+        self.assertNotIn(["ip", "link", "set", "mtu", "1420", "dev", "net1"], calls)
+        self.assertEqual(results[1]["ns"], "b")
+        self.assertIn("not permitted", results[1]["error"])
+
+    @unittest.skipUnless(_can_unshare(), "needs root and unshare")
+    def test_real_namespace_from_unshare(self) -> None:
+        host_lo = Path("/sys/class/net/lo/mtu").read_text()
+        proc = subprocess.Popen(["unshare", "--net", "sleep", "10"])
+        try:
+            path = f"/proc/{proc.pid}/ns/net"
+            for _ in range(50):  # wait for unshare to exec into the new namespace
+                if os.stat(path).st_ino != os.stat("/proc/self/ns/net").st_ino:
+                    break
+                time.sleep(0.02)
+            ns = Namespace(f"pid:{proc.pid}", path)
+            self.assertIn(ns, netns.list_namespaces())
+
+            [result] = netns.fan_out([ns], 1400, patterns=("lo",))
+            self.assertIsNone(result["error"])
+            self.assertEqual(result["ifaces"]["lo"]["changed"], True)
+
+            [again] = netns.fan_out([ns], 1400, patterns=("lo",))
+            self.assertEqual(again["ifaces"]["lo"], {"before": 1400, "changed": False})
+        finally:
+            proc.kill()
+            proc.wait()
+        # the host namespace is untouched
+        self.assertEqual(Path("/sys/class/net/lo/mtu").read_text(), host_lo)
+
+
+if __name__ == "__main__":
+    unittest.main()
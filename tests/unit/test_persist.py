@@ -4,7 +4,7 @@ from contextlib import redirect_stdout
 from pathlib import Path
 from unittest.mock import patch
 
-import automtu.persist as persist
+from automtu import persist
 
 
 class TestPersist(unittest.TestCase):
@@ -112,6 +112,48 @@ class TestPersist(unittest.TestCase):
         self.assertIn("DRY-RUN", s)
         self.assertIn("automtu-docker.service", s)
 
+    def test_persist_systemd_fast_start_uses_notify_unit(self) -> None:
+        argv = ["automtu", "--apply-wg-mtu", "--fast-start", "--persist", "systemd"]
+
+        with (
+            patch("automtu.persist.shutil.which", return_value="/usr/bin/automtu"),
+            patch("automtu.persist._SYSTEMD_UNIT_PATH", Path("/tmp/automtu.service")),
+        ):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                persist.persist_systemd(argv, dry=True)
+
+        s = out.getvalue()
+        self.assertIn("Type=notify\n", s)
+        self.assertIn(
+            "ExecStart=/usr/bin/automtu --apply-wg-mtu --fast-start --state-file\n", s
+        )
+
+    def test_persist_systemd_timer_dry_run_prints_service_and_timer(self) -> None:
+        argv = [
+            "automtu",
+            "--apply-wg-mtu",
+            "--persist",
+            "systemd-timer",
+            "--timer-interval",
+            "30min",
+            "--timer-random-delay=10min",
+        ]
+
+        with patch("automtu.persist.shutil.which", return_value="/usr/bin/automtu"):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                persist.persist_systemd_timer(
+                    argv, dry=True, interval="30min", random_delay="10min"
+                )
+
+        s = out.getvalue()
+        self.assertIn("ExecStart=/usr/bin/automtu --apply-wg-mtu --state-file\n", s)
+        self.assertIn("OnUnitActiveSec=30min", s)
+        self.assertIn("RandomizedDelaySec=10min", s)
+        self.assertIn("WantedBy=timers.target", s)
+        self.assertIn("systemctl enable --now automtu-revalidate.timer", s)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -1,7 +1,12 @@
+import json
+import subprocess
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import patch
 
-import automtu.pmtu as pmtu
+from automtu import pmtu
+from automtu.trace import Tracer, tracing
 
 
 class TestPmtu(unittest.TestCase):
@@ -31,6 +36,131 @@ class TestPmtu(unittest.TestCase):
             )
             self.assertIsNone(mtu)
 
+    def test_probe_pmtu_hint_confirmed_with_two_probes(self) -> None:
+        sent: list[int] = []
+
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            sent.append(payload)
+            return payload <= 1392
+
+        with (
+            patch("automtu.pmtu._is_ipv6", return_value=False),
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+        ):
+            mtu = pmtu.probe_pmtu("1.1.1.1", 1200, 1472, 1.0, hint=1420)
+
+        self.assertEqual(mtu, 1420)
+        self.assertEqual(sent, [1392, 1393])
+
+    def test_probe_pmtu_stale_hint_falls_back_to_narrowed_search(self) -> None:
+        sent: list[int] = []
+
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            sent.append(payload)
+            return payload <= 1300
+
+        with (
+            patch("automtu.pmtu._is_ipv6", return_value=False),
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+        ):
+            mtu = pmtu.probe_pmtu("1.1.1.1", 1200, 1472, 1.0, hint=1420)
+
+        self.assertEqual(mtu, 1328)
+        # hint failed -> search is bounded above by the hint
+        self.assertEqual(sent[0], 1392)
+        self.assertTrue(all(p < 1392 for p in sent[1:]))
+
+    def test_probe_pmtu_hint_grown_path_searches_above_hint(self) -> None:
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            return payload <= 1450
+
+        with (
+            patch("automtu.pmtu._is_ipv6", return_value=False),
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+        ):
+            mtu = pmtu.probe_pmtu("1.1.1.1", 1200, 1472, 1.0, hint=1420)
+
+        self.assertEqual(mtu, 1478)
+
+    def _jumbo(self, path_mtu: int, v6: bool = False) -> tuple:
+        sent: list[int] = []
+        hdr = 48 if v6 else 28
+
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            sent.append(payload)
+            return payload + hdr <= path_mtu
+
+        with (
+            patch("automtu.pmtu._is_ipv6", return_value=v6),
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+        ):
+            mtu = pmtu.probe_pmtu("192.0.2.1", 1200, 9000 - hdr, 1.0)
+        return mtu, sent
+
+    def test_jumbo_path_confirmed_with_one_probe(self) -> None:
+        self.assertEqual(self._jumbo(9000), (9000, [8972]))
+
+    def test_jumbo_link_standard_path_gallops_to_plateau(self) -> None:
+        self.assertEqual(self._jumbo(1500), (1500, [8972, 1472, 1473]))
+        mtu, sent = self._jumbo(1500, v6=True)
+        self.assertEqual((mtu, sent[-2:]), (1500, [1452, 1453]))
+
+    def test_jumbo_link_odd_path_bisects_between_plateaus(self) -> None:
+        mtu, sent = self._jumbo(1440)
+        self.assertEqual(mtu, 1440)
+        # 1450 fails, 1420 passes but is not the top: bisect between the two
+        self.assertEqual(sent[:8], [8972, 1472, 1464, 1452, 1448, 1422, 1392, 1393])
+        self.assertTrue(all(1393 < p < 1422 for p in sent[8:]))
+        self.assertLessEqual(len(sent), 13)
+
+    def test_ping_binds_to_iface_and_fwmark(self) -> None:
+        with patch("automtu.pmtu._rc", return_value=0) as rc:
+            self.assertTrue(
+                pmtu._ping_ok(1372, "192.0.2.1", 1.0, iface="eth1", fwmark=51820)
+            )
+        cmd = rc.call_args[0][0]
+        self.assertEqual(cmd[:5], ["ping", "-m", "51820", "-I", "eth1"])
+        self.assertEqual(cmd[-1], "192.0.2.1")
+
+    def test_split_engine_prefix(self) -> None:
+        self.assertEqual(pmtu.split_engine("udp:host:5000"), ("udp", "host:5000"))
+        self.assertEqual(pmtu.split_engine("1.1.1.1"), ("icmp", "1.1.1.1"))
+        self.assertEqual(pmtu.split_engine("2001:db8::1"), ("icmp", "2001:db8::1"))
+
+    def test_trace_records_every_probe_with_outcome_and_step(self) -> None:
+        def fake_run(cmd, **kwargs):  # type: ignore[no-untyped-def]
+            payload = int(cmd[cmd.index("-s") + 1])
+            if payload <= 1372:
+                out = (
+                    f"PING 1.1.1.1 (1.1.1.1) {payload}({payload + 28}) bytes of data.\n"
+                    f"{payload + 8} bytes from 1.1.1.1: icmp_seq=1 ttl=57 time=11.4 ms\n"
+                )
+                return subprocess.CompletedProcess(cmd, 0, out)
+            out = (
+                f"PING 1.1.1.1 (1.1.1.1) {payload}({payload + 28}) bytes of data.\n"
+                "From 10.0.0.1 icmp_seq=1 Frag needed and DF set (mtu = 1400)\n"
+            )
+            return subprocess.CompletedProcess(cmd, 1, out)
+
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "trace.jsonl"
+            with (
+                patch("automtu.pmtu.subprocess.run", side_effect=fake_run),
+                tracing(Tracer(path)),
+            ):
+                mtu = pmtu.probe_pmtu("1.1.1.1", 1200, 1472, 1.0)
+            recs = [json.loads(x) for x in path.read_text().splitlines()]
+
+        self.assertEqual(mtu, 1400)
+        self.assertEqual(recs[0]["step"], "floor")
+        self.assertEqual(recs[0]["outcome"], "ok")
+        self.assertEqual(recs[0]["addr"], "1.1.1.1")
+        self.assertEqual(recs[0]["rtt_ms"], 11.4)
+        self.assertTrue(all(r["step"] == "bisect" for r in recs[1:]))
+        too_big = [r for r in recs if r["outcome"] == "too-big"]
+        self.assertTrue(too_big)
+        self.assertEqual(too_big[0]["mtu"], 1400)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,156 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import AutoMTUError, Config, run
+from automtu.replay import load_session
+from automtu.trace import Tracer, recording
+
+
+def _host_patches():  # type: ignore[no-untyped-def]
+    return (
+        patch("automtu.core.detect_egress_iface", return_value="eth0"),
+        patch("automtu.core.iface_exists", return_value=True),
+        patch("automtu.core.read_iface_mtu", return_value=1500),
+        patch("automtu.core.wg_is_active", return_value=False),
+        patch("automtu.core.detect_docker_ifaces", return_value=[]),
+    )
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "session.jsonl"
+
+    def _record(self) -> list[int]:
+        sent: list[int] = []
+
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            sent.append(payload)
+            return payload <= 1372  # PMTU 1400
+
+        p1, p2, p3, p4, p5 = _host_patches()
+        with (
+            p1,
+            p2,
+            p3,
+            p4,
+            p5,
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+            recording(Tracer(self.path)),
+        ):
+            result = run(Config(pmtu_target=("192.0.2.1",), dry_run=True))
+        self.assertEqual(result.pmtu_chosen, 1400)
+        return sent
+
+    def test_record_writes_probes_and_result(self) -> None:
+        sent = self._record()
+        lines = [json.loads(s) for s in self.path.read_text().splitlines()]
+
+        self.assertEqual(lines[0]["type"], "session")
+        probes = [r for r in lines if r["type"] == "probe"]
+        self.assertEqual([r["payload"] for r in probes], sent)
+        self.assertTrue(all(r["target"] == "192.0.2.1" for r in probes))
+        self.assertEqual(probes[0]["step"], "floor")
+        self.assertEqual(lines[-1]["type"], "result")
+        self.assertEqual(lines[-1]["pmtu"], 1400)
+
+    def test_replay_reproduces_the_run_without_network(self) -> None:
+        self._record()
+        p1, p2, p3, p4, p5 = _host_patches()
+        with (
+            p1,
+            p2,
+            p3,
+            p4,
+            p5,
+            patch("automtu.pmtu._ping_ok", side_effect=AssertionError("network")),
+            patch("automtu.core.resolve_hosts", side_effect=AssertionError("dns")),
+        ):
+            result = run(Config(replay_file=str(self.path), dry_run=True))
+            # a different search (hint revalidation) asks unrecorded sizes
+            hinted = run(
+                Config(
+                    replay_file=str(self.path),
+                    pmtu_hints={"192.0.2.1": 1500},
+                    dry_run=True,
+                )
+            )
+
+        self.assertEqual(result.pmtu_results, {"192.0.2.1": 1400})
+        self.assertEqual(hinted.pmtu_results, {"192.0.2.1": 1400})
+
+    def test_replay_uses_recorded_host_and_changes_nothing(self) -> None:
+        self._record()
+        lines = [json.loads(s) for s in self.path.read_text().splitlines()]
+        self.assertIn(
+            {"type": "mtu", "iface": "eth0", "mtu": 1500, "egress": True}, lines
+        )
+
+        state = self.path.with_name("state.json")
+        applied: list[tuple[str, int, bool]] = []
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="ens9"),
+            patch("automtu.core.read_iface_mtu", side_effect=AssertionError("live")),
+            patch("automtu.core.iface_exists", return_value=False),
+            patch("automtu.core.wg_is_active", return_value=False),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+        ):
+            result = run(
+                Config(
+                    replay_file=str(self.path),
+                    apply_egress_mtu=True,
+                    state_file=str(state),
+                ),
+                apply=lambda iface, mtu, dry: applied.append((iface, mtu, dry)),
+            )
+
+        self.assertEqual((result.egress_iface, result.base_mtu), ("eth0", 1500))
+        self.assertEqual(result.effective_mtu, 1400)
+        self.assertEqual(applied, [("eth0", 1400, True)])
+        self.assertFalse(state.exists())
+
+    def test_unrecorded_payloads_follow_recorded_bounds(self) -> None:
+        self.path.write_text(
+            '{"type":"session","version":1}\n'
+            '{"type":"probe","target":"t","payload":1300,"ok":true,"elapsed":0.01}\n'
+            '{"type":"probe","target":"t","payload":1400,"ok":false,"elapsed":1.0}\n'
+            '{"type":"result","target":"t","pmtu":1328}\n'
+        )
+        replay = load_session(self.path)
+        ok = replay._make_ok("t", 1.0)
+
+        self.assertTrue(ok(1250))
+        self.assertFalse(ok(1350))  # never proven: not assumed to pass
+        self.assertEqual(replay.probe("t", 1200, 1472), 1328)
+        self.assertIsNone(replay.probe("unknown", 1200, 1472))
+
+    def test_original_speed_waits_recorded_time(self) -> None:
+        self.path.write_text(
+            '{"type":"session","version":1}\n'
+            '{"type":"probe","target":"t","payload":1300,"ok":false,"elapsed":0.25}\n'
+        )
+        replay = load_session(self.path, speed="original")
+        with patch("automtu.replay.time.sleep") as sleep:
+            self.assertFalse(replay._make_ok("t", 1.0)(1300))
+        sleep.assert_called_once_with(0.25)
+
+    def test_rejects_files_that_are_not_sessions(self) -> None:
+        self.path.write_text('{"type":"probe","target":"t","payload":1,"ok":true}\n')
+        with self.assertRaises(ValueError):
+            load_session(self.path)
+        self.path.write_text('{"type":"session","version":1}\nnot json\n')
+        with self.assertRaisesRegex(ValueError, "line 2"):
+            load_session(self.path)
+
+        p1, p2, p3, p4, p5 = _host_patches()
+        with p1, p2, p3, p4, p5, self.assertRaises(AutoMTUError) as ctx:
+            run(Config(replay_file=str(self.path)))
+        self.assertEqual(ctx.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import socket
+import unittest
+from unittest.mock import patch
+
+from automtu import resolve
+
+
+def _fake_getaddrinfo(host, port, family, *args):  # type: ignore[no-untyped-def]
+    table = {
+        socket.AF_INET: [(socket.AF_INET, 0, 0, "", ("192.0.2.10", 0))],
+        socket.AF_INET6: [(socket.AF_INET6, 0, 0, "", ("2001:db8::10", 0, 0, 0))],
+    }
+    if host == "nx.example":
+        raise socket.gaierror("no such host")
+    if family == socket.AF_UNSPEC:
+        return table[socket.AF_INET6] + table[socket.AF_INET]
+    return table[family]
+
+
+class TestResolve(unittest.TestCase):
+    def test_resolve_hosts_both_families_and_failures(self) -> None:
+        cache = resolve.DnsCache(ttl=60)
+        with patch("automtu.resolve.socket.getaddrinfo", side_effect=_fake_getaddrinfo):
+            got = resolve.resolve_hosts(
+                ["peer.example", "nx.example"], ("4", "6"), cache=cache
+            )
+
+        self.assertEqual(got[("peer.example", "4")], ["192.0.2.10"])
+        self.assertEqual(got[("peer.example", "6")], ["2001:db8::10"])
+        self.assertEqual(got[("nx.example", "4")], [])
+        # failures are not cached
+        self.assertIsNone(cache.get("nx.example", "4"))
+
+    def test_resolve_hosts_uses_cache_until_ttl_expires(self) -> None:
+        cache = resolve.DnsCache(ttl=60)
+        with patch(
+            "automtu.resolve.socket.getaddrinfo", side_effect=_fake_getaddrinfo
+        ) as gai:
+            resolve.resolve_hosts(["peer.example"], ("auto",), cache=cache)
+            resolve.resolve_hosts(
+                ["peer.example", "peer.example"], ("auto",), cache=cache
+            )
+        self.assertEqual(gai.call_count, 1)
+
+        self.assertIsNone(cache.get("peer.example", "auto", now=10**12))
+
+    def test_dns_cache_state_roundtrip(self) -> None:
+        cache = resolve.DnsCache(ttl=60)
+        cache.put("peer.example", "6", ["2001:db8::10"], now=100.0)
+
+        restored = resolve.DnsCache(ttl=60)
+        restored.load_state(cache.to_state())
+
+        self.assertEqual(restored.get("peer.example", "6", now=110.0), ["2001:db8::10"])
+        self.assertIsNone(restored.get("peer.example", "6", now=200.0))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
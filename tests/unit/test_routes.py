@@ -0,0 +1,118 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from automtu import routes
+from automtu.wg import WgPeer
+
+
+class TestRoutes(unittest.TestCase):
+    def test_plan_peer_routes_locks_per_peer_and_keeps_best_iface_mtu(self) -> None:
+        peers = [
+            WgPeer("A", "192.0.2.1", ("10.0.1.0/24",)),
+            WgPeer("B", "192.0.2.2", ("10.0.2.0/24", "fd00::/64")),
+            WgPeer("C", None, ("10.0.3.0/24",)),  # unknown MTU
+        ]
+
+        got, iface_mtu, detail = routes.plan_peer_routes(
+            peers, {"A": 1420, "B": 1360, "C": None}, fallback_mtu=1380
+        )
+
+        self.assertEqual(
+            got, {"10.0.1.0/24": 1420, "10.0.2.0/24": 1360, "fd00::/64": 1360}
+        )
+        # C follows the interface MTU -> fallback caps it
+        self.assertEqual(iface_mtu, 1380)
+        self.assertFalse(detail["C"]["routed"])
+
+    def test_plan_peer_routes_skips_default_route_peers(self) -> None:
+        peers = [
+            WgPeer("A", "192.0.2.1", ("10.0.1.0/24",)),
+            WgPeer("HUB", "192.0.2.9", ("0.0.0.0/0",)),
+        ]
+
+        got, iface_mtu, _ = routes.plan_peer_routes(
+            peers, {"A": 1420, "HUB": 1400}, fallback_mtu=1380
+        )
+
+        self.assertEqual(got, {"10.0.1.0/24": 1420})
+        self.assertEqual(iface_mtu, 1400)
+
+    def test_plan_peer_routes_all_routed_uses_best_peer(self) -> None:
+        peers = [
+            WgPeer("A", "192.0.2.1", ("10.0.1.0/24",)),
+            WgPeer("B", "192.0.2.2", ("10.0.2.0/24",)),
+        ]
+        _, iface_mtu, _ = routes.plan_peer_routes(
+            peers, {"A": 1420, "B": 1300}, fallback_mtu=1300
+        )
+        self.assertEqual(iface_mtu, 1420)
+
+    def test_current_routes_parses_owned_routes(self) -> None:
+        def fake_run(cmd: list[str]) -> str:
+            if cmd[1] == "-4":
+                return "10.0.1.0/24 scope link mtu lock 1420\n10.0.9.9 scope link mtu lock 1300"
+            return "fd00::/64 metric 1024 mtu lock 1360 pref medium"
+
+        with patch("automtu.routes._run", side_effect=fake_run):
+            got = routes.current_routes("wg0")
+
+        self.assertEqual(
+            got, {"10.0.1.0/24": 1420, "10.0.9.9/32": 1300, "fd00::/64": 1360}
+        )
+
+    def test_sync_routes_batches_only_the_diff(self) -> None:
+        desired = {"10.0.1.0/24": 1420, "10.0.2.0/24": 1360}
+        current = {"10.0.1.0/24": 1420, "10.0.2.0/24": 1400, "10.0.9.0/24": 1300}
+
+        with patch("automtu.routes.subprocess.run") as run:
+            changed, removed = routes.sync_routes("wg0", desired, current, dry=False)
+
+        self.assertEqual(changed, ["10.0.2.0/24"])
+        self.assertEqual(removed, ["10.0.9.0/24"])
+        run.assert_called_once()
+        self.assertEqual(run.call_args.args[0], ["ip", "-batch", "-"])
+        batch = run.call_args.kwargs["input"]
+        self.assertIn(
+            "route replace 10.0.2.0/24 dev wg0 proto 233 mtu lock 1360", batch
+        )
+        self.assertIn("route del 10.0.9.0/24 dev wg0 proto 233", batch)
+        self.assertNotIn("10.0.1.0/24", batch)
+
+    def test_sync_routes_add_then_remove_restores_the_plain_route(self) -> None:
+        with patch("automtu.routes.subprocess.run") as run:
+            routes.sync_routes("wg0", {"10.0.1.0/24": 1420}, {}, dry=False)
+            added = run.call_args.kwargs["input"]
+            # the peer's MTU became unknown: the prefix is still its allowed-ip
+            routes.sync_routes(
+                "wg0",
+                {},
+                {"10.0.1.0/24": 1420, "10.0.9.0/24": 1300},
+                dry=False,
+                allowed={"10.0.1.0/24"},
+            )
+            restored = run.call_args.kwargs["input"]
+
+        self.assertIn("route replace 10.0.1.0/24 dev wg0 proto 233 mtu lock", added)
+        self.assertIn("route replace 10.0.1.0/24 dev wg0 proto boot\n", restored)
+        self.assertNotIn("route del 10.0.1.0/24", restored)
+        # no peer routes 10.0.9.0/24 any more: nothing to hand back
+        self.assertIn("route del 10.0.9.0/24 dev wg0 proto 233", restored)
+
+    def test_sync_routes_noop_and_dry_run(self) -> None:
+        with patch("automtu.routes.subprocess.run") as run:
+            routes.sync_routes(
+                "wg0", {"10.0.1.0/24": 1420}, {"10.0.1.0/24": 1420}, dry=False
+            )
+        run.assert_not_called()
+
+        out = io.StringIO()
+        with patch("automtu.routes.subprocess.run") as run, redirect_stdout(out):
+            routes.sync_routes("wg0", {"10.0.1.0/24": 1420}, {}, dry=True)
+        run.assert_not_called()
+        self.assertIn("DRY-RUN: ip route replace 10.0.1.0/24", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
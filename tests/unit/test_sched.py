@@ -0,0 +1,102 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from automtu import pmtu
+from automtu.sched import (
+    DeadlineExceeded,
+    expired,
+    order_by_information,
+    run_scheduled,
+)
+
+
+class TestSched(unittest.TestCase):
+    def test_hinted_targets_are_scheduled_first(self) -> None:
+        self.assertEqual(
+            order_by_information(["a", "b", "c"], {"c": 1400}), ["c", "a", "b"]
+        )
+
+    def test_without_deadline_all_targets_complete(self) -> None:
+        sched = run_scheduled(
+            ["a", "b"],
+            lambda t, hint: {"a": 1420, "b": None}[t],
+            hints={},
+            deadline_s=None,
+        )
+        self.assertEqual(sched.results, {"a": 1420, "b": None})
+        self.assertEqual((sched.partial, sched.cancelled), ([], []))
+
+    def test_deadline_reports_best_bound_and_cancels_stragglers(self) -> None:
+        release = threading.Event()
+
+        def probe(target: str, hint: int | None) -> int | None:
+            if target == "fast":
+                return 1500
+            if target == "slow":
+                # a search that runs out of time mid-way
+                time.sleep(0.1)
+                raise DeadlineExceeded(1400)
+            release.wait(5)  # ignores the deadline entirely
+            return 1300
+
+        with patch("automtu.sched._GRACE_S", 0.05):
+            sched = run_scheduled(
+                ["fast", "slow", "stuck"], probe, hints={}, deadline_s=0.1
+            )
+        release.set()
+
+        self.assertEqual(sched.results, {"fast": 1500, "slow": 1400, "stuck": None})
+        self.assertEqual(sched.partial, ["slow"])
+        self.assertEqual(sched.cancelled, ["stuck"])
+
+    def test_early_stop_cancels_running_searches(self) -> None:
+        def probe(target: str, hint: int | None) -> int | None:
+            if target == "fast":
+                return 1420
+            while not expired():  # a search polling between probes
+                time.sleep(0.01)
+            raise DeadlineExceeded(None)
+
+        started = time.monotonic()
+        sched = run_scheduled(
+            ["fast", "slow"],
+            probe,
+            hints={},
+            deadline_s=None,
+            on_result=lambda key, pmtu, s: pmtu is not None,
+        )
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(sched.results, {"fast": 1420, "slow": None})
+        self.assertEqual(sched.short_circuited, ["slow"])
+        self.assertEqual(sched.cancelled, [])
+
+    def test_search_stops_at_deadline_with_largest_passing_payload(self) -> None:
+        calls: list[int] = []
+
+        def fake_ping_ok(payload: int, target: str, timeout_s: float) -> bool:
+            calls.append(payload)
+            if len(calls) == 3:
+                time.sleep(0.2)  # this probe outlives the deadline
+                return False
+            return payload <= 1400
+
+        def probe(target: str, hint: int | None) -> int | None:
+            return pmtu.probe_pmtu(target, 1200, 1472, 1.0, hint=hint)
+
+        with (
+            patch("automtu.pmtu._is_ipv6", return_value=False),
+            patch("automtu.pmtu._ping_ok", side_effect=fake_ping_ok),
+        ):
+            sched = run_scheduled(["1.1.1.1"], probe, hints={}, deadline_s=0.1)
+
+        # floor 1200 ok, 1336 ok, third probe cut short: best bound 1336 + 28
+        self.assertEqual(calls, [1200, 1336, 1404])
+        self.assertEqual(sched.results, {"1.1.1.1": 1364})
+        self.assertEqual(sched.partial, ["1.1.1.1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
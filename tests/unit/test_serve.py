@@ -0,0 +1,175 @@
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from automtu.cli import build_parser, build_serve_parser
+from automtu.core import AutoMTUError, config_from_args, run_automtu
+from automtu.serve import Server, SingleFlight, config_digest, query, run_serve
+
+
+def _result(effective: int = 1420) -> SimpleNamespace:
+    return SimpleNamespace(
+        effective_mtu=effective,
+        wg_mtu=effective - 80,
+        base_mtu=1500,
+        to_dict=lambda: {"egress": {"effective_mtu": effective}},
+    )
+
+
+def _digest(argv: list[str]) -> str:
+    return config_digest(config_from_args(build_parser().parse_args(argv)))
+
+
+class TestServe(unittest.TestCase):
+    def test_single_flight_coalesces_concurrent_refreshes(self) -> None:
+        calls: list[int] = []
+
+        def slow() -> int:
+            calls.append(1)
+            time.sleep(0.1)
+            return len(calls)
+
+        sf = SingleFlight(slow, ttl=60)
+        out: list[int] = []
+        threads = [
+            threading.Thread(target=lambda: out.append(sf.get())) for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(out, [1] * 8)
+        self.assertEqual(sf.get(), 1)  # cached within the TTL
+        self.assertEqual(sf.get(refresh=True), 2)
+
+    def test_single_flight_recomputes_after_ttl(self) -> None:
+        sf = SingleFlight(iter(range(10)).__next__, ttl=0)
+        self.assertEqual([sf.get(), sf.get()], [0, 1])
+
+    def test_single_flight_settles_followers_on_system_exit(self) -> None:
+        started = threading.Event()
+
+        def fail() -> int:
+            started.set()
+            time.sleep(0.1)
+            raise SystemExit(1)
+
+        sf = SingleFlight(fail, ttl=60)
+        errors: list[SystemExit] = []
+
+        def follow() -> None:
+            started.wait()
+            try:
+                sf.get()
+            except SystemExit as e:
+                errors.append(e)
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+        with self.assertRaises(SystemExit):
+            sf.get()
+        follower.join(timeout=2)
+
+        self.assertFalse(follower.is_alive())
+        self.assertEqual(len(errors), 1)
+
+    def _serve(
+        self, path: str, results: SingleFlight, argv: list[str] | None = None
+    ) -> Server:
+        server = Server(path, results, _digest(argv or []))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_server_answers_fields_and_rejects_bad_requests(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = str(Path(d) / "automtu.sock")
+            self._serve(path, SingleFlight(_result, ttl=60))
+
+            self.assertEqual(query(path, "effective"), "1420")
+            self.assertEqual(query(path, "wg"), "1340")
+            self.assertEqual(query(path, "egress"), "1500")
+            self.assertEqual(
+                json.loads(query(path, "json")),
+                {"egress": {"effective_mtu": 1420}},
+            )
+            with self.assertRaises(OSError):
+                query(path, "bogus")
+
+    def test_stale_socket_file_is_replaced(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = str(Path(d) / "automtu.sock")
+            Server(
+                path, SingleFlight(_result, ttl=60)
+            ).socket.close()  # leaves the file
+            self._serve(path, SingleFlight(_result, ttl=60))
+            self.assertEqual(query(path, "effective"), "1420")
+
+    def test_refuses_to_remove_non_socket(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "important.conf"
+            path.write_text("keep")
+            with self.assertRaises(OSError):
+                Server(str(path), SingleFlight(_result, ttl=60))
+            self.assertEqual(path.read_text(), "keep")
+
+    def test_serve_expands_apply_all_and_checks_root(self) -> None:
+        args = build_serve_parser().parse_args(["--apply-all", "--socket", "/x"])
+        with (
+            patch("automtu.core.require_root") as root,
+            patch("automtu.serve.Server", side_effect=OSError("no")),
+            redirect_stdout(io.StringIO()),
+            patch("sys.stderr", io.StringIO()),
+        ):
+            self.assertEqual(run_serve(args), 2)
+
+        self.assertTrue(args.apply_docker_mtu)
+        root.assert_called_once_with(dry=False, needs_root=True)
+
+    def test_cli_thin_client_uses_running_server(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = str(Path(d) / "automtu.sock")
+            self._serve(path, SingleFlight(_result, ttl=60), ["--auto-pmtu-from-wg"])
+            args = build_parser().parse_args(
+                ["--socket", path, "--print-mtu", "wg", "--auto-pmtu-from-wg"]
+            )
+
+            with patch("automtu.core.compute") as p_compute:
+                buf = io.StringIO()
+                with redirect_stdout(buf):
+                    rc = run_automtu(args)
+
+        self.assertEqual(rc, 0)
+        self.assertEqual(buf.getvalue(), "1340\n")
+        p_compute.assert_not_called()
+
+    def test_cli_thin_client_runs_locally_when_options_differ(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = str(Path(d) / "automtu.sock")
+            self._serve(path, SingleFlight(_result, ttl=60), ["--auto-pmtu-from-wg"])
+            argv = ["--socket", path, "--print-mtu", "wg", "--pmtu-target", "9.9.9.9"]
+            with self.assertRaisesRegex(OSError, "options differ"):
+                query(path, "wg", digest=_digest(argv))
+
+            with (
+                patch("automtu.core.check_root"),
+                patch("automtu.core.compute", side_effect=AutoMTUError("local", 3)),
+                patch("sys.stderr", io.StringIO()),
+            ):
+                rc = run_automtu(build_parser().parse_args(argv))
+
+        self.assertEqual(rc, 3)  # the local run, not the server's answer
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from automtu import Config, run
+from automtu.stability import gate
+
+
+class TestStability(unittest.TestCase):
+    def _run(self, values: list[int], **kw: int) -> list[tuple[str, int]]:
+        entry = None
+        out: list[tuple[str, int]] = []
+        for v in values:
+            decision, entry = gate(v, entry, **kw)
+            out.append((decision["decision"], decision["value"]))
+        return out
+
+    def test_increase_needs_consecutive_confirmations(self) -> None:
+        self.assertEqual(
+            self._run([1420, 1500, 1492, 1500], confirm=3),
+            [
+                ("apply", 1420),
+                ("pending", 1420),
+                ("pending", 1420),
+                ("apply", 1492),  # lowest value seen while confirming
+            ],
+        )
+
+    def test_decrease_applies_immediately_and_resets_confirmation(self) -> None:
+        self.assertEqual(
+            self._run([1500, 1400, 1500, 1380, 1500], confirm=2),
+            [
+                ("apply", 1500),
+                ("apply", 1400),
+                ("pending", 1400),
+                ("apply", 1380),
+                ("pending", 1380),
+            ],
+        )
+
+    def test_increases_within_threshold_are_held(self) -> None:
+        self.assertEqual(
+            self._run([1420, 1412, 1416, 1412, 1416], confirm=2, threshold=8),
+            [
+                ("apply", 1420),
+                ("apply", 1412),
+                ("hold", 1412),
+                ("unchanged", 1412),  # not consecutive: confirmation restarts
+                ("hold", 1412),
+            ],
+        )
+
+    def test_small_increase_applies_once_confirmed(self) -> None:
+        self.assertEqual(
+            self._run([1412, 1416, 1420, 1416], confirm=3, threshold=8),
+            [
+                ("apply", 1412),
+                ("hold", 1412),
+                ("hold", 1412),
+                ("apply", 1416),
+            ],
+        )
+
+    def test_small_decrease_is_not_held(self) -> None:
+        self.assertEqual(
+            self._run([1420, 1412, 1412, 1412], confirm=2, threshold=8),
+            [
+                ("apply", 1420),
+                ("apply", 1412),
+                ("unchanged", 1412),
+                ("unchanged", 1412),
+            ],
+        )
+
+    def test_dry_run_does_not_advance_gate(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            with (
+                patch("automtu.core.detect_egress_iface", return_value="eth0"),
+                patch("automtu.core.iface_exists", return_value=True),
+                patch("automtu.core.read_iface_mtu", return_value=1500),
+                patch("automtu.core.wg_is_active", return_value=False),
+                patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            ):
+                run(
+                    Config(
+                        pmtu_target=("a",),
+                        state_file=str(path),
+                        stability_confirm=2,
+                        dry_run=True,
+                    ),
+                    probe=lambda t, hint: 1420,
+                    apply=lambda iface, mtu, dry: None,
+                )
+            self.assertFalse(path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from automtu import state
+
+
+class TestState(unittest.TestCase):
+    def test_load_state_missing_or_broken_file_is_empty(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "state.json"
+            self.assertEqual(state.known_pmtus(state.load_state(p)), {})
+
+            p.write_text("{not json")
+            self.assertEqual(state.known_pmtus(state.load_state(p)), {})
+
+    def test_record_and_roundtrip_keeps_previous_on_failure(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            p = Path(d) / "sub" / "state.json"
+
+            s = state.record_pmtus({}, {"1.1.1.1": 1420, "8.8.8.8": 1500}, now=1.0)
+            state.save_state(p, s)
+
+            s = state.record_pmtus(
+                state.load_state(p), {"1.1.1.1": None, "8.8.8.8": 1452}, now=2.0
+            )
+            state.save_state(p, s)
+
+            self.assertEqual(
+                state.known_pmtus(state.load_state(p)),
+                {"1.1.1.1": 1420, "8.8.8.8": 1452},
+            )
+
+    def test_cache_ttl_ages_from_last_full_probe(self) -> None:
+        s = state.record_pmtus({}, {"a": 1420, "b": 1500}, now=100.0)
+        # "a" was only revalidated later: its full-probe time stays at 100
+        s = state.record_pmtus(s, {"a": 1420, "b": 1492}, now=900.0, revalidated=["a"])
+
+        self.assertEqual(state.known_pmtus(s, max_age=600, now=1000.0), {"b": 1492})
+        self.assertEqual(state.known_pmtus(s, now=1000.0), {"a": 1420, "b": 1492})
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,100 @@
+import socket
+import struct
+import threading
+import unittest
+from unittest.mock import patch
+
+from automtu import tcp
+
+
+class _Server:
+    """Accepts connections on localhost and discards whatever is sent."""
+
+    def __init__(self) -> None:
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.accepted = 0
+        self._t = threading.Thread(target=self._serve, daemon=True)
+        self._t.start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            with conn:
+                while conn.recv(65535):
+                    pass
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+class TestTcp(unittest.TestCase):
+    def test_probe_pmtu_tcp_localhost_capped_to_upper_bound(self) -> None:
+        srv = _Server()
+        try:
+            mtu = tcp.probe_pmtu_tcp(f"127.0.0.1:{srv.port}", 1200, 1472, 0.05)
+        finally:
+            srv.close()
+
+        # loopback IP_MTU is 65536 -> capped at hi payload + IPv4/ICMP headers
+        self.assertEqual(mtu, 1500)
+        self.assertEqual(srv.accepted, 1)
+
+    def test_probe_pmtu_tcp_follows_lowered_path_mtu_on_one_connection(
+        self,
+    ) -> None:
+        srv = _Server()
+        # first read: interface MTU, afterwards: learned from "frag needed"
+        seen = iter([1500, 1420, 1420])
+        try:
+            with patch("automtu.tcp._path_mtu", side_effect=lambda s, f: next(seen)):
+                mtu = tcp.probe_pmtu_tcp(f"127.0.0.1:{srv.port}", 1200, 1472, 0.05)
+        finally:
+            srv.close()
+
+        self.assertEqual(mtu, 1420)
+        self.assertEqual(srv.accepted, 1)
+
+    def test_mss_clamped_path_is_not_reported_as_route_mtu(self) -> None:
+        srv = _Server()
+        try:
+            with (
+                patch("automtu.tcp._path_mtu", return_value=1500),
+                patch("automtu.tcp._mss_mtu", return_value=1400),
+            ):
+                mtu = tcp.probe_pmtu_tcp(f"127.0.0.1:{srv.port}", 1200, 1472, 0.05)
+        finally:
+            srv.close()
+
+        self.assertEqual(mtu, 1400)
+
+    def test_mss_mtu_adds_back_timestamp_option(self) -> None:
+        class FakeSock:
+            def __init__(self, options: int) -> None:
+                self.info = bytes([0] * 5 + [options, 0, 0]) + struct.pack(
+                    "=III", 0, 0, 1448
+                )
+
+            def getsockopt(self, level: int, opt: int, size: int = 0) -> bytes:
+                return self.info.ljust(size, b"\0")
+
+        self.assertEqual(tcp._mss_mtu(FakeSock(1), socket.AF_INET), 1500)  # type: ignore[arg-type]
+        self.assertEqual(tcp._mss_mtu(FakeSock(0), socket.AF_INET6), 1508)  # type: ignore[arg-type]
+
+    def test_probe_pmtu_tcp_connection_refused_returns_none(self) -> None:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()
+
+        self.assertIsNone(tcp.probe_pmtu_tcp(f"127.0.0.1:{port}", 1200, 1472, 0.2))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
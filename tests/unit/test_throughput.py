@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from automtu import Config, run, udp
+from automtu.throughput import validate_throughput
+
+
+class TestThroughput(unittest.TestCase):
+    def setUp(self) -> None:
+        self.responder = udp.Responder("127.0.0.1", 0)
+        t = threading.Thread(target=self.responder.serve_forever, daemon=True)
+        t.start()
+
+        def stop() -> None:
+            self.responder.close()
+            t.join(timeout=2)
+
+        self.addCleanup(stop)
+        self.target = f"127.0.0.1:{self.responder.port}"
+
+    def test_measure_goodput_against_local_responder(self) -> None:
+        m = udp.measure_goodput(self.target, 1500, duration=0.1, timeout=1.0)
+
+        self.assertIsNotNone(m)
+        assert m is not None
+        self.assertEqual(m["mtu"], 1500)
+        self.assertGreater(m["sent"], 0)
+        self.assertGreater(m["received"], 0)
+        self.assertLessEqual(m["received"], m["sent"])
+        self.assertGreater(m["goodput_bps"], 0)
+
+    def test_validation_stays_within_budget(self) -> None:
+        started = time.monotonic()
+        result = validate_throughput(self.target, 1500, budget=0.4)
+
+        self.assertLess(time.monotonic() - started, 0.4 + 0.1)
+        self.assertEqual(result["measured"][0]["mtu"], 1500)
+        self.assertIn(result["chosen"], (1500, 1480, 1460, 1420))
+
+    def test_smaller_mtu_must_be_clearly_faster(self) -> None:
+        rates = {1500: 100, 1480: 105, 1460: 200, 1420: 150}
+
+        def fake(target, mtu, **kw):  # type: ignore[no-untyped-def]
+            return {"mtu": mtu, "goodput_bps": rates[mtu]}
+
+        with patch("automtu.throughput.measure_goodput", side_effect=fake):
+            self.assertEqual(validate_throughput("x", 1500)["chosen"], 1460)
+            rates.update({1460: 108, 1420: 95})
+            self.assertEqual(validate_throughput("x", 1500)["chosen"], 1500)
+
+    def test_wg_peer_transfers_use_the_probe_fwmark(self) -> None:
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="eth0"),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            patch("automtu.core.wg_is_active", return_value=True),
+            patch("automtu.core.wg_peer_endpoints", return_value=["198.51.100.7"]),
+            patch("automtu.core.wg_fwmark", return_value=51820),
+            patch("automtu.core.probe_pmtu_udp", return_value=1420),
+            patch("automtu.throughput.validate_throughput") as validate,
+        ):
+            validate.return_value = {"chosen": 1420, "measured": []}
+            run(
+                Config(
+                    auto_pmtu_from_wg=True,
+                    pmtu_backend="udp",
+                    throughput_validate=True,
+                    wg_overhead=80,
+                )
+            )
+
+        validate.assert_called_once_with("198.51.100.7", 1420, budget=2.0, fwmark=51820)
+
+    def test_budget_is_capped_by_the_deadline(self) -> None:
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="eth0"),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            patch("automtu.core.probe_pmtu_udp", return_value=1420),
+            patch("automtu.throughput.validate_throughput") as validate,
+        ):
+            validate.return_value = {"chosen": 1420, "measured": []}
+            run(
+                Config(
+                    pmtu_target=(self.target,),
+                    pmtu_backend="udp",
+                    throughput_validate=True,
+                    deadline=0.3,
+                )
+            )
+
+        budget = validate.call_args.kwargs["budget"]
+        self.assertGreater(budget, 0)
+        self.assertLessEqual(budget, 0.3)
+
+    def test_no_responder_keeps_probed_mtu(self) -> None:
+        self.responder.close()
+        result = validate_throughput(self.target, 1500, budget=0.2)
+        self.assertEqual(result["chosen"], 1500)
+        self.assertTrue(all(m["goodput_bps"] is None for m in result["measured"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from automtu import Config, run
+from automtu.tunnels import Tunnel, parse_tunnels, plan_stack, tunnel_overhead
+
+_LINKS = json.dumps(
+    [
+        {"ifname": "lo", "mtu": 65536},
+        {"ifname": "bond0", "mtu": 1500, "linkinfo": {"info_kind": "bond"}},
+        {
+            "ifname": "vxlan100",
+            "mtu": 1450,
+            "link": "bond0",
+            "linkinfo": {
+                "info_kind": "vxlan",
+                "info_data": {"id": 100, "remote": "192.0.2.7", "link": "bond0"},
+            },
+        },
+        {
+            "ifname": "gnv0",
+            "mtu": 1500,
+            "linkinfo": {
+                "info_kind": "geneve",
+                "info_data": {"remote6": "2001:db8::7"},
+            },
+        },
+        {
+            "ifname": "gre1",
+            "mtu": 1476,
+            "linkinfo": {
+                "info_kind": "gre",
+                "info_data": {"remote": "198.51.100.1", "okey": "0.0.0.5"},
+            },
+        },
+        {"ifname": "wg0", "mtu": 1420, "linkinfo": {"info_kind": "wireguard"}},
+        {
+            "ifname": "ip6tnl1",
+            "mtu": 1452,
+            "linkinfo": {
+                "info_kind": "ip6tnl",
+                "info_data": {"remote": "2001:db8::9", "encap_limit": 4},
+            },
+        },
+        {
+            "ifname": "gre6",
+            "mtu": 1456,
+            "linkinfo": {
+                "info_kind": "ip6gre",
+                "info_data": {
+                    "remote": "2001:db8::9",
+                    "ip6_tnl_f_ign_encap_limit": True,
+                },
+            },
+        },
+    ]
+)
+
+
+class TestTunnels(unittest.TestCase):
+    def test_parse_tunnels_kind_underlay_family(self) -> None:
+        tunnels, mtus = parse_tunnels(_LINKS)
+        by_name = {t.name: t for t in tunnels}
+
+        self.assertEqual(
+            sorted(by_name), ["gnv0", "gre1", "gre6", "ip6tnl1", "vxlan100", "wg0"]
+        )
+        self.assertEqual(mtus["bond0"], 1500)
+        self.assertEqual(by_name["vxlan100"].underlay, "bond0")
+        self.assertEqual(by_name["vxlan100"].family, "ipv4")
+        self.assertEqual(by_name["gnv0"].family, "ipv6")
+        self.assertEqual(by_name["gre1"].gre_extra, 4)
+        self.assertIsNone(by_name["wg0"].family)
+
+    def test_overheads(self) -> None:
+        tunnels, _ = parse_tunnels(_LINKS)
+        overhead = {t.name: tunnel_overhead(t)[0] for t in tunnels}
+        self.assertEqual(
+            overhead,
+            {
+                "vxlan100": 50,
+                "gnv0": 70,
+                "gre1": 28,
+                "wg0": 80,
+                "ip6tnl1": 48,  # 40 + the default encapsulation limit option
+                "gre6": 44,  # encaplimit none
+            },
+        )
+
+    def test_plan_stack_layers_wg_over_vxlan_over_bond(self) -> None:
+        tunnels, mtus = parse_tunnels(_LINKS)
+        plan = plan_stack(
+            tunnels,
+            mtus,
+            egress="bond0",
+            egress_mtu=1480,
+            routed={"wg0": "vxlan100"},
+            overrides={"wg0": (60, {"outer_family": "ipv4"})},
+        )
+
+        self.assertEqual(plan["vxlan100"]["mtu"], 1430)
+        self.assertEqual(plan["wg0"]["mtu"], 1370)
+        self.assertEqual(plan["wg0"]["depth"], 2)
+        self.assertEqual(plan["gre1"]["underlay"], "bond0")
+        self.assertEqual(plan["gre1"]["mtu"], 1452)
+        names = list(plan)
+        self.assertLess(names.index("vxlan100"), names.index("wg0"))
+
+    def test_plan_stack_ignores_loops(self) -> None:
+        loop = [
+            Tunnel("a", "ipip", "b", "ipv4", mtu=1480),
+            Tunnel("b", "ipip", "a", "ipv4", mtu=1480),
+        ]
+        self.assertEqual(plan_stack(loop, {}, egress="eth0", egress_mtu=1500), {})
+
+    def test_run_applies_each_level_and_nests_wg(self) -> None:
+        applied: list[tuple[str, int]] = []
+        with (
+            patch("automtu.core.detect_egress_iface", return_value="bond0"),
+            patch("automtu.core.iface_exists", return_value=True),
+            patch("automtu.core.read_iface_mtu", return_value=1500),
+            patch("automtu.core.wg_is_active", return_value=True),
+            patch("automtu.tunnels.wg_is_active", return_value=True),
+            patch("automtu.tunnels.wg_peer_endpoints", return_value=["10.8.0.1"]),
+            patch("automtu.tunnels.route_dev", return_value="vxlan100"),
+            patch("automtu.core.detect_docker_ifaces", return_value=[]),
+            patch("automtu.tunnels.subprocess.run") as ip,
+        ):
+            ip.return_value.stdout = _LINKS
+            result = run(
+                Config(
+                    wg_overhead=60,
+                    apply_tunnel_mtu=True,
+                    apply_wg_mtu=True,
+                    dry_run=True,
+                ),
+                apply=lambda iface, mtu, dry: applied.append((iface, mtu)),
+            )
+
+        self.assertEqual(result.wg_mtu, 1390)
+        self.assertIn(("vxlan100", 1450), applied)
+        self.assertIn(("wg0", 1390), applied)
+        self.assertLess(applied.index(("vxlan100", 1450)), applied.index(("wg0", 1390)))
+        self.assertTrue(result.to_dict()["tunnels"]["vxlan100"]["applied"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import errno
+import socket
+import threading
+import unittest
+from unittest.mock import patch
+
+from automtu import udp
+
+
+class TestUdp(unittest.TestCase):
+    def test_split_hostport(self) -> None:
+        self.assertEqual(udp.split_hostport("10.0.0.1", 9), ("10.0.0.1", 9))
+        self.assertEqual(udp.split_hostport("10.0.0.1:5000", 9), ("10.0.0.1", 5000))
+        self.assertEqual(
+            udp.split_hostport("[2001:db8::1]:5000", 9), ("2001:db8::1", 5000)
+        )
+        self.assertEqual(udp.split_hostport("[2001:db8::1]", 9), ("2001:db8::1", 9))
+        for bad in ("10.0.0.1:abc", "10.0.0.1:0", "10.0.0.1:70000", "[::1]:x"):
+            with self.assertRaisesRegex(ValueError, "invalid port"):
+                udp.split_hostport(bad, 9)
+
+    def test_send_errors_other_than_emsgsize_mean_unreachable(self) -> None:
+        unreachable = OSError(errno.ENETUNREACH, "Network is unreachable")
+        with patch("automtu.udp._probe_once", side_effect=unreachable):
+            self.assertIsNone(udp.probe_pmtu_udp("127.0.0.1:9", 1200, 1472, 0.2))
+
+    def test_probe_pmtu_udp_end_to_end_against_localhost_responder(self) -> None:
+        responder = udp.Responder("127.0.0.1", 0)
+        t = threading.Thread(target=responder.serve_forever, daemon=True)
+        t.start()
+        try:
+            mtu = udp.probe_pmtu_udp(
+                f"127.0.0.1:{responder.port}", 1200, 1472, timeout=1.0
+            )
+        finally:
+            responder.close()
+            t.join(timeout=2)
+
+        # loopback fits every size -> upper bound + IPv4/UDP headers
+        self.assertEqual(mtu, 1500)
+
+    def test_probe_pmtu_udp_lost_probes_count_as_too_big(self) -> None:
+        responder = udp.Responder("127.0.0.1", 0)
+        t = threading.Thread(target=responder.serve_forever, daemon=True)
+        t.start()
+
+        real_probe_once = udp._probe_once
+
+        def black_hole_above_1400(sock, seq, payload):  # type: ignore[no-untyped-def]
+            if payload > 1400:
+                return False
+            return real_probe_once(sock, seq, payload)
+
+        try:
+            with patch("automtu.udp._probe_once", side_effect=black_hole_above_1400):
+                mtu = udp.probe_pmtu_udp(
+                    f"127.0.0.1:{responder.port}", 1200, 1472, timeout=0.5
+                )
+        finally:
+            responder.close()
+            t.join(timeout=2)
+
+        self.assertEqual(mtu, 1428)
+
+    def test_emsgsize_does_not_fail_the_next_probe(self) -> None:
+        responder = udp.Responder("127.0.0.1", 0)
+        t = threading.Thread(target=responder.serve_forever, daemon=True)
+        t.start()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                udp._set_df(sock, socket.AF_INET)
+                sock.settimeout(1.0)
+                sock.connect(("127.0.0.1", responder.port))
+                # 65508 + 28 exceeds the IPv4 maximum: EMSGSIZE on send
+                self.assertFalse(udp._probe_once(sock, 1, 65508))
+                self.assertTrue(udp._probe_once(sock, 2, 9188))
+        finally:
+            responder.close()
+            t.join(timeout=2)
+
+    def test_probe_pmtu_udp_without_responder_fails(self) -> None:
+        responder = udp.Responder("127.0.0.1", 0)
+        port = responder.port
+        responder.close()  # nothing listens there any more
+
+        mtu = udp.probe_pmtu_udp(f"127.0.0.1:{port}", 1200, 1472, timeout=0.2)
+        self.assertIsNone(mtu)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
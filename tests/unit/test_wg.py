@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import patch
 
-import automtu.wg as wg
+from automtu import wg
 
 
 class TestWg(unittest.TestCase):
@@ -53,6 +53,44 @@ class TestWg(unittest.TestCase):
         with patch("automtu.wg.iface_exists", return_value=False):
             self.assertFalse(wg.wg_is_active("wg0"))
 
+    def test_wg_overhead_for_families(self) -> None:
+        self.assertEqual(wg.wg_overhead_for(["ipv4", "ipv4"])[0], 60)
+        self.assertEqual(wg.wg_overhead_for(["ipv4", "ipv6"])[0], 80)
+        self.assertEqual(wg.wg_overhead_for(["ipv6"])[0], 80)
+        self.assertEqual(wg.wg_overhead_for(["ipv4", None])[0], 80)  # unresolved
+
+        overhead, breakdown = wg.wg_overhead_for([])
+        self.assertEqual(overhead, 80)  # unknown -> safe worst case
+        self.assertIsNone(breakdown["outer_family"])
+        self.assertEqual(
+            breakdown["outer_ip"] + breakdown["udp"] + breakdown["wireguard"], 80
+        )
+
+    def test_wg_peers_parses_dump(self) -> None:
+        dump = (
+            "privkey\tpubkey\t51820\toff\n"
+            "peerA\t(none)\t46.4.224.77:51820\t10.0.1.0/24,fd00::1/128\t0\t0\t0\toff\n"
+            "peerB\t(none)\t(none)\t(none)\t0\t0\t0\toff\n"
+            "peerC\t(none)\t[2a01:db8::1]:51820\t0.0.0.0/0\t0\t0\t0\t25\n"
+        )
+        with patch("automtu.wg._run", return_value=dump):
+            peers = wg.wg_peers("wg0")
+
+        self.assertEqual(
+            peers,
+            [
+                wg.WgPeer("peerA", "46.4.224.77", ("10.0.1.0/24", "fd00::1/128")),
+                wg.WgPeer("peerB", None, ()),
+                wg.WgPeer("peerC", "2a01:db8::1", ("0.0.0.0/0",)),
+            ],
+        )
+
+    def test_wg_fwmark_parses_hex_and_off(self) -> None:
+        with patch("automtu.wg._run", return_value="0xca6c"):
+            self.assertEqual(wg.wg_fwmark("wg0"), 51820)
+        with patch("automtu.wg._run", return_value="off"):
+            self.assertIsNone(wg.wg_fwmark("wg0"))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)